@@ -0,0 +1,86 @@
+"""ImportTime
+
+Measures the time taken to import pyqtinstaller, as setuptools does for every `setup.py` invocation,
+using `python -X importtime`. Python 3.6 has no `-X importtime`, so there the import profiler of the
+profile_imports command is used instead, which doesn't time the few modules it imports itself.
+
+    python benchmarks/import_time.py --repeat 5 --max-ms 50
+
+The results are written as JSON, and the script fails if the median exceeds `--max-ms`
+"""
+import os
+from os import path
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import tempfile
+from collections import OrderedDict
+
+_here = path.abspath(path.dirname(__file__))
+sys.path.insert(0, path.dirname(_here))
+
+from pyqtinstaller.import_profile import run_profile # pylint: disable=wrong-import-position
+
+
+def measure_import(module):
+    """Imports `module` in a new interpreter, returning the cumulative import time of each module in microseconds
+    """
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join([path.dirname(_here), os.environ.get('PYTHONPATH', '')])}
+    if sys.version_info < (3, 7):
+        return _profile_import(module, env)
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env,
+        check=True
+    )
+    times = OrderedDict()
+    for line in process.stderr.decode('utf8').splitlines():
+        if line.startswith('import time:'):
+            parts = line[len('import time:'):].split('|')
+            if parts[1].strip().isdigit():
+                times[parts[2].strip()] = int(parts[1])
+    return times
+
+
+def _profile_import(module, env):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        entrypoint = path.join(temp_dir, 'import_module.py')
+        with open(entrypoint, 'w') as fp:
+            fp.write(f'import {module}\n')
+        imports = run_profile(sys.executable, entrypoint, module.split('.')[0], env=env)
+    return OrderedDict((name, i.cumulative_us) for name, i in imports.items())
+
+
+def main(args=None):
+    """Runs the benchmark
+    """
+    parser = argparse.ArgumentParser(description='Measures the import time of pyqtinstaller')
+    parser.add_argument('--module', default='pyqtinstaller', help='The module to import')
+    parser.add_argument('--repeat', type=int, default=5, help='The number of imports to time')
+    parser.add_argument('--top', type=int, default=10, help='The number of slowest imports to report')
+    parser.add_argument('--max-ms', type=float, help='Fail if the median import time exceeds this')
+    parsed_args = parser.parse_args(args)
+
+    runs = [measure_import(parsed_args.module) for _ in range(parsed_args.repeat)]
+    total_ms = statistics.median(run[parsed_args.module] for run in runs) / 1000
+    slowest = sorted(runs[-1].items(), key=lambda item: item[1], reverse=True)[:parsed_args.top]
+    json.dump(OrderedDict([
+        ('module', parsed_args.module),
+        ('python', sys.version.split()[0]),
+        ('median_ms', total_ms),
+        ('modules_imported', len(runs[-1])),
+        ('slowest_ms', OrderedDict((name, time / 1000) for name, time in slowest))
+    ]), sys.stdout, indent=2)
+    sys.stdout.write('\n')
+    if parsed_args.max_ms is not None and total_ms > parsed_args.max_ms:
+        sys.stderr.write(f'Importing {parsed_args.module} took {total_ms:.1f}ms, more than {parsed_args.max_ms}ms\n')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
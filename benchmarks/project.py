@@ -0,0 +1,88 @@
+"""Project
+
+This module generates synthetic PyQt projects of a configurable size for benchmarking the "compile" command
+"""
+import os
+from os import path
+
+MODULES_PER_PACKAGE = 20
+RESOURCE_FILE_BYTES = 64 * 1024
+
+_MODULE = '''from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class Model{index}(QObject):
+    changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._value = {index}
+
+    def value(self):
+        return self.tr('Value {{}}').format(self._value)
+'''
+
+_QML = '''import QtQuick 2.7
+
+Rectangle {{
+    width: {index}
+    height: 100
+    Text {{ text: qsTr("View {index}") }}
+}}
+'''
+
+
+def _write(filename, content):
+    os.makedirs(path.dirname(filename), exist_ok=True)
+    mode = 'wb' if isinstance(content, bytes) else 'w'
+    with open(filename, mode) as fp:
+        fp.write(content)
+
+
+def generate_project(root, modules=100, qml_files=10, resource_bytes=1024 * 1024, external_packages=2, languages=2,
+                     resource_qml_files=0):
+    """Generates a project in `root`, returning the options of the "compile" command which build it
+    Modules are spread over sub-packages, resources over files of at most 64KB, alongside `resource_qml_files` QML files
+    """
+    package = path.join(root, 'app')
+    _write(path.join(package, '__init__.py'), '')
+    _write(path.join(package, '__main__.py'), 'from . import *\n')
+    for index in range(modules):
+        sub_package = path.join(package, f'package_{index // MODULES_PER_PACKAGE}')
+        if not path.isfile(path.join(sub_package, '__init__.py')):
+            _write(path.join(sub_package, '__init__.py'), '')
+        _write(path.join(sub_package, f'module_{index}.py'), _MODULE.format(index=index))
+
+    for index in range(qml_files):
+        _write(path.join(package, 'qml', f'view_{index}.qml'), _QML.format(index=index))
+
+    index = 0
+    while index * RESOURCE_FILE_BYTES < resource_bytes:
+        size = min(RESOURCE_FILE_BYTES, resource_bytes - index * RESOURCE_FILE_BYTES)
+        _write(path.join(root, 'resources', f'image_{index}.png'), os.urandom(size))
+        index += 1
+
+    for index in range(resource_qml_files):
+        _write(path.join(root, 'resources', 'qml', f'screen_{index}.qml'), _QML.format(index=index))
+
+    names = [f'external_{i}' for i in range(external_packages)]
+    for name in names:
+        _write(path.join(root, name, '__init__.py'), '')
+        for index in range(MODULES_PER_PACKAGE):
+            _write(path.join(root, name, f'module_{index}.py'), _MODULE.format(index=index))
+        _write(path.join(root, name, 'native.dll'), b'\0' * 1024)
+
+    language_codes = [f'l{i}' for i in range(languages)]
+    for code in language_codes:
+        _write(
+            path.join(root, 'translations', f'app_{code}.ts'),
+            '<?xml version="1.0" encoding="utf-8"?>\n<!DOCTYPE TS>\n<TS version="2.1"></TS>\n'
+        )
+
+    return {
+        'package': 'app',
+        'app_name': 'Benchmark App',
+        'resources_dirs': 'resources' if resource_bytes or resource_qml_files else None,
+        'external_packages': ','.join(names) or None,
+        'languages': ','.join(language_codes) or None
+    }
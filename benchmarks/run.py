@@ -0,0 +1,168 @@
+"""Run
+
+Benchmarks the "compile" command on a synthetic project using a fake toolchain, timing every stage.
+
+    python benchmarks/run.py --modules 500 --repeat 3 --output results.json
+
+The results are written as JSON so that they can be compared across commits
+"""
+import os
+from os import path
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from collections import OrderedDict
+from contextlib import redirect_stdout
+
+_here = path.abspath(path.dirname(__file__))
+sys.path.insert(0, path.dirname(_here))
+
+from setuptools import Distribution # pylint: disable=wrong-import-position
+
+from pyqtinstaller import CompileCommand # pylint: disable=wrong-import-position
+from toolchain import TOOLS, create_toolchain # pylint: disable=wrong-import-position
+from project import generate_project # pylint: disable=wrong-import-position
+
+QT_MODULES = 'QtCore,QtGui,QtWidgets,QtQml,QtQuick'
+
+
+def get_commit():
+    """Gets the commit of pyqtinstaller being benchmarked
+    """
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=_here).decode('utf8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_sleeps(value):
+    """Parses tool sleeps of the form `nmake:2,qmake:0.5`
+    """
+    sleeps = {}
+    for item in [i for i in (value or '').split(',') if i]:
+        tool, seconds = item.split(':')
+        assert tool in TOOLS, f'Unknown tool {tool}, expected one of {", ".join(TOOLS)}'
+        sleeps[tool] = float(seconds)
+    return sleeps
+
+
+def run_build(project_dir, options):
+    """Runs a build of the project, returning the time taken by each stage and in total
+    """
+    cwd = os.getcwd()
+    os.chdir(project_dir)
+    try:
+        # Keep the build output out of the results
+        with redirect_stdout(sys.stderr):
+            start = time.monotonic()
+            command = CompileCommand(Distribution())
+            for name, value in options.items():
+                setattr(command, name, value)
+            command.ensure_finalized()
+            command.run()
+            total = time.monotonic() - start
+    finally:
+        os.chdir(cwd)
+    return {'stages': dict(command.stage_timings), 'total': total}
+
+
+def summarize(runs):
+    """Gets the median time of each stage and in total over several runs
+    """
+    stages = OrderedDict()
+    for run in runs:
+        for stage in run['stages']:
+            stages.setdefault(stage, []).append(run['stages'][stage])
+    return {
+        'stages': OrderedDict((stage, statistics.median(times)) for stage, times in stages.items()),
+        'total': statistics.median(run['total'] for run in runs)
+    }
+
+
+def main(args=None):
+    """Runs the benchmark
+    """
+    parser = argparse.ArgumentParser(description='Benchmarks the compile command with a fake toolchain')
+    parser.add_argument('--modules', type=int, default=100, help='The number of python modules')
+    parser.add_argument('--qml-files', type=int, default=10, help='The number of qml files')
+    parser.add_argument('--resource-bytes', type=int, default=1024 * 1024, help='The total size of the resources')
+    parser.add_argument('--resource-qml-files', type=int, default=0, help='The number of qml files in the resources')
+    parser.add_argument('--external-packages', type=int, default=2, help='The number of external packages')
+    parser.add_argument('--languages', type=int, default=2, help='The number of translations')
+    parser.add_argument('--tool-sleeps', help='Seconds each tool sleeps for, e.g. nmake:2,qmake:0.5')
+    parser.add_argument('--option', action='append', default=[], help='An additional compile option, e.g. workspace=1')
+    parser.add_argument('--repeat', type=int, default=3, help='The number of builds to time')
+    parser.add_argument('--output', help='The file to write the JSON results to, defaults to stdout')
+    parser.add_argument('--keep', action='store_true', help='Keep the generated project and toolchain')
+    parsed_args = parser.parse_args(args)
+
+    config = OrderedDict([
+        ('modules', parsed_args.modules),
+        ('qml_files', parsed_args.qml_files),
+        ('resource_bytes', parsed_args.resource_bytes),
+        ('resource_qml_files', parsed_args.resource_qml_files),
+        ('external_packages', parsed_args.external_packages),
+        ('languages', parsed_args.languages),
+        ('tool_sleeps', parse_sleeps(parsed_args.tool_sleeps)),
+        ('options', dict(o.split('=', 1) for o in parsed_args.option))
+    ])
+    commit = get_commit()
+    root = tempfile.mkdtemp(prefix='pyqtinstaller-benchmark-')
+    original_path = os.environ['PATH']
+    try:
+        toolchain_options, bin_dir = create_toolchain(
+            path.join(root, 'toolchain'), QT_MODULES.split(','), config['tool_sleeps']
+        )
+        project_dir = path.join(root, 'project')
+        project_options = generate_project(
+            project_dir,
+            parsed_args.modules,
+            parsed_args.qml_files,
+            parsed_args.resource_bytes,
+            parsed_args.external_packages,
+            parsed_args.languages,
+            parsed_args.resource_qml_files
+        )
+        options = {
+            **toolchain_options,
+            **{k: v for k, v in project_options.items() if v is not None},
+            'qt_modules': QT_MODULES,
+            'no_build_server': True,
+            **config['options']
+        }
+        os.environ['PATH'] = bin_dir + os.pathsep + original_path
+        runs = []
+        for index in range(parsed_args.repeat):
+            sys.stderr.write(f'Running build {index + 1} of {parsed_args.repeat}\n')
+            runs.append(run_build(project_dir, options))
+    finally:
+        os.environ['PATH'] = original_path
+        if parsed_args.keep:
+            sys.stderr.write(f'Benchmark files kept in {root}\n')
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+    results = OrderedDict([
+        ('commit', commit),
+        ('python', platform.python_version()),
+        ('platform', platform.platform()),
+        ('config', config),
+        ('summary', summarize(runs)),
+        ('runs', runs)
+    ])
+    if parsed_args.output:
+        with open(parsed_args.output, 'w') as fp:
+            json.dump(results, fp, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
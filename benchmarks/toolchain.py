@@ -0,0 +1,164 @@
+"""Toolchain
+
+This module creates a fake toolchain for benchmarking the "compile" command without Windows, Visual Studio,
+Qt or Inno Setup. Each tool is a python script which writes plausible outputs after sleeping for a configured time
+"""
+import os
+from os import path
+import sys
+import stat
+
+TOOLS = ['cmd', 'git', 'python', 'pyqtdeploycli', 'pylupdate5', 'lrelease', 'qmake', 'nmake', 'windeployqt', 'qmlcachegen', 'iscc']
+
+_HEADER = '''#!{python}
+import os
+import re
+import sys
+import time
+from glob import glob
+from os import path
+
+time.sleep({sleep})
+args = sys.argv[1:]
+
+def write(filename, content):
+    if path.dirname(filename):
+        os.makedirs(path.dirname(filename), exist_ok=True)
+    with open(filename, 'w') as fp:
+        fp.write(content)
+'''
+
+_STUBS = {
+    # Prints the environment as vcvarsall does, including the variables it sets. PATH starts with a separator,
+    # as the command prefixes it with the visual studio bin directory using the windows separator
+    'cmd': '''
+env = {'LIB': '', 'INCLUDE': '', 'LIBPATH': '', **os.environ}
+for name, value in env.items():
+    if '\\n' not in value:
+        value = os.pathsep + value if name == 'PATH' else value
+        sys.stdout.write(f'{name}={value}\\n')
+''',
+    'git': '''
+sys.stdout.write('v1.0.0\\n')
+''',
+    'python': '''
+sys.stdout.write('Python 3.6.8\\n')
+''',
+    # Writes the qmake project and a frozen source for each module of the project file
+    'pyqtdeploycli': '''
+output = args[args.index('--output') + 1]
+project = args[args.index('--project') + 1]
+with open(project) as fp:
+    content = fp.read()
+name = re.search(r'<Application[^>]* name="([^"]*)"', content).group(1)
+modules = content.count('isdirectory="0"')
+sources = [f'frozen_{i}.cpp' for i in range(modules)] + ['pyqtdeploy_main.cpp']
+for source in sources:
+    write(path.join(output, source), '// frozen module\\n' + 'static const unsigned char data[] = {0};\\n' * 64)
+write(path.join(output, f'{name}.pro'), f'TARGET = {name}\\nSOURCES = ' + ' '.join(sources) + '\\n')
+''',
+    'pylupdate5': '''
+for ts_file in args[args.index('-ts') + 1:]:
+    if not path.isfile(ts_file):
+        write(ts_file, '<?xml version="1.0" encoding="utf-8"?>\\n<!DOCTYPE TS>\\n<TS version="2.1"></TS>\\n')
+''',
+    'lrelease': '''
+for ts_file in glob(path.join(path.dirname(args[-1]), 'translations', '*.ts')):
+    write(path.splitext(ts_file)[0] + '.qm', 'qm')
+''',
+    'qmake': '''
+pro_file = glob('*.pro')[0]
+with open(pro_file) as fp:
+    content = fp.read()
+write('Makefile', content)
+''',
+    'nmake': '''
+with open('Makefile') as fp:
+    content = fp.read()
+target = re.search(r'TARGET = (.*)', content).group(1).strip()
+sources = re.search(r'SOURCES = (.*)', content).group(1).split()
+for source in sources:
+    write(path.join('release', path.splitext(source)[0] + '.obj'), 'obj')
+write(path.join('release', f'{target}.exe'), 'exe')
+''',
+    'windeployqt': '''
+for dll in ['Qt5Core.dll', 'Qt5Gui.dll', 'Qt5Widgets.dll', 'libEGL.dll', 'libGLESV2.dll']:
+    write(path.join(path.dirname(args[-1]), dll), 'dll')
+''',
+    'qmlcachegen': '''
+with open(args[-1]) as fp:
+    content = fp.read()
+write(args[args.index('-o') + 1], 'qmlc ' + content)
+''',
+    'iscc': '''
+script = args[-1]
+with open(script) as fp:
+    filename = re.search(r'OutputBaseFilename=(.*)', fp.read()).group(1).strip()
+write(path.join(path.dirname(script), f'{filename}.exe'), 'installer')
+'''
+}
+
+
+def _write_stub(filename, tool, sleep):
+    os.makedirs(path.dirname(filename), exist_ok=True)
+    with open(filename, 'w') as fp:
+        fp.write(_HEADER.format(python=sys.executable, sleep=sleep) + _STUBS[tool])
+    os.chmod(filename, os.stat(filename).st_mode | stat.S_IEXEC)
+
+
+def _write_binary(filename):
+    os.makedirs(path.dirname(filename), exist_ok=True)
+    with open(filename, 'wb') as fp:
+        fp.write(b'\0' * 1024)
+
+
+def create_toolchain(root, qt_modules, sleeps=None):
+    """Creates the fake toolchain in `root`, where each tool sleeps for the seconds given by `sleeps`
+    Returns the options of the "compile" command which use the toolchain and the directory to add to `PATH`
+    """
+    sleeps = sleeps or {}
+    bin_dir = path.join(root, 'bin')
+    qt_bin_dir = path.join(root, 'qt', 'bin')
+    vc_dir = path.join(root, 'vc')
+    pyqt_dir = path.join(root, 'pyqt')
+    sip_dir = path.join(root, 'sip')
+    python_dir = path.join(root, 'python')
+    inno_setup_path = path.join(root, 'innosetup', 'ISCC.exe')
+
+    tools = {
+        'cmd': path.join(bin_dir, 'cmd'),
+        'git': path.join(bin_dir, 'git'),
+        'pyqtdeploycli': path.join(bin_dir, 'pyqtdeploycli'),
+        'pylupdate5': path.join(bin_dir, 'pylupdate5'),
+        'python': path.join(python_dir, 'python.exe'),
+        'qmake': path.join(qt_bin_dir, 'qmake'),
+        'lrelease': path.join(qt_bin_dir, 'lrelease'),
+        'windeployqt': path.join(qt_bin_dir, 'windeployqt'),
+        'qmlcachegen': path.join(qt_bin_dir, 'qmlcachegen'),
+        'nmake': path.join(vc_dir, 'bin', 'amd64', 'nmake'),
+        'iscc': inno_setup_path
+    }
+    for tool, filename in tools.items():
+        _write_stub(filename, tool, sleeps.get(tool, 0))
+
+    binaries = [path.join(sip_dir, 'siplib', 'sip.pyd'), path.join(root, 'qt', 'plugins', 'platforms', 'qwindows.dll')]
+    binaries += [path.join(python_dir, f'{d}.dll') for d in ['python3', 'python36']]
+    binaries += [path.join(qt_bin_dir, 'QtWebEngineProcess.exe')]
+    for module in qt_modules:
+        binaries.append(path.join(pyqt_dir, module, 'release', f'{module}.dll'))
+        if module != 'Qt':
+            binaries.append(path.join(qt_bin_dir, module.replace('Qt', 'Qt5') + '.dll'))
+    for binary in binaries:
+        _write_binary(binary)
+    os.makedirs(path.join(root, 'qt', 'resources'), exist_ok=True)
+    os.makedirs(path.join(root, 'qt', 'translations', 'qtwebengine_locales'), exist_ok=True)
+
+    options = {
+        'qmake_path': tools['qmake'],
+        'vc_dir': vc_dir,
+        'pyqt_dir': pyqt_dir,
+        'sip_dir': sip_dir,
+        'python_dir': python_dir,
+        'inno_setup_path': inno_setup_path
+    }
+    return options, bin_dir
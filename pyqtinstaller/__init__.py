@@ -16,10 +16,46 @@
 # Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
 """pyqtinstaller
 
-This module defines the interface for the pyqtinstaller package
+This module defines the interface for the pyqtinstaller package.
+The commands and the version are loaded on first access, as setuptools imports the package
+for every `setup.py` invocation
 """
-from .compile_command import CompileCommand
+import sys
+from importlib import import_module
+from types import ModuleType
 
-from ._version import get_versions
-__version__ = get_versions()['version']
-del get_versions
+__all__ = ['CompileCommand', 'AnalyzeCommand', 'ProfileImportsCommand']
+
+_LAZY_ATTRIBUTES = {
+    'CompileCommand': ('.compile_command', 'CompileCommand'),
+    'AnalyzeCommand': ('.analyze_command', 'AnalyzeCommand'),
+    'ProfileImportsCommand': ('.profile_imports_command', 'ProfileImportsCommand')
+}
+
+
+def _get_version():
+    from ._version import get_versions
+    return get_versions()['version']
+
+
+class _LazyModule(ModuleType):
+    """_LazyModule
+    Resolves the attributes of the package when they are first accessed
+    """
+    def __getattr__(self, name):
+        if name == '__version__':
+            value = _get_version()
+        elif name in _LAZY_ATTRIBUTES:
+            module_name, attribute = _LAZY_ATTRIBUTES[name]
+            value = getattr(import_module(module_name, __name__), attribute)
+        else:
+            raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(super().__dir__()) | set(_LAZY_ATTRIBUTES) | {'__version__'})
+
+
+# Module level __getattr__ is only supported from python 3.7
+sys.modules[__name__].__class__ = _LazyModule
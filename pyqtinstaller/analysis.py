@@ -0,0 +1,135 @@
+# pyqttoolkit
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""Analysis
+
+This module defines the analysis of a release directory, which attributes the size of every file
+to the part of the build it came from
+"""
+import os
+from os import path
+import json
+from collections import namedtuple, OrderedDict
+
+from .fileutils import get_state_filename
+
+ORIGINS = OrderedDict([
+    ('application', 'The application built by nmake'),
+    ('qt', 'Qt dlls and plugins'),
+    ('pyqt', 'PyQt dlls'),
+    ('sip', 'The sip module'),
+    ('python', 'Python dlls'),
+    ('stdlib_binaries', 'Compiled standard library modules (stdlib-binaries)'),
+    ('external_packages', 'External packages (external-packages)'),
+    ('external_stdlib', 'External standard library modules (external-stdlib-modules)'),
+    ('windeployqt', 'Files added by windeployqt'),
+    ('qt_web_engine', 'QtWebEngine process and resources'),
+    ('resources', 'Resources (resources-dirs)'),
+    ('qml_cache', 'Compiled QML of the resources (qml-cache)'),
+    ('translations', 'Translations (languages)'),
+    ('vc_redist', 'The visual c++ redistributable (vc-redist)'),
+    ('installer', 'Installer scripts'),
+    ('other', 'Files from post build steps or previous builds')
+])
+
+ORIGINS_FILENAME = 'origins.json'
+
+ReleaseFile = namedtuple('ReleaseFile', ['size', 'origin'])
+
+
+def get_release_listing(output_dir, origins):
+    """Lists every file of `output_dir` by path relative to it, with its size and origin
+    Files without a recorded origin are attributed to `other`
+    """
+    listing = OrderedDict()
+    for dirpath, dirnames, filenames in os.walk(output_dir):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            full_path = path.join(dirpath, filename)
+            relative_path = path.relpath(full_path, output_dir).replace(path.sep, '/')
+            try:
+                size = os.stat(full_path).st_size
+            except OSError:
+                continue
+            listing[relative_path] = ReleaseFile(size, origins.get(relative_path, 'other'))
+    return listing
+
+
+def get_listing_filename(state_dir, build_dir, previous=False):
+    """Gets the file the release listing of the builds in `build_dir` is saved in
+    """
+    return get_state_filename(state_dir, build_dir, 'release-previous' if previous else 'release')
+
+
+def save_listing(state_dir, build_dir, listing):
+    """Saves the release listing of the latest build, keeping the listing of the build before it
+    """
+    filename = get_listing_filename(state_dir, build_dir)
+    if not path.isdir(state_dir):
+        os.makedirs(state_dir)
+    if path.isfile(filename):
+        os.replace(filename, get_listing_filename(state_dir, build_dir, previous=True))
+    with open(filename, 'w') as fp:
+        json.dump(listing, fp)
+
+
+def load_listing(filename):
+    """Loads a saved release listing, or returns `None` if there isn't one
+    """
+    try:
+        with open(filename) as fp:
+            return OrderedDict((k, ReleaseFile(*v)) for k, v in json.load(fp).items())
+    except (OSError, ValueError):
+        return None
+
+
+def get_origin_sizes(listing):
+    """Gets the number of files and total size of each origin, largest first
+    """
+    sizes = {}
+    for release_file in listing.values():
+        files, size = sizes.get(release_file.origin, (0, 0))
+        sizes[release_file.origin] = (files + 1, size + release_file.size)
+    return OrderedDict(sorted(sizes.items(), key=lambda item: -item[1][1]))
+
+
+def get_largest_files(listing, count):
+    """Gets the `count` largest files of the listing, largest first
+    """
+    return sorted(listing.items(), key=lambda item: -item[1].size)[:count]
+
+
+def get_changes(previous, current):
+    """Gets the files which were added, removed or changed size between two listings,
+    as `(path, previous size, current size)` ordered by the size of the change
+    """
+    changes = []
+    for relative_path in set(previous) | set(current):
+        previous_size = previous[relative_path].size if relative_path in previous else 0
+        current_size = current[relative_path].size if relative_path in current else 0
+        if previous_size != current_size or (relative_path in previous) != (relative_path in current):
+            changes.append((relative_path, previous_size, current_size))
+    return sorted(changes, key=lambda change: (-abs(change[2] - change[1]), change[0]))
+
+
+def format_size(size):
+    """Formats a size in bytes for display
+    """
+    for unit in ['B', 'KB', 'MB']:
+        if abs(size) < 1024:
+            return f'{size:.0f}{unit}' if unit == 'B' else f'{size:.1f}{unit}'
+        size /= 1024
+    return f'{size:.1f}GB'
@@ -0,0 +1,106 @@
+# pyqttoolkit
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""AnalyzeCommand
+
+This module defines the analyze command, which reports what makes up the release directory of a build
+"""
+import sys
+import json
+from os import path
+
+from setuptools import Command
+
+from .analysis import (
+    ORIGINS, ORIGINS_FILENAME, get_release_listing, get_listing_filename, load_listing, get_origin_sizes,
+    get_largest_files, get_changes, format_size
+)
+from .timings import DEFAULT_DATABASE
+
+
+class AnalyzeCommand(Command):
+    """AnalyzeCommand
+    Implements the `Command` interface from `setuptools`
+    to report the size of the release directory by origin, compared with the previous build
+    """
+    user_options = [
+        ('build-dir=', None, 'The build directory of the compile command'),
+        ('timings-db=', None, 'The timings database of the compile command, release listings are kept alongside it'),
+        ('top=', None, 'The number of files to list, defaults to 20')
+    ]
+
+    def initialize_options(self):
+        """Implementation of `Command` initialize_options
+        """
+        #pylint: disable=attribute-defined-outside-init
+        self.build_dir = None
+        self.timings_db = None
+        self.top = None
+
+    def finalize_options(self):
+        """Implementation of `Command` finalize_options
+        """
+        self.build_dir = self.build_dir or 'build'
+        self.timings_db = self.timings_db or DEFAULT_DATABASE
+        self.top = int(self.top or 20)
+
+    def run(self):
+        """Runs the command
+        """
+        output_dir = path.join(self.build_dir, 'release')
+        assert path.isdir(output_dir), f'{output_dir} not found, run the compile command first'
+        try:
+            with open(path.join(self.build_dir, ORIGINS_FILENAME)) as fp:
+                origins = json.load(fp)
+        except (OSError, ValueError):
+            origins = {}
+        listing = get_release_listing(output_dir, origins)
+        previous = load_listing(get_listing_filename(path.dirname(path.abspath(self.timings_db)), self.build_dir, previous=True))
+        sys.stdout.write(self.format_report(output_dir, listing, previous))
+
+    def format_report(self, output_dir, listing, previous):
+        """Formats the report of the release `listing`, compared with the `previous` listing if there is one
+        """
+        total = sum(f.size for f in listing.values())
+        lines = [f'{output_dir}: {len(listing)} files, {format_size(total)}' + (
+            f' ({self._format_change(total - sum(f.size for f in previous.values()))} since the previous build)'
+            if previous is not None else ''
+        ), '']
+
+        sizes = get_origin_sizes(listing)
+        previous_sizes = get_origin_sizes(previous) if previous is not None else {}
+        lines.append(f'{"Origin":<20}{"Files":>8}{"Size":>12}{"Change":>12}  Description')
+        for origin in list(sizes) + [o for o in previous_sizes if o not in sizes]:
+            files, size = sizes.get(origin, (0, 0))
+            change = self._format_change(size - previous_sizes.get(origin, (0, 0))[1]) if previous is not None else '-'
+            lines.append(f'{origin:<20}{files:>8}{format_size(size):>12}{change:>12}  {ORIGINS.get(origin, "")}')
+
+        lines += ['', f'Largest {self.top} files']
+        for relative_path, release_file in get_largest_files(listing, self.top):
+            lines.append(f'{format_size(release_file.size):>12}  {relative_path} ({release_file.origin})')
+
+        if previous is not None:
+            changes = get_changes(previous, listing)
+            lines += ['', f'Largest changes since the previous build ({len(changes)} files changed)']
+            for relative_path, previous_size, size in changes[:self.top]:
+                status = 'added' if relative_path not in previous else 'removed' if relative_path not in listing else ''
+                origin = (listing.get(relative_path) or previous[relative_path]).origin
+                lines.append(f'{self._format_change(size - previous_size):>12}  {relative_path} ({origin}) {status}'.rstrip())
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _format_change(change):
+        return ('+' if change >= 0 else '-') + format_size(abs(change))
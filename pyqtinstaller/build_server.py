@@ -0,0 +1,215 @@
+# pyqttoolkit
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""BuildServer
+
+This module defines a long-lived build server, which keeps the state used by the "compile" command warm
+between builds, and the client used by the command to forward builds to it.
+
+Start the server with `python -m pyqtinstaller.build_server`, and point the command at it with
+`--build-server` or the `PYQTINSTALLER_BUILD_SERVER` environment variable. The server needs unix sockets
+and `os.fork`, so it is not available on Windows, where builds always run in the command's own process
+"""
+import os
+from os import path
+import sys
+import json
+import getpass
+import codecs
+import socket
+import socketserver
+import tempfile
+import traceback
+import argparse
+
+ENV_SOCKET_PATH = 'PYQTINSTALLER_BUILD_SERVER'
+
+
+def get_default_socket_path():
+    """Gets the socket path used when none is configured, or `None` if unix sockets are not supported
+    """
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+    user = os.getuid() if hasattr(os, 'getuid') else getpass.getuser()
+    return os.environ.get(ENV_SOCKET_PATH) or path.join(tempfile.gettempdir(), f'pyqtinstaller-{user}.sock')
+
+
+def connect(socket_path):
+    """Connects to the build server listening on `socket_path`
+    Returns `None` if no server is running
+    """
+    if not socket_path or not hasattr(socket, 'AF_UNIX') or not path.exists(socket_path):
+        return None
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(socket_path)
+    except OSError:
+        connection.close()
+        return None
+    return connection
+
+
+def forward_build(connection, cwd, options, stream, environ=None, sys_path=None):
+    """Sends a build request over `connection`, streaming the build log to `stream`.
+    The build runs with the `environ` and `sys_path` of the client, or those of the server if they are not given.
+    Returns the exit code of the build
+    """
+    request = {'cwd': cwd, 'options': options, 'environ': environ, 'sys_path': sys_path}
+    with connection:
+        connection.sendall(json.dumps(request).encode('utf8') + b'\n')
+        for line in connection.makefile('rb'):
+            message = json.loads(line.decode('utf8'))
+            if 'log' in message:
+                stream.write(message['log'])
+                stream.flush()
+            elif 'result' in message:
+                return message['result']['returncode']
+    raise RuntimeError('Build server closed the connection before the build finished')
+
+
+def run_build(options):
+    """Runs the compile command in the current directory with the raw `options` of the command
+    """
+    from setuptools import Distribution
+    from .compile_command import CompileCommand
+    command = CompileCommand(Distribution())
+    for name, value in options.items():
+        setattr(command, name, value)
+    command.no_build_server = True
+    command.ensure_finalized()
+    command.run()
+
+
+def warm_up(cwd, options, environ=None):
+    """Populates the process-wide caches used by a build in `environ`,
+    so that they are inherited by every build process
+    """
+    from .compile_command import get_vc_env, get_python_version, get_template
+    for name in ['package.pdy', 'resources.qrc', 'setup.iss']:
+        get_template(name)
+    if options.get('vc_dir'):
+        get_vc_env(options['vc_dir'], options.get('platform') or 'amd64', environ)
+    if options.get('python_dir'):
+        get_python_version(options['python_dir'])
+
+
+class BuildRequestHandler(socketserver.StreamRequestHandler):
+    """Handles a single build request, streaming its log back to the client
+    """
+    def handle(self):
+        request = json.loads(self.rfile.readline().decode('utf8'))
+        cwd = request['cwd']
+        options = dict(request['options'])
+        # Directories used as cache keys are made absolute, so that builds from any directory share them
+        for name in ['vc_dir', 'python_dir']:
+            if options.get(name):
+                options[name] = path.normpath(path.join(cwd, options[name]))
+
+        returncode = self._run(cwd, options, request.get('environ'), request.get('sys_path'))
+        self._send({'result': {'returncode': returncode}})
+
+    def _send(self, message):
+        self.wfile.write(json.dumps(message).encode('utf8') + b'\n')
+        self.wfile.flush()
+
+    def _run(self, cwd, options, environ, sys_path):
+        try:
+            warm_up(cwd, options, environ)
+        except Exception: #pylint: disable=broad-except
+            # Any failure will be reported by the build itself
+            pass
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            self._run_child(cwd, options, environ, sys_path, write_fd)
+        os.close(write_fd)
+        decoder = codecs.getincrementaldecoder('utf8')('replace')
+        try:
+            for chunk in iter(lambda: os.read(read_fd, 64 * 1024), b''):
+                self._send({'log': decoder.decode(chunk)})
+        finally:
+            os.close(read_fd)
+        _, status = os.waitpid(pid, 0)
+        return os.WEXITSTATUS(status) if os.WIFEXITED(status) else 1
+
+    def _run_child(self, cwd, options, environ, sys_path, write_fd):
+        returncode = 1
+        try:
+            os.dup2(write_fd, 1)
+            os.dup2(write_fd, 2)
+            # Don't hold on to the sockets and pipes of other builds
+            os.closerange(3, os.sysconf('SC_OPEN_MAX'))
+            sys.stdout = open(1, 'w', buffering=1, closefd=False)
+            sys.stderr = open(2, 'w', buffering=1, closefd=False)
+            os.chdir(cwd)
+            if environ is not None:
+                os.environ.clear()
+                os.environ.update(environ)
+            if sys_path is not None:
+                sys.path[:] = sys_path
+            self.server.build(options)
+            returncode = 0
+        except BaseException: #pylint: disable=broad-except
+            traceback.print_exc()
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(returncode) #pylint: disable=protected-access
+
+
+class BuildServer(socketserver.UnixStreamServer):
+    """BuildServer
+    Serves compile requests over a unix socket. Each build runs in a process forked from the server,
+    so that it inherits the server's warm state. Requests are handled one at a time, the others wait in
+    the socket's queue, so that builds are never forked while another thread may hold a lock
+    """
+    request_queue_size = 32
+
+    def __init__(self, socket_path, build=run_build):
+        self.build = build
+        super().__init__(socket_path, BuildRequestHandler)
+
+
+def main(args=None):
+    """Runs the build server until interrupted
+    """
+    parser = argparse.ArgumentParser(description='Serves pyqtinstaller compile requests over a unix socket')
+    parser.add_argument('--socket', default=get_default_socket_path(), help='The path of the socket to listen on')
+    parsed_args = parser.parse_args(args)
+    assert parsed_args.socket, 'Unix sockets are not supported on this platform'
+
+    # Import everything a build needs up front
+    from . import compile_command #pylint: disable=unused-variable
+    if path.exists(parsed_args.socket):
+        assert connect(parsed_args.socket) is None, f'A build server is already listening on {parsed_args.socket}'
+        os.remove(parsed_args.socket)
+
+    server = BuildServer(parsed_args.socket)
+    sys.stdout.write(
+        f'Build server listening on {parsed_args.socket}, '
+        f'set {ENV_SOCKET_PATH}={parsed_args.socket} to forward builds to it\n'
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(parsed_args.socket)
+
+
+if __name__ == '__main__':
+    main()
@@ -18,18 +18,52 @@
 
 This module defines the "compile" command, which will compile an installer from a pyqt5 application
 """
-from subprocess import call, check_output
+from subprocess import call, check_output, CalledProcessError
 import sys
 import os
 from os import path
 import shutil
 from glob import glob
+import json
+import time
+import hashlib
+import sqlite3
+from collections import OrderedDict
 from typing import Sequence
-import importlib.util
 from datetime import datetime
+from functools import lru_cache, partial
 
 from setuptools import Command
-from jinja2 import Template
+
+from .watch import get_watcher, wait_for_changes
+from .build_server import ENV_SOCKET_PATH, connect, forward_build
+from .matrix import load_manifest, get_configurations, MatrixRunner
+from .stages import Stage, StageJournal, JOURNAL_FILENAME, get_fingerprint, walk_files
+from .snapshot import FileSnapshot
+from .parallel_make import get_makefile, get_compile_jobs, get_newest_header, is_up_to_date
+from .compiler_cache import get_default_cache_dir, get_launcher, DEFAULT_MAX_SIZE
+from .fileutils import (
+    write_if_changed, get_state_filename, copy_files_if_changed, remove_tree_except
+)
+from .templates import get_template
+from .manifest import Manifest, MANIFEST_FILENAME
+from .delta import (
+    create_delta, write_delta_description, get_patch_candidates, get_patch_filename, store_objects, FILES_DIR
+)
+from .progress import ProgressReporter
+from .analysis import ORIGINS_FILENAME, get_release_listing, save_listing, format_size
+from .qml_cache import (
+    QmlCache, QML_CACHE_DIRNAME, DEFAULT_TOOL as DEFAULT_QML_CACHE_TOOL, get_key, get_tool_identity, get_output_filename
+)
+from .qrc import SHARD_BY, parse_compression_rules, get_compression_attributes, get_shard_names, shard_files
+from .plugins import (
+    get_qml_imports, get_plugin_modules, get_plugin_selection, prune_plugins, prune_translations, is_language_used
+)
+from .filters import PathFilter, PRESETS, get_preset_patterns
+from .timings import (
+    TimingsDatabase, StageTiming, DEFAULT_DATABASE, TOTAL, get_files_size, get_baseline, get_regressions,
+    get_exceeded_budgets
+)
 
 def assert_call(cmd: Sequence[str], **kwargs):
     """Wraps `subprocess.call` in an assert
@@ -38,10 +72,22 @@ def assert_call(cmd: Sequence[str], **kwargs):
     assert not result, \
         '{} exited with code {} - see output for details'.format(' '.join(cmd), result)
 
-def get_vc_env(vc_dir: str, platform: str):
-    """Gets the environment variables to be used when compiling using visual studio c++ compiler
+# The variables of the environment which vcvarsall extends
+_VC_BASE_VARIABLES = ['PATH', 'INCLUDE', 'LIB', 'LIBPATH']
+
+def get_vc_env(vc_dir: str, platform: str, environ=None):
+    """Gets the environment variables to be used when compiling using visual studio c++ compiler,
+    extending `environ`, which defaults to the environment of the process.
+    The result of running vcvarsall is cached for the lifetime of the process, so a copy is returned
     """
-    vcvars = check_output(['cmd', '/c', f'vcvarsall.bat {platform}&set'], cwd=vc_dir).decode('utf8')
+    environ = os.environ if environ is None else environ
+    return dict(_load_vc_env(vc_dir, platform, tuple((n, environ[n]) for n in _VC_BASE_VARIABLES if n in environ)))
+
+@lru_cache()
+def _load_vc_env(vc_dir: str, platform: str, base_variables):
+    vcvars = check_output(
+        ['cmd', '/c', f'vcvarsall.bat {platform}&set'], cwd=vc_dir, env={**os.environ, **dict(base_variables)}
+    ).decode('utf8')
     vc_env = {}
     for line in vcvars.splitlines():
         name, value = line.split('=', 1)
@@ -56,10 +102,21 @@ def get_vc_bin_dir(vc_dir: str, platform: str):
     return path.join(vc_dir, bin_dir)
 
 
-def get_version(package: str, allow_untagged):
+def get_build_time(reproducible=False):
+    """Gets the time stamped on untagged builds
+    Reproducible builds use `SOURCE_DATE_EPOCH`, or the time of the last commit if it is not set
+    """
+    if not reproducible:
+        return datetime.now()
+    epoch = os.environ.get('SOURCE_DATE_EPOCH') or check_output(['git', 'log', '-1', '--format=%ct']).decode('utf8').strip()
+    return datetime.utcfromtimestamp(int(epoch))
+
+
+def get_version(package: str, allow_untagged, build_time=None):
     """Gets the version of the package we're building
+    Untagged versions are stamped with `build_time`, defaulting to now
     """
-    package_version = check_output('git describe --tags').decode('utf8').strip()
+    package_version = check_output(['git', 'describe', '--tags']).decode('utf8').strip()
     if package_version:
         version_parts = package_version.strip('v').split('-')
         if not allow_untagged and len(version_parts) > 2:
@@ -70,7 +127,7 @@ def get_version(package: str, allow_untagged):
         exec(f'import {package}') #pylint: disable=exec-used
         package_version = eval(f'{package}.__version__') #pylint: disable=eval-used
 
-        build = datetime.now().strftime('%Y%m%d%H%M%S')
+        build = (build_time or datetime.now()).strftime('%Y%m%d%H%M%S')
 
         version_parts = package_version.split('-')
         if len(version_parts) == 1:
@@ -80,14 +137,7 @@ def get_version(package: str, allow_untagged):
         return '-'.join(version_parts)
 
 
-def get_template(name: str) -> Template:
-    """Loads a jinja template from the name of the template file
-    """
-    template_path = path.join(path.realpath(path.dirname(__file__)), f'{name}.jinja')
-    with open(template_path) as fp:
-        return Template(fp.read())
-
-
+@lru_cache()
 def get_python_version(python_dir: str):
     """Gets the version of python that is being used to compile
     """
@@ -96,12 +146,30 @@ def get_python_version(python_dir: str):
     return {'major': version[0], 'minor': version[1], 'patch': version[2]}
 
 
+def link_or_copy(source, dest):
+    """Hard links `source` to `dest`, copying it if linking is not possible
+    """
+    try:
+        os.link(source, dest)
+    except OSError:
+        shutil.copy2(source, dest)
+
+
+def get_web_engine_locales(locales, languages):
+    """Gets the QtWebEngine locale files of `locales` used by `languages`, e.g. `pt` uses `pt-BR.pak` and `pt-PT.pak`
+    and `en_GB` uses `en-GB.pak`. `en-US.pak` is always used, as chromium falls back to it
+    """
+    return [l for l in locales if is_language_used(l.split('.')[0], list(languages) + ['en_US'])]
+
+
 def to_str_list(comma_delimited):
     return comma_delimited.split(',') if comma_delimited else []
 
 
 def to_bool(arg):
-    return arg.lower() in ['1', 'true', 't', 'yes'] if arg else False
+    if isinstance(arg, str):
+        return arg.lower() in ['1', 'true', 't', 'yes']
+    return bool(arg)
 
 class CompileCommand(Command):
     """CompileCommand
@@ -128,7 +196,76 @@ class CompileCommand(Command):
         ('signtool=', None, 'Command to use for signing installers'),
         ('additional-libs=', None, 'Additional library files to compile'),
         ('source-files=', None, 'Source files'),
-        ('vc-redist=', None, 'VC Redist location')
+        ('vc-redist=', None, 'VC Redist location'),
+        ('watch', None, 'Keep running and rebuild the affected stages when sources change'),
+        ('watch-debounce=', None, 'Seconds without further changes to wait for before rebuilding'),
+        ('watch-poll-interval=', None, 'Seconds between scans when inotify is not available'),
+        ('build-server=', None, 'The socket of the build server to forward builds to, if it is running. '
+                                'Defaults to $PYQTINSTALLER_BUILD_SERVER, the server needs unix sockets and fork '
+                                'so is not available on Windows'),
+        ('no-build-server', None, 'Build in this process even if a build server is running'),
+        ('workspace', None, 'Stage all generated files in the build directory, leaving the checkout untouched'),
+        ('matrix=', None, 'A manifest of configurations to build, sharing their common stages'),
+        ('matrix-jobs=', None, 'The number of matrix configurations to build in parallel'),
+        ('matrix-memory-limit=', None, 'The maximum memory in MB of each matrix build process'),
+        ('resume', None, 'Resume a failed build from its first incomplete or invalidated stage'),
+        ('tool-timeouts=', None, 'Timeouts in seconds for the build steps running external tools, '
+                                 'e.g. nmake:3600,qmake:600. The steps are pyqtdeploy, pylupdate, '
+                                 'lrelease, qmake, compile, nmake (whichever build tool is used), '
+                                 'windeployqt, qml-cache, signtool, installer, delta-patch and '
+                                 'installer-delta'),
+        ('quiet-tools', None, 'Only write the output of the external tools to the build logs'),
+        ('build-tool=', None, 'Runs the Makefile: nmake (default), jom, a make compatible tool, or pool to compile objects in parallel before nmake'),
+        ('jobs=', None, 'The number of parallel compile jobs, defaults to the number of CPUs'),
+        ('compiler-cache', None, 'Cache the objects built by the compiler between builds'),
+        ('compiler-cache-dir=', None, 'The directory of the compiler cache, defaults to a directory shared by every build'),
+        ('compiler-cache-size=', None, 'The maximum size of the compiler cache in MB'),
+        ('reproducible', None, 'Stamp untagged versions with SOURCE_DATE_EPOCH, or the last commit time, rather than the current time'),
+        ('timings-db=', None, 'The database the stage timings of each build are recorded in, the state '
+                              'kept between builds is stored alongside it. Defaults to '
+                              'pyqtinstaller/timings.sqlite3 in %LOCALAPPDATA% or ~/.cache'),
+        ('report', None, 'Compare the timings of the latest build with the previous builds instead of building'),
+        ('report-baseline=', None, 'The number of previous builds the latest build is compared with, defaults to 5'),
+        ('report-threshold=', None, 'The fraction by which a stage may slow down before it is reported, defaults to 0.2'),
+        ('budgets=', None, 'Maximum seconds for stages of the latest build, e.g. nmake:600,total:1200, the report fails if any are exceeded'),
+        ('no-progress', None, 'Don\'t report the progress of the build'),
+        ('delta', None, 'Build a delta package and installer with the changes since the last delta build'),
+        ('delta-base=', None, 'The manifest to build the delta from, defaults to the manifest of the last delta build'),
+        ('delta-diff-tool=', None, 'A command writing a binary patch of a large changed binary, '
+                                   'e.g. xdelta3 -e -s {old} {new} {patch}. Patched binaries are '
+                                   'left out of the delta\'s files for the updater to patch, and '
+                                   'no delta installer is built when any binary is patched'),
+        ('delta-diff-min-size=', None, 'The size in MB from which changed binaries are patched, defaults to 1'),
+        ('exclude=', None, 'Glob patterns of files left out of the frozen package, external packages and resources, e.g. tests/,*.pyi'),
+        ('include=', None, 'Glob patterns of files kept even if they match an exclude pattern'),
+        ('exclude-presets=', None, 'Sets of exclude patterns to apply, some of: {}'.format(', '.join(PRESETS))),
+        ('web-engine-language-locales', None, 'Only deploy the QtWebEngine locales of the configured languages'),
+        ('prune-qt-plugins', None, 'Only deploy the Qt plugins the Qt modules and QML imports need '
+                                   'and the Qt translations of the configured languages, rather '
+                                   'than all that windeployqt adds. Plugins loaded dynamically '
+                                   'must be added with qt-plugins'),
+        ('qt-plugins=', None, 'Qt plugins to deploy with --prune-qt-plugins in addition to those '
+                              'the Qt modules and QML imports need, '
+                              'e.g. imageformats/qtiff,sqldrivers'),
+        ('qml-cache', None, 'Compile the QML files of the resources dirs ahead of time, caching the compiled files between builds'),
+        ('qml-cache-tool=', None, 'The command compiling a QML file, defaults to "{qmlcachegen}" -o {output} {input}'),
+        ('resource-compression=', None, 'Compression of the app resources, the QML files of the '
+                                        'package, by pattern, <pattern>:<level>[:<threshold>] '
+                                        'or <pattern>:none, e.g. */generated/*.qml:none,*.qml:9'),
+        ('resource-shards=', None, 'The number of qrc files the app resources are split into, so that they are built in parallel'),
+        ('resource-shard-by=', None, 'How the app resources are split, by directory (default) or size')
+    ]
+
+    boolean_options = [
+        'watch', 'no-build-server', 'workspace', 'resume', 'quiet-tools', 'compiler-cache', 'reproducible', 'report',
+        'no-progress', 'delta', 'web-engine-language-locales', 'prune-qt-plugins', 'qml-cache'
+    ]
+
+    # Options which don't affect the output of a build, so builds using different values are comparable
+    _RUNTIME_OPTIONS = [
+        'watch', 'watch_debounce', 'watch_poll_interval', 'build_server', 'no_build_server', 'matrix', 'matrix_jobs',
+        'matrix_memory_limit', 'resume', 'tool_timeouts', 'quiet_tools', 'timings_db', 'report', 'report_baseline',
+        'report_threshold', 'budgets', 'no_progress'
     ]
 
     def initialize_options(self):
@@ -168,6 +305,45 @@ class CompileCommand(Command):
         self.additional_libs = None
         self.source_files = None
         self.vc_redist = None
+        self.watch = False
+        self.watch_debounce = None
+        self.watch_poll_interval = None
+        self.build_server = None
+        self.no_build_server = False
+        self.workspace = False
+        self.matrix = None
+        self.matrix_jobs = None
+        self.matrix_memory_limit = None
+        self.resume = False
+        self.tool_timeouts = None
+        self.quiet_tools = False
+        self.build_tool = None
+        self.jobs = None
+        self.compiler_cache = False
+        self.compiler_cache_dir = None
+        self.compiler_cache_size = None
+        self.reproducible = False
+        self.timings_db = None
+        self.report = False
+        self.report_baseline = None
+        self.report_threshold = None
+        self.budgets = None
+        self.no_progress = False
+        self.delta = False
+        self.delta_base = None
+        self.delta_diff_tool = None
+        self.delta_diff_min_size = None
+        self.exclude = None
+        self.include = None
+        self.exclude_presets = None
+        self.web_engine_language_locales = False
+        self.prune_qt_plugins = False
+        self.qt_plugins = None
+        self.qml_cache = False
+        self.qml_cache_tool = None
+        self.resource_compression = None
+        self.resource_shards = None
+        self.resource_shard_by = None
 
     def finalize_options(self):
         """Implentation of `Command` finalize_options
@@ -175,6 +351,26 @@ class CompileCommand(Command):
         """
         #pylint: disable=attribute-defined-outside-init
 
+        # Forward to the build server if it is running, it performs the validation itself
+        self.watch = to_bool(self.watch)
+        self.no_build_server = to_bool(self.no_build_server)
+        self.report = to_bool(self.report)
+        # Only a configured build server is probed, so that builds without one don't pay for it
+        self.build_server = self.build_server or os.environ.get(ENV_SOCKET_PATH)
+        self._build_server_connection = None
+        if self.build_server and not self.no_build_server and not self.watch and not self.report:
+            self._build_server_connection = connect(self.build_server)
+            if self._build_server_connection:
+                return
+
+        # Matrix builds validate the options of each configuration
+        self.matrix_jobs = int(self.matrix_jobs or os.cpu_count() or 1)
+        self.matrix_memory_limit = int(self.matrix_memory_limit) if self.matrix_memory_limit else None
+        if self.matrix:
+            assert path.isfile(self.matrix), 'matrix manifest not found'
+            self.build_dir = self.build_dir or 'build'
+            return
+
         # User options
         assert self.qmake_path, 'qmake-path must be provided'
         assert self.vc_dir, 'vc-path must be provided'
@@ -223,9 +419,58 @@ class CompileCommand(Command):
 
         self.build_dir = self.build_dir or 'build'
 
+        self.workspace = to_bool(self.workspace)
+        self.resume = to_bool(self.resume)
+        self.quiet_tools = to_bool(self.quiet_tools)
+        self.build_tool = self.build_tool or 'nmake'
+        self.jobs = int(self.jobs or os.cpu_count() or 1)
+        self.compiler_cache = to_bool(self.compiler_cache)
+        self.compiler_cache_dir = path.abspath(self.compiler_cache_dir or get_default_cache_dir())
+        self.compiler_cache_size = int(self.compiler_cache_size or DEFAULT_MAX_SIZE)
+        self.reproducible = to_bool(self.reproducible)
+        self.timings_db = self.timings_db or DEFAULT_DATABASE
+        self.report_baseline = int(self.report_baseline or 5)
+        self.report_threshold = float(self.report_threshold or 0.2)
+        self.budgets = {
+            stage: float(budget) for stage, budget in [b.split(':') for b in to_str_list(self.budgets)]
+        }
+        self.no_progress = to_bool(self.no_progress)
+        self.delta = to_bool(self.delta)
+        assert not self.delta_base or path.isfile(self.delta_base), 'delta base manifest not found'
+        self.delta_diff_min_size = float(self.delta_diff_min_size or 1)
+        self.exclude = to_str_list(self.exclude)
+        self.include = to_str_list(self.include)
+        self.exclude_presets = to_str_list(self.exclude_presets)
+        self._path_filter = PathFilter(get_preset_patterns(self.exclude_presets) + self.exclude, self.include)
+        self.web_engine_language_locales = to_bool(self.web_engine_language_locales)
+        self.prune_qt_plugins = to_bool(self.prune_qt_plugins)
+        self.qt_plugins = to_str_list(self.qt_plugins)
+        self.qml_cache = to_bool(self.qml_cache)
+        self.qml_cache_tool = self.qml_cache_tool or DEFAULT_QML_CACHE_TOOL
+        self.resource_compression = parse_compression_rules(to_str_list(self.resource_compression))
+        self.resource_shards = int(self.resource_shards or 1)
+        self.resource_shard_by = self.resource_shard_by or 'directory'
+        assert self.resource_shard_by in SHARD_BY, 'resource-shard-by must be one of {}'.format(', '.join(SHARD_BY))
+        self.excluded_files = OrderedDict()
+        self.tool_timeouts = {
+            tool.lower(): float(timeout) for tool, timeout in [t.split(':') for t in to_str_list(self.tool_timeouts)]
+        }
+        self.watch_debounce = float(self.watch_debounce or 0.5)
+        self.watch_poll_interval = float(self.watch_poll_interval or 1.0)
+
         self.external_exe_files = []
 
+        self._stage_results = {}
+        self._env_c = None
+        self.tool_results = []
+        self._progress = ProgressReporter([], stream=None)
+        self.file_origins = {}
+
         self._app_version_c = None
+        self._py_packages_c = {}
+        self._indexed_files = set()
+        self.shared_stages = {}
+        self._snapshot = FileSnapshot()
 
         # Installer options
         self.app_config = {
@@ -244,53 +489,295 @@ class CompileCommand(Command):
         """Runs the command
         Performs the steps required to compile the application and generate an installer
         """
-        sys.stdout.write('{} Building {} version "{}" {}\n'.format('*' * 10, self.app_name, self._app_version, '*' * 10))
-        # Apply version
-        self._apply_version()
-        
-        # Clean the output directory
-        self._clean()
+        if self._build_server_connection:
+            self._forward_to_build_server()
+            return
 
-        # Exec pre build
-        for pre_build_step in self.pre_build:
-            self._exec_build_step(pre_build_step)
-
-        # Build the package project file
-        self._build_project_file()
-
-        # Create the app resources
-        self._create_app_resources()
+        if self.report:
+            self._report()
+            return
 
-        vc_env = self._get_vc_env()
-
-        # Build the qt project file
-        self._run_pyqtdeploy(vc_env)
+        if self.matrix:
+            self._run_matrix()
+            return
 
-        # Remove version
-        self._remove_version()
+        self._build()
 
-        # Generate translations
-        self._generate_ts(vc_env)
-        self._generate_qm(vc_env)
+        if self.watch:
+            self._watch()
 
-        # Build the nmake Makefiles
-        self._run_qmake(vc_env)
+    def _build(self):
+        sys.stdout.write('{} Building {} version "{}" {}\n'.format('*' * 10, self.app_name, self._app_version, '*' * 10))
+        journal = StageJournal(path.join(self.build_dir, JOURNAL_FILENAME))
+        resuming = self.resume and bool(journal.entries)
+        if not resuming:
+            journal.reset()
+        self.file_origins = self._load_file_origins() if resuming else {}
+        previous = ''
+        version_applied = False
+        self.stage_timings = OrderedDict()
+        self.stage_files = OrderedDict()
+        # The sources are listed once per build, stages which write to them invalidate the snapshot
+        self._snapshot = FileSnapshot()
+        # Excluded files are reported per build
+        self.excluded_files = OrderedDict()
+        build_start = time.monotonic()
+        stages = self._get_stages()
+        self._progress = ProgressReporter(
+            [s.name for s in stages],
+            self._get_stage_estimates(),
+            stream=None if self.no_progress else sys.stdout
+        )
+        try:
+            for index, stage in enumerate(stages):
+                if resuming:
+                    completed = journal.get_completed(index, stage.name, self._get_stage_fingerprint(stage, previous))
+                    if completed:
+                        self._progress.finish_stage(stage.name)
+                        previous = completed['fingerprint']
+                        self._stage_results[stage.name] = completed['result']
+                        self.external_exe_files = completed['state']['external_exe_files']
+                        continue
+                    sys.stdout.write(f'Resuming build from stage {stage.name}\n')
+                    resuming = False
+
+                start = time.monotonic()
+                self._progress.start_stage(stage.name)
+                if stage.needs_version and not version_applied:
+                    self._apply_version()
+                    version_applied = True
+
+                self._stage_results[stage.name] = stage.run()
+                self.stage_timings[stage.name] = time.monotonic() - start
+                self._progress.finish_stage(stage.name)
+
+                if stage.name == 'pyqtdeploy':
+                    self._remove_version()
+                    version_applied = False
+
+                values, files = stage.inputs()
+                previous = get_fingerprint(previous, values, files, self._snapshot.stat)
+                self.stage_files[stage.name] = get_files_size(files)
+                journal.record(
+                    index,
+                    stage.name,
+                    previous,
+                    self._stage_results[stage.name],
+                    {'external_exe_files': self.external_exe_files}
+                )
+        finally:
+            if version_applied:
+                self._remove_version()
+            self._save_file_origins()
+        listing = get_release_listing(self.output_dir, self.file_origins)
+        save_listing(self._state_dir, self.build_dir, listing)
+        # Resumed builds are not comparable with complete builds
+        if len(self.stage_timings) == len(stages):
+            self._record_timings(time.monotonic() - build_start, listing)
 
-        # Update source_files
-        self._update_source_files()
+    @property
+    def _state_dir(self):
+        # State kept between builds is stored alongside the timings database
+        return path.dirname(path.abspath(self.timings_db))
+
+    def _load_file_origins(self):
+        try:
+            with open(path.join(self.build_dir, ORIGINS_FILENAME)) as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_file_origins(self):
+        if path.isdir(self.build_dir):
+            write_if_changed(path.join(self.build_dir, ORIGINS_FILENAME), json.dumps(self.file_origins, sort_keys=True))
 
-        # Build the exe
-        self._run_nmake(vc_env)
+    def _record_timings(self, total, listing):
+        stages = OrderedDict(
+            (name, StageTiming(duration, *self.stage_files[name])) for name, duration in self.stage_timings.items()
+        )
+        stages[TOTAL] = StageTiming(total, len(listing), sum(f.size for f in listing.values()))
+        try:
+            TimingsDatabase(self.timings_db).record(
+                self.build_dir, self._app_version, self._get_config_hash(), stages
+            )
+        except sqlite3.Error as error:
+            # Timings are informational, so they shouldn't fail a build that succeeded
+            sys.stdout.write(f'Could not record build timings in {self.timings_db}: {error}\n')
+
+    def _get_stage_estimates(self):
+        try:
+            runs = TimingsDatabase(self.timings_db).get_runs(build_dir=self.build_dir, limit=self.report_baseline)
+        except sqlite3.Error:
+            return {}
+        return get_baseline(runs)
+
+    def _get_config_hash(self):
+        names = [o[0].rstrip('=').replace('-', '_') for o in self.user_options]
+        values = self._get_option_values([n for n in names if n not in self._RUNTIME_OPTIONS])
+        return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode('utf8')).hexdigest()[:16]
+
+    def _report(self):
+        runs = TimingsDatabase(self.timings_db).get_runs(self._get_config_hash(), limit=self.report_baseline + 1)
+        assert runs, f'No builds of this configuration have been recorded in {self.timings_db}'
+        latest = runs[0]
+        baseline = get_baseline(runs[1:])
+        regressions = {r.stage: r for r in get_regressions(latest, baseline, self.report_threshold)}
+
+        sys.stdout.write(
+            f'Build of version "{latest.app_version}" compared with {len(runs) - 1} previous builds\n'
+            f'{"Stage":<20}{"Latest":>10}{"Baseline":>10}{"Change":>10}{"Files":>8}{"Bytes":>14}\n'
+        )
+        for stage, timing in latest.stages.items():
+            if stage in baseline:
+                base = f'{baseline[stage]:.1f}s'
+                change = f'{(timing.duration - baseline[stage]) / baseline[stage]:+.0%}' if baseline[stage] else '-'
+            else:
+                base, change = '-', '-'
+            sys.stdout.write(
+                f'{stage:<20}{timing.duration:>9.1f}s{base:>10}{change:>10}{timing.files:>8}{timing.bytes:>14}'
+                + ('  SLOWER' if stage in regressions else '') + '\n'
+            )
+        if regressions:
+            sys.stdout.write('Stages slower than {:.0%} over their baseline: {}\n'.format(
+                self.report_threshold, ', '.join(regressions)
+            ))
+
+        exceeded = get_exceeded_budgets(latest, self.budgets)
+        assert not exceeded, 'Build time budgets exceeded: {}'.format(', '.join(
+            f'{stage} took {duration:.1f}s of {self.budgets[stage]:.1f}s' for stage, duration in exceeded.items()
+        ))
+
+    def _get_stages(self):
+        stages = [
+            # Clean the output directory
+            Stage('clean', self._clean, lambda: ({}, []), False),
+            # Exec pre build
+            Stage('pre_build', self._run_pre_build, self._get_pre_build_inputs, True),
+            # Build the package project file
+            Stage('project_file', self._build_project_file, self._get_project_file_inputs, True),
+            # Create the app resources
+            Stage('app_resources', self._create_app_resources, self._get_app_resources_inputs, False),
+            # Build the qt project file
+            Stage('pyqtdeploy', lambda: self._run_pyqtdeploy(self._env), lambda: ({}, []), True),
+            # Generate translations
+            Stage('ts', lambda: self._generate_ts(self._env), self._get_ts_inputs, False),
+            Stage('qm', lambda: self._generate_qm(self._env), lambda: ({}, []), False),
+            # Build the nmake Makefiles
+            Stage('qmake', lambda: self._run_qmake(self._env), self._get_qmake_inputs, False),
+            # Update source_files
+            Stage('source_files', self._update_source_files, self._get_source_files_inputs, False),
+            # Build the exe
+            Stage('nmake', lambda: self._run_nmake(self._env), lambda: ({}, []), False),
+            # Copy the dlls to the release directory
+            Stage('binaries', lambda: self._copy_binaries(self._env), self._get_binaries_inputs, False),
+            # Copy the external packages to the release directory
+            Stage('external_packages', self._copy_external_packages, self._get_external_packages_inputs, False)
+        ]
+        if 'QtWebEngine' in self.qt_modules:
+            stages.append(Stage('qt_web_engine', self._copy_qt_web_engine_resources, self._get_qt_web_engine_inputs, False))
+        if self.qml_cache:
+            # Compile the QML of the resources dirs, that of the package is compiled into the application
+            stages.append(Stage('qml_cache', self._compile_qml_caches, self._get_qml_cache_inputs, False))
+        stages += [
+            # Hash the files of the release directory
+            Stage('manifest', self._write_manifest, lambda: ({}, []), False),
+            Stage('post_build', self._run_post_build, self._get_post_build_inputs, False),
+            Stage('installer', self._run_installers, self._get_installer_inputs, False)
+        ]
+        if self.delta:
+            stages.append(Stage('delta', self._build_delta, self._get_delta_inputs, False))
+        return stages
 
-        # Copy the dlls to the release directory
-        self._copy_binaries(vc_env)
+    def _get_stage_fingerprint(self, stage, previous):
+        values, files = stage.inputs()
+        return get_fingerprint(previous, values, files, self._snapshot.stat)
 
-        # Copy the external packages to the release directory
-        self._copy_external_packages()
+    def _get_option_values(self, names):
+        return {name: getattr(self, name) for name in names}
 
-        if 'QtWebEngine' in self.qt_modules:
-            self._copy_qt_web_engine_resources()
+    @property
+    def _env(self):
+        if self._env_c is None:
+            self._env_c = self._get_vc_env()
+        return self._env_c
 
+    def _run_pre_build(self):
+        for pre_build_step in self.pre_build:
+            self._exec_build_step(pre_build_step)
+        # Pre build steps may generate any of the sources
+        self._snapshot.invalidate()
+        if self.workspace and self.pre_build:
+            # The package was staged for the steps, restage it with anything they generated
+            self._apply_version()
+
+    def _get_pre_build_inputs(self):
+        return self._get_option_values(['pre_build']), [s.split(':')[0] for s in self.pre_build]
+
+    def _get_project_file_inputs(self):
+        values = self._get_option_values([
+            'qt_modules', 'qmake_path', 'vc_dir', 'platform', 'pyqt_dir', 'sip_dir', 'python_dir',
+            'package', 'entrypoint', 'app_name', 'app_icon', 'build_dir', 'resources_dirs', 'win_console',
+            'languages', 'stdlib_modules', 'compiled_packages', 'additional_libs', 'workspace', 'exclude', 'include',
+            'exclude_presets', 'resource_shards'
+        ])
+        values['app_version'] = self._app_version
+        files = self._get_package_files()
+        if self.compiled_packages:
+            compiled_packages_dir = self._get_external_package_path(self.compiled_packages)
+            files += self._snapshot.walk_files(*[path.join(compiled_packages_dir, p) for p in self.compiled_packages])
+        return values, files
+
+    def _get_package_files(self):
+        # The version stamp only exists while the version is applied, the version is an input value instead
+        version_file = path.join(self.package, '__version__.py')
+        return [f for f in self._snapshot.walk_files(self.package) if f != version_file]
+
+    def _get_app_resources_inputs(self):
+        values = self._get_option_values([
+            'exclude', 'include', 'exclude_presets', 'resource_compression', 'resource_shards', 'resource_shard_by'
+        ])
+        return values, self._snapshot.glob(self.package, '**/*.qml') + self._snapshot.walk_files(*self.resources_dirs)
+
+    def _get_ts_inputs(self):
+        return {}, self._get_package_files() + (self._snapshot.walk_files('translations') if self.languages else [])
+
+    def _get_qmake_inputs(self):
+        return self._get_option_values(['compiler_cache', 'compiler_cache_dir', 'compiler_cache_size']), []
+
+    def _get_qt_web_engine_inputs(self):
+        # The copies are checked file by file, so only the choice of locales is an input
+        return self._get_option_values(['web_engine_language_locales', 'languages']), []
+
+    def _get_qml_cache_inputs(self):
+        return self._get_option_values(['qml_cache_tool', 'resources_dirs']), self._get_resource_qml_files()
+
+    def _get_source_files_inputs(self):
+        return self._get_option_values(['source_files']), list(self.source_files or [])
+
+    def _get_binaries_inputs(self):
+        values = self._get_option_values([
+            'qt_modules', 'pyqt_dir', 'sip_dir', 'python_dir', 'stdlib_binaries', 'external_packages', 'vc_redist',
+            'prune_qt_plugins', 'qt_plugins', 'languages', 'resources_dirs'
+        ])
+        # The QML imports only select the plugins when they are pruned
+        qml_files = self._get_qml_files() if self.prune_qt_plugins else []
+        vc_redist = [self.vc_redist] if self.vc_redist else []
+        return values, self._get_dll_paths() + vc_redist + qml_files
+
+    def _get_external_packages_inputs(self):
+        values = self._get_option_values([
+            'external_packages', 'external_stdlib_modules', 'exclude', 'include', 'exclude_presets'
+        ])
+        files = []
+        if self.external_packages:
+            external_packages_path = self._get_external_package_path(self.external_packages)
+            files += self._snapshot.walk_files(*[path.join(*self._resolve_egg_link(external_packages_path, p)) for p in self.external_packages])
+        if self.external_stdlib_modules:
+            external_stdlib_path = self._get_external_package_path(self.external_stdlib_modules)
+            files += self._snapshot.walk_files(*[path.join(external_stdlib_path, p) for p in self.external_stdlib_modules])
+        return values, files
+
+    def _run_post_build(self):
         output_dirs = {}
 
         if not self.skip_post_build:
@@ -299,9 +786,261 @@ class CompileCommand(Command):
 
             output_dirs = output_dirs or {'': self.output_dir}
 
+        return output_dirs
+
+    def _get_post_build_inputs(self):
+        return self._get_option_values(['post_build', 'skip_post_build']), [s.split(':')[0] for s in self.post_build]
+
+    def _run_installers(self):
         if not self.skip_installer:
-            for name, output in output_dirs.items():
-                self._build_installer(name, output)
+            installers = [
+                (name, self._write_installer_script(name, output))
+                for name, output in self._stage_results['post_build'].items()
+            ]
+            # Installers for different outputs are compiled concurrently
+            self._call_tools([
+                (f'installer-{name}' if name else 'installer', [self.inno_setup_path, script], {})
+                for name, (script, _, _) in installers
+            ])
+            for _, (_, output_dir, filename) in installers:
+                self._publish_installer(output_dir, filename)
+
+    def _get_installer_inputs(self):
+        values = self._get_option_values([
+            'skip_installer', 'inno_setup_path', 'signtool', 'license_file', 'file_extension', 'app_icon'
+        ])
+        return values, [self.license_file] if self.license_file else []
+
+    def _build_delta(self):
+        base_filename = get_state_filename(self._state_dir, self.build_dir, 'delta-base')
+        objects_dir = get_state_filename(self._state_dir, self.build_dir, 'delta-objects', '')
+        base = Manifest.load(self.delta_base or base_filename)
+        # Post build steps may have changed the release directory since the manifest stage
+        current = Manifest.create(self.output_dir, self.manifest, self.jobs)
+        current.app_version = self._app_version
+        for relative_path, origin in self.file_origins.items():
+            if origin == 'installer':
+                current.entries.pop(relative_path, None)
+
+        result = None
+        if base.entries:
+            delta_dir = path.join(self.build_dir, 'delta')
+            patches = []
+            if self.delta_diff_tool:
+                patches = self._get_patches(current.diff(base), current, base, objects_dir)
+            # Patched files are applied by the updater, so they aren't also copied in full
+            diff = create_delta(self.output_dir, current, base, delta_dir, patches)
+            self._write_patches(delta_dir, patches, base, objects_dir)
+            write_delta_description(delta_dir, current, base, diff, patches)
+            sys.stdout.write(
+                f'Delta from version "{base.app_version}": {len(diff.added)} added, '
+                f'{len(diff.changed)} changed ({len(patches)} patched), '
+                f'{len(diff.removed)} removed files\n'
+            )
+            if patches and not self.skip_installer:
+                sys.stdout.write('Skipping the delta installer, only the updater applies patches\n')
+            elif not self.skip_installer:
+                script, filename = self._write_delta_installer_script(delta_dir, base, diff)
+                self._call_tool('installer-delta', [self.inno_setup_path, script])
+                self._publish_installer(delta_dir, filename)
+            result = {'base_version': base.app_version, 'delta_dir': delta_dir, 'patches': patches}
+        else:
+            sys.stdout.write('No delta base found, this build will be the base of the next delta\n')
+
+        current.save(base_filename)
+        if self.delta_diff_tool:
+            store_objects(self.output_dir, current, objects_dir, self.delta_diff_min_size * 1024 * 1024)
+        return result
+
+    def _get_patches(self, diff, current, base, objects_dir):
+        # Only the binaries whose base version was stored by the previous delta build can be patched
+        return [
+            p for p in get_patch_candidates(diff, current, base, self.delta_diff_min_size * 1024 * 1024)
+            if path.isfile(path.join(objects_dir, base.entries[p].sha256))
+        ]
+
+    def _write_patches(self, delta_dir, patches, base, objects_dir):
+        calls = []
+        for index, relative_path in enumerate(patches):
+            patch = get_patch_filename(delta_dir, relative_path)
+            if not path.isdir(path.dirname(patch)):
+                os.makedirs(path.dirname(patch))
+            cmd = self.delta_diff_tool.format(
+                old=f'"{path.join(objects_dir, base.entries[relative_path].sha256)}"',
+                new=f'"{path.join(self.output_dir, *relative_path.split("/"))}"',
+                patch=f'"{patch}"'
+            )
+            calls.append((f'delta-patch-{index}', cmd, {}))
+        self._call_tools(calls, self.jobs)
+
+    def _write_delta_installer_script(self, delta_dir, base, diff):
+        installer_filename = f'{self._installer_filename}-delta'
+        setup_script = get_template('setup.iss').render({
+            **self.app_config,
+            'installer_filename': installer_filename,
+            'additional_files': [],
+            'run_commands': [],
+            'uninstall_commands': [],
+            'uninstall_files': [],
+            'external_exe_files': [],
+            'additional_temp_files': [],
+            'delta': True,
+            'delta_base_version': base.app_version,
+            'delta_removed': diff.removed,
+            'delta_has_files': path.isdir(path.join(delta_dir, FILES_DIR))
+        })
+        script_filename = path.join(delta_dir, 'setup-delta.iss')
+        write_if_changed(script_filename, setup_script)
+        return script_filename, installer_filename + '.exe'
+
+    def _get_delta_inputs(self):
+        values = self._get_option_values(['delta_base', 'delta_diff_tool', 'delta_diff_min_size'])
+        return values, [self.delta_base] if self.delta_base else []
+
+    def _forward_to_build_server(self):
+        sys.stdout.write(f'Forwarding build to the build server at {self.build_server}\n')
+        options = {
+            name: value for name, (_, value) in self.distribution.get_option_dict('compile').items()
+        }
+        # The server builds with the environment and import path of this process, e.g. its virtualenv
+        returncode = forward_build(
+            self._build_server_connection, path.abspath('.'), options, sys.stdout, dict(os.environ), sys.path
+        )
+        assert not returncode, \
+            f'Build on the build server exited with code {returncode} - see output for details'
+
+    def _run_matrix(self):
+        options = {
+            name: value for name, (_, value) in self.distribution.get_option_dict('compile').items()
+        }
+        configurations = get_configurations(options, load_manifest(self.matrix), self.build_dir)
+        MatrixRunner(
+            configurations,
+            path.join(self.build_dir, 'matrix-shared'),
+            jobs=self.matrix_jobs,
+            memory_limit=self.matrix_memory_limit
+        ).run()
+
+    def get_shared_stage_keys(self):
+        """Gets the inputs of each stage that can be shared between builds, keyed by stage name
+        Builds with equal inputs to a stage can use the same result, a key of `None` means the stage is not run
+        """
+        path_filter = (tuple(self._path_filter.exclude), tuple(self._path_filter.include))
+        return {
+            'vc_env': (self.vc_dir, self.platform),
+            # The package is indexed before any build runs, so not once pre build steps may generate modules
+            'py_packages': (self.package, path_filter) if not self.pre_build else None,
+            'translations': (self.package, tuple(self.languages)) if self.languages else None,
+            'external_packages': (tuple(self.external_packages), tuple(self.external_stdlib_modules), path_filter)\
+                if self.external_packages or self.external_stdlib_modules else None
+        }
+
+    def run_shared_stage(self, stage, stage_dir):
+        """Runs a stage that can be shared between builds, writing any files to `stage_dir`
+        Returns the result of the stage, to be provided to each build in `shared_stages`
+        """
+        if stage == 'vc_env':
+            return get_vc_env(self.vc_dir, self.platform)
+        if not path.isdir(stage_dir):
+            os.makedirs(stage_dir)
+        if stage == 'py_packages':
+            # The version stamp is added to the package when it is staged for the build
+            py_packages = self._index_py_packages('.', self.package, '.')
+            if '__version__.py' not in py_packages['modules']:
+                py_packages['modules'].append('__version__.py')
+            return py_packages
+        if stage == 'translations':
+            translations_dir = path.join(stage_dir, 'translations')
+            self._update_translation_sources(translations_dir, stage_dir, self._get_vc_env())
+            return translations_dir
+        if stage == 'external_packages':
+            packages_dir = path.join(stage_dir, 'packages')
+            self._stage_external_packages(packages_dir)
+            return packages_dir
+        raise ValueError(f'Unknown shared stage {stage}')
+
+    @property
+    def _watch_roots(self):
+        return [self.package] + self.resources_dirs + (['translations'] if self.languages else [])
+
+    def _watch(self):
+        watcher = get_watcher(self._watch_roots, self.watch_poll_interval)
+        sys.stdout.write('Watching {} for changes\n'.format(', '.join(self._watch_roots)))
+        pending = set()
+        try:
+            while True:
+                changed = wait_for_changes(watcher, self.watch_debounce, pending)
+                stages = self._get_affected_stages(changed)
+                pending = set()
+                if not stages:
+                    continue
+                sys.stdout.write('{} Rebuilding {} {}\n'.format('*' * 10, ', '.join(sorted(stages)), '*' * 10))
+                self._invalidate_py_packages(changed)
+                try:
+                    self._rebuild(stages)
+                except (AssertionError, OSError, CalledProcessError) as error:
+                    sys.stderr.write(f'Rebuild failed: {error}\n')
+                # Drop the events caused by the rebuild rewriting the translation sources
+                generated = {path.normpath(f) for f in self._get_translation_files()}
+                pending = {f for f in watcher.wait(0) if path.normpath(f) not in generated}
+        except KeyboardInterrupt:
+            pass
+        finally:
+            watcher.close()
+
+    def _get_affected_stages(self, changed):
+        stages = set()
+        package_dir = path.normpath(self.package) + path.sep
+        resources_dirs = [path.normpath(d) + path.sep for d in self.resources_dirs]
+        translations_dir = 'translations' + path.sep
+        for filename in [path.normpath(f) for f in changed]:
+            if any(filename.startswith(d) for d in resources_dirs):
+                stages.add('resources')
+            elif filename.startswith(translations_dir) and self.languages:
+                stages.add('translations')
+            elif filename.startswith(package_dir) and filename.endswith('.qml'):
+                stages.update(['resources', 'qml'])
+            elif filename.startswith(package_dir) and filename.endswith('.py'):
+                stages.add('python')
+            elif path.normpath(self.package) == filename:
+                stages.update(['resources', 'qml', 'python'])
+        return stages
+
+    def _invalidate_py_packages(self, changed):
+        for filename in [path.normpath(f) for f in changed]:
+            if not filename.endswith('.py') and not path.isdir(filename) and path.exists(filename):
+                continue
+            if path.exists(filename) == (filename in self._indexed_files):
+                continue
+            # A module or package was added or removed, so the package index must be rebuilt
+            self._py_packages_c = {}
+            self._indexed_files = set()
+            return
+
+    def _rebuild(self, stages):
+        vc_env = self._get_vc_env()
+        self._snapshot = FileSnapshot()
+        self.excluded_files = OrderedDict()
+
+        if 'resources' in stages:
+            self._create_app_resources()
+
+        if 'python' in stages:
+            self._apply_version()
+            try:
+                self._build_project_file()
+                self._run_pyqtdeploy(vc_env)
+            finally:
+                self._remove_version()
+
+        if 'translations' in stages:
+            self._generate_ts(vc_env)
+            self._generate_qm(vc_env)
+
+        if 'python' in stages or 'qml' in stages:
+            self._run_qmake(vc_env)
+            self._update_source_files()
+            self._run_nmake(vc_env)
 
     @staticmethod
     def assert_call(cmd, **kwargs):
@@ -310,9 +1049,60 @@ class CompileCommand(Command):
         """
         return assert_call(cmd, **kwargs)
 
+    def _call_tool(self, step, cmd, **kwargs):
+        return self._call_tools([(step, cmd, kwargs)])[0]
+
+    def _call_tools(self, calls, limit=None):
+        """Runs the external tools of `calls`, a list of `(step, cmd, kwargs)`, concurrently
+        (at most `limit` at a time). Output is written to a log per step in the build directory
+        """
+        # The asyncio runner is only imported by builds, not by every setup.py invocation
+        from .process import run_tool, run_tools, run_sync, check_result
+        log_dir = path.join(self.build_dir, 'logs')
+        if not path.isdir(log_dir):
+            os.makedirs(log_dir)
+        coroutines = []
+        for step, cmd, kwargs in calls:
+            log_filename = path.join(log_dir, f'{step}.log')
+            coroutines.append(
+                run_tool(
+                    cmd, log_filename, not self.quiet_tools, self._get_tool_timeout(step), **kwargs
+                )
+            )
+        results = run_sync(run_tools(*coroutines, limit=limit))
+        with open(path.join(log_dir, 'tools.jsonl'), 'a') as fp:
+            for (step, _, _), result in zip(calls, results):
+                self.tool_results.append((step, result))
+                fp.write(json.dumps({'step': step, **result._asdict()}) + '\n')
+        for result in results:
+            check_result(result)
+        return results
+
+    def _get_tool_timeout(self, step):
+        # Steps of several calls, e.g. compile-3 or installer-delta, fall back to the timeout
+        # of their prefix
+        parts = step.split('-')
+        for count in range(len(parts), 0, -1):
+            timeout = self.tool_timeouts.get('-'.join(parts[:count]))
+            if timeout is not None:
+                return timeout
+        return None
+
     def _clean(self):
-        if path.isdir(self.build_dir):
-            shutil.rmtree(self.build_dir)
+        # The generated sources and objects are removed, so complete builds always compile from
+        # scratch, only resumed builds and --watch rebuilds are incremental
+        if not path.isdir(self.build_dir):
+            return
+        # The QtWebEngine resources of the previous build are kept, so that the up to date ones
+        # aren't copied again. The QtWebEngine stage removes those it no longer deploys
+        kept = []
+        if 'QtWebEngine' in self.qt_modules:
+            origins = self._load_file_origins()
+            kept = [p for p, origin in origins.items() if origin == 'qt_web_engine']
+        remove_tree_except(self.build_dir, [path.join(self.output_dir, p) for p in kept])
+        for release_path in kept:
+            if path.isfile(path.join(self.output_dir, release_path)):
+                self.file_origins[release_path] = 'qt_web_engine'
 
 
     @property
@@ -333,7 +1123,7 @@ class CompileCommand(Command):
     @property
     def _app_version(self):
         if self._app_version_c is None:
-            self._app_version_c = get_version(self.package, self.allow_untagged)
+            self._app_version_c = get_version(self.package, self.allow_untagged, get_build_time(self.reproducible))
         return self._app_version_c
 
 
@@ -345,6 +1135,29 @@ class CompileCommand(Command):
         else:
             return version_parts[0] + '.' + version_parts[-1]
 
+    @property
+    def _workspace_dir(self):
+        return path.join(self.build_dir, 'workspace')
+
+
+    @property
+    def _source_root(self):
+        return self._workspace_dir if self.workspace else '.'
+
+
+    @property
+    def _project_file(self):
+        return path.join(self._source_root, f'{self._project_name}.pdy')
+
+
+    @property
+    def _entrypoint(self):
+        entrypoint = self.app_config['entrypoint']
+        if self.workspace and not path.normpath(entrypoint).startswith(path.normpath(self.package) + path.sep):
+            # Entrypoints outside the staged package are used from the checkout
+            return path.abspath(entrypoint)
+        return entrypoint
+
     @property
     def output_dir(self):
         return path.join(self.build_dir, 'release')
@@ -361,9 +1174,11 @@ class CompileCommand(Command):
 
     def _build_project_file(self):
 
-        app_packages = [self._get_py_packages('.', self.package)]
+        app_packages = [self._get_py_packages(self._source_root, self.package)]
         if self.compiled_packages:
             compiled_packages_dir = self._get_external_package_path(self.compiled_packages)
+            if self.workspace:
+                compiled_packages_dir = path.abspath(compiled_packages_dir)
             compiled_packages = [{
                 'name': compiled_packages_dir,
                 'packages': [self._get_py_packages(compiled_packages_dir, p) for p in self.compiled_packages],
@@ -376,6 +1191,7 @@ class CompileCommand(Command):
             **self.app_config,
             'project_name': self._project_name,
             'package': self.package,
+            'entrypoint': self._entrypoint,
             'qt_modules': self.qt_modules,
             'build_dir': self.build_dir,
             'python_version': get_python_version(self.python_dir),
@@ -386,21 +1202,37 @@ class CompileCommand(Command):
             'stdlib_modules': self.stdlib_modules,
             'compiled_packages': compiled_packages,
             'python_dir': self.python_dir,
-            'additional_libs': self.additional_libs
+            'additional_libs': self.additional_libs,
+            'resource_files': get_shard_names('app_resources', self.resource_shards)
         }
-        with open(f'{self._project_name}.pdy', 'w') as fp:
-            fp.write(get_template('package.pdy').render(args))
+        write_if_changed(self._project_file, get_template('package.pdy').render(args))
+        self._report_excluded('frozen packages')
 
     def _apply_version(self):
-        with open(path.join(self.package, '__version__.py'), 'w') as fp:
-            fp.write(f'__version__ = \'{self._app_version}\'')
+        if self.workspace:
+            self._stage_package()
+        write_if_changed(path.join(self._source_root, self.package, '__version__.py'), f'__version__ = \'{self._app_version}\'')
+        self._snapshot.invalidate(path.join(self._source_root, self.package))
     
     def _remove_version(self):
-        os.remove(path.join(self.package, '__version__.py'))
+        if not self.workspace:
+            os.remove(path.join(self.package, '__version__.py'))
+            self._snapshot.invalidate(self.package)
+
+    def _stage_package(self):
+        staged_package_dir = path.join(self._workspace_dir, self.package)
+        if path.isdir(staged_package_dir):
+            shutil.rmtree(staged_package_dir)
+        shutil.copytree(
+            self.package,
+            staged_package_dir,
+            ignore=shutil.ignore_patterns('__pycache__', '*.pyc', '__version__.py')
+        )
 
     def _get_external_package_path(self, requires, package_exists=None):
         valid_package_paths = sys.path + ['.']
-        package_exists = package_exists or (lambda d, r: path.isdir(path.join(d, r)) or path.isfile(path.join(d, f'{r}.py')) or path.isfile(path.join(d, f'{r}.egg-link')) or glob(path.join(d, f'{r}.*.pyd')))
+        snapshot = self._snapshot
+        package_exists = package_exists or (lambda d, r: snapshot.isdir(path.join(d, r)) or snapshot.isfile(path.join(d, f'{r}.py')) or snapshot.isfile(path.join(d, f'{r}.egg-link')) or snapshot.glob(d, f'{r}.*.pyd'))
         for require in requires:
             valid_package_paths = [d for d in valid_package_paths if package_exists(d, require)]
             assert valid_package_paths, f'No valid package paths found for {require}'
@@ -408,86 +1240,236 @@ class CompileCommand(Command):
 
 
     def _get_py_packages(self, base, package):
+        if (base, package) == (self._source_root, self.package) and 'py_packages' in self.shared_stages:
+            return self.shared_stages['py_packages']
+        if (base, package) not in self._py_packages_c:
+            self._py_packages_c[(base, package)] = self._index_py_packages(base, package, base)
+        return self._py_packages_c[(base, package)]
+
+    def _index_py_packages(self, base, package, root):
         basepath = path.join(base, package)
-        files = os.listdir(basepath)
-        packages = [self._get_py_packages(basepath, p) for p in files if path.isdir(path.join(basepath, p)) and not p.startswith('__')]
-        modules = [m for m in files if m.endswith('.py')]
+        files = self._snapshot.listdir(basepath)
+        packages = [
+            self._index_py_packages(basepath, p, root) for p in files
+            if self._snapshot.isdir(path.join(basepath, p)) and not p.startswith('__')
+            and not self._is_excluded('frozen packages', path.join(basepath, p), root)
+        ]
+        modules = [
+            m for m in files if m.endswith('.py')
+            and not self._is_excluded('frozen packages', path.join(basepath, m), root)
+        ]
+        self._indexed_files.update(path.relpath(path.join(basepath, m), root) for m in modules)
+        self._indexed_files.update(path.relpath(path.join(basepath, p['name']), root) for p in packages)
         return {'name': package, 'packages': packages, 'modules': modules}
 
 
     def _create_app_resources(self):
-        app_resource_files = glob(f'{self.package}/**/*.qml', recursive=True)
-        args = {
-            'files': app_resource_files
-        }
+        app_resource_files = self._snapshot.glob(self.package, '**/*.qml')
         app_resources_dir = path.join(self.build_dir, 'app_resources')
         if not path.isdir(app_resources_dir):
             os.makedirs(app_resources_dir)
 
-        with open(path.join(app_resources_dir, 'app_resources.qrc'), 'w') as fp:
-            fp.write(get_template('resources.qrc').render(args))
+        # Shards are rewritten only when their files change, so that only they are compiled again
+        shards = shard_files(
+            app_resource_files, self.resource_shards, self.resource_shard_by, lambda f: self._snapshot.stat(f).st_size
+        )
+        for name, files in zip(get_shard_names('app_resources', self.resource_shards), shards):
+            args = {
+                'files': [(f, get_compression_attributes(f, self.resource_compression)) for f in files]
+            }
+            write_if_changed(path.join(app_resources_dir, name), get_template('resources.qrc').render(args))
+        self._progress.add_files(len(app_resource_files))
         for resource_file in app_resource_files:
             dest = path.join(self.build_dir, 'app_resources', resource_file)
             if not path.isdir(path.dirname(dest)):
                 os.makedirs(path.dirname(dest))
-            shutil.copyfile(resource_file, dest)
+            self._copy_file(resource_file, dest)
 
         for resources_dir in self.resources_dirs:
-            other_resource_files = glob(f'{resources_dir}/**/*', recursive=True)
-            for resource_file in [f for f in other_resource_files if path.isfile(f)]:
+            other_resource_files = [
+                f for f in self._snapshot.glob(resources_dir, '**/*')
+                if not self._is_excluded('resources', f, resources_dir)
+            ]
+            self._progress.add_files(len(other_resource_files))
+            for resource_file in other_resource_files:
                 dest = path.join(self.output_dir, resource_file)
                 if not path.isdir(path.dirname(dest)):
                     os.makedirs(path.dirname(dest))
-                shutil.copyfile(resource_file, dest)
+                self._copy_file(resource_file, dest, 'resources')
+        self._report_excluded('resources')
+
+    def _get_resource_qml_files(self):
+        return [f for d in self.resources_dirs for f in self._snapshot.glob(d, '**/*.qml')]
+
+    def _get_qml_files(self):
+        return self._snapshot.glob(self.package, '**/*.qml') + self._get_resource_qml_files()
+
+    def _compile_qml_caches(self):
+        # Only the QML files which were copied, rather than excluded, are compiled
+        qml_files = [f for f in self._get_resource_qml_files() if path.isfile(path.join(self.output_dir, f))]
+        cache = QmlCache(path.join(self._state_dir, QML_CACHE_DIRNAME))
+        tool = self.qml_cache_tool.replace('{qmlcachegen}', path.join(self._qt_dir, 'qmlcachegen'))
+        tool_identity = get_tool_identity(tool)
+        calls = []
+        compiled = []
+        for qml_file in qml_files:
+            key = get_key(qml_file, tool_identity)
+            output = get_output_filename(path.join(self.output_dir, qml_file))
+            if not cache.get(key, output):
+                cmd = tool.format(input=f'"{path.abspath(qml_file)}"', output=f'"{path.abspath(output)}"')
+                calls.append((f'qml-cache-{len(calls)}', cmd, {}))
+                compiled.append((key, output))
+            self._set_origin(output, 'qml_cache')
+        if calls:
+            self._call_tools(calls, self.jobs)
+        for key, output in compiled:
+            cache.put(key, output)
+        sys.stdout.write(f'Compiled {len(compiled)} of {len(qml_files)} QML files, the others were cached\n')
+
+    def _is_excluded(self, area, filename, root):
+        # Excluded files and directories are counted towards the report of `area`
+        excluded = self._path_filter.is_excluded(path.relpath(filename, root), self._snapshot.isdir(filename))
+        if excluded:
+            self._count_excluded(area, filename)
+        return excluded
+
+    def _count_excluded(self, area, filename):
+        files, size = self._snapshot.get_tree_size(filename)
+        totals = self.excluded_files.setdefault(area, [0, 0])
+        totals[0] += files
+        totals[1] += size
+
+    def _report_excluded(self, area):
+        if area in self.excluded_files:
+            files, size = self.excluded_files[area]
+            sys.stdout.write(f'Excluded {files} files ({format_size(size)}) from the {area}\n')
+
+    def _copy_file(self, source, dest, origin=None):
+        # Modification times are preserved so that cached hashes of the release directory remain valid
+        shutil.copy2(source, dest)
+        self._progress.advance()
+        if origin:
+            self._set_origin(dest, origin)
+
+    def _set_origin(self, filename, origin):
+        release_path = self._get_release_path(filename)
+        if not release_path.startswith('../'):
+            self.file_origins[release_path] = origin
 
+    @property
+    def manifest_file(self):
+        """The manifest of the release directory, written once the application's files have been copied
+        """
+        return path.join(self.build_dir, MANIFEST_FILENAME)
 
-    def _copy_qt_web_engine_resources(self):
-        shutil.copyfile(path.join(self._qt_dir, 'QtWebEngineProcess.exe'), path.join(self.output_dir, 'QtWebEngineProcess.exe'))
+    @property
+    def manifest(self):
+        """The `Manifest` of the release directory
+        """
+        return Manifest.load(self.manifest_file)
+
+    def _write_manifest(self):
+        cache_filename = get_state_filename(self._state_dir, self.build_dir, 'manifest')
+        manifest = Manifest.create(self.output_dir, Manifest.load(cache_filename), self.jobs)
+        manifest.app_version = self._app_version
+        manifest.save(self.manifest_file)
+        manifest.save(cache_filename)
+        return self.manifest_file
+
+    def _get_release_path(self, filename):
+        return path.relpath(filename, self.output_dir).replace(path.sep, '/')
+
+    def _tag_files(self, directory, origin):
+        # Attributes the files of `directory` without an origin to `origin`
+        for filename in walk_files(directory):
+            self.file_origins.setdefault(self._get_release_path(filename), origin)
+
+
+    def _get_qt_web_engine_copies(self):
+        copies = [(path.join(self._qt_dir, 'QtWebEngineProcess.exe'), path.join(self.output_dir, 'QtWebEngineProcess.exe'))]
         qt_resources_dir = path.abspath(path.join(self._qt_dir, '..', 'resources'))
-        qt_translations_dir = path.join(self._qt_dir, '..', 'translations')
-        for resource in glob(qt_resources_dir + '/*'):
-            shutil.copyfile(resource, path.join(self.output_dir, 'resources', path.basename(resource)))
+        copies += [
+            (r, path.join(self.output_dir, 'resources', path.basename(r)))
+            for r in sorted(glob(qt_resources_dir + '/*')) if path.isfile(r)
+        ]
+        locales_dir = path.join(self._qt_dir, '..', 'translations', 'qtwebengine_locales')
+        locales = sorted(os.listdir(locales_dir)) if path.isdir(locales_dir) else []
+        if self.web_engine_language_locales:
+            locales = get_web_engine_locales(locales, self.languages)
         locales_dest = path.join(self.output_dir, 'translations', 'qtwebengine_locales')
-        if not path.isdir(locales_dest):
-            shutil.copytree(path.join(qt_translations_dir, 'qtwebengine_locales'), locales_dest)
-        
-        self.external_exe_files.append('QtWebEngineProcess.exe')
+        copies += [(path.join(locales_dir, l), path.join(locales_dest, l)) for l in locales]
+        return copies, locales_dest
+
+    def _copy_qt_web_engine_resources(self):
+        copies, locales_dest = self._get_qt_web_engine_copies()
+        self._progress.add_files(len(copies))
+        copied = copy_files_if_changed(copies, self.jobs)
+        self._progress.advance(len(copies))
+        for _, dest in copies:
+            self._set_origin(dest, 'qt_web_engine')
+        # Locales deployed by a previous build which are no longer wanted
+        deployed_locales = {path.basename(d) for _, d in copies if path.dirname(d) == locales_dest}
+        if path.isdir(locales_dest):
+            for locale in sorted(set(os.listdir(locales_dest)) - deployed_locales):
+                os.remove(path.join(locales_dest, locale))
+                self.file_origins.pop(self._get_release_path(path.join(locales_dest, locale)), None)
+        sys.stdout.write(f'Copied {len(copied)} of {len(copies)} QtWebEngine files, the others were up to date\n')
+
+        if 'QtWebEngineProcess.exe' not in self.external_exe_files:
+            self.external_exe_files.append('QtWebEngineProcess.exe')
 
 
     def _generate_ts(self, env):
         if self.languages:
-            temp_tr_filename = path.join(self.build_dir, 'temp_tr.py')
-            with open(temp_tr_filename, 'w') as temp_tr:
-                for filename in glob(f'{self.package}/**/*.py', recursive=True):
-                    with open(filename) as src:
-                        temp_tr.writelines(src.readlines())
-            if not path.isdir('translations'):
-                os.makedirs('translations')
-            assert_call([
-                'pylupdate5',
-                '-verbose',
-                temp_tr_filename,
-                '-ts'
-            ] + self._get_translation_files(), env=env)
             dest = path.join(self.build_dir, 'translations')
-            if os.path.exists(dest):
-                shutil.rmtree(dest)
-            shutil.copytree('translations', dest)
+            if 'translations' in self.shared_stages:
+                self._replace_tree(self.shared_stages['translations'], dest)
+            elif self.workspace:
+                self._update_translation_sources(dest, self.build_dir, env)
+            else:
+                self._update_translation_sources('translations', self.build_dir, env)
+                self._replace_tree('translations', dest)
+
+    def _update_translation_sources(self, translations_dir, temp_dir, env):
+        temp_tr_filename = path.join(temp_dir, 'temp_tr.py')
+        sources = []
+        for filename in self._snapshot.glob(self.package, '**/*.py'):
+            with open(filename) as src:
+                sources.append(src.read())
+        write_if_changed(temp_tr_filename, ''.join(sources))
+        if path.normpath(translations_dir) != 'translations' and path.isdir('translations'):
+            # Update copies of the translation sources, leaving the checkout untouched
+            self._replace_tree('translations', translations_dir)
+        elif not path.isdir(translations_dir):
+            os.makedirs(translations_dir)
+        self._call_tool('pylupdate', [
+            'pylupdate5',
+            '-verbose',
+            temp_tr_filename,
+            '-ts'
+        ] + [path.join(translations_dir, path.basename(f)) for f in self._get_translation_files()], env=env)
+        self._snapshot.invalidate(translations_dir)
+
+    @staticmethod
+    def _replace_tree(source, dest):
+        if path.exists(dest):
+            shutil.rmtree(dest)
+        shutil.copytree(source, dest)
 
 
     def _generate_qm(self, env):
-        assert_call([
+        self._call_tool('lrelease', [
             path.join(self._qt_dir, 'lrelease'),
             '-verbose',
             self.qmake_pro_file
         ], env=env)
 
-        qm_files = glob(path.join(self.build_dir, 'translations', '*.qm'))
+        qm_files = sorted(glob(path.join(self.build_dir, 'translations', '*.qm')))
         dest = path.join(self.output_dir, 'translations')
         if not path.isdir(dest):
             os.makedirs(dest)
         for qm_file in qm_files:
-            shutil.copy(qm_file, dest)
+            self._copy_file(qm_file, path.join(dest, path.basename(qm_file)), 'translations')
 
 
     def _get_translation_files(self):
@@ -495,7 +1477,10 @@ class CompileCommand(Command):
 
 
     def _get_vc_env(self):
-        vc_env = get_vc_env(self.vc_dir, self.platform)
+        if 'vc_env' in self.shared_stages:
+            vc_env = dict(self.shared_stages['vc_env'])
+        else:
+            vc_env = get_vc_env(self.vc_dir, self.platform)
 
         vc_env['LIB'] = '{};{};{}'.format(
             ';'.join(self._get_pyqt_lib_paths()),
@@ -508,21 +1493,51 @@ class CompileCommand(Command):
 
 
     def _run_pyqtdeploy(self, env):
-        assert_call(['pyqtdeploycli', 'build', '--output', self.build_dir, '--project', f'{self._project_name}.pdy'], env=env)
+        self._call_tool('pyqtdeploy', ['pyqtdeploycli', 'build', '--output', self.build_dir, '--project', self._project_file], env=env)
 
 
     def _run_qmake(self, env):
-        assert_call([self.qmake_path], cwd=self.build_dir, env=env)
+        self._call_tool('qmake', [self.qmake_path] + self._get_qmake_args(), cwd=self.build_dir, env=env)
 
+    def _get_qmake_args(self):
+        if not self.compiler_cache:
+            return []
+        # Launch the compiler through the cache, so that every build tool uses it
+        launcher = get_launcher(self.compiler_cache_dir, self.compiler_cache_size)
+        return [f'QMAKE_CC={launcher} cl', f'QMAKE_CXX={launcher} cl']
 
-    def _run_nmake(self, env):
-        assert_call(
-            [path.join(get_vc_bin_dir(self.vc_dir, self.platform), 'nmake')],
-            cwd=self.build_dir,
-            env=env
-        )
 
-    def _build_installer(self, name, output):
+    def _run_nmake(self, env):
+        if self.build_tool == 'pool':
+            self._compile_objects(env)
+        self._call_tool('nmake', self._get_build_tool_cmd(), cwd=self.build_dir, env=env)
+        self._tag_files(self.output_dir, 'application')
+
+    def _get_build_tool_cmd(self):
+        if self.build_tool in ['nmake', 'pool']:
+            return [path.join(get_vc_bin_dir(self.vc_dir, self.platform), 'nmake')]
+        if path.splitext(path.basename(self.build_tool.replace('\\', '/')))[0].lower() == 'jom':
+            return [self.build_tool, '/J', str(self.jobs)]
+        return [self.build_tool, f'-j{self.jobs}']
+
+    def _compile_objects(self, env):
+        # Compile the objects in parallel, leaving nmake to link them
+        newest_header = get_newest_header(self.build_dir)
+        jobs = [
+            j for j in get_compile_jobs(get_makefile(self.build_dir))
+            if not is_up_to_date(j, self.build_dir, newest_header)
+        ]
+        for job in jobs:
+            object_dir = path.dirname(path.join(self.build_dir, job.object))
+            if not path.isdir(object_dir):
+                os.makedirs(object_dir)
+        sys.stdout.write(f'Compiling {len(jobs)} objects with {self.jobs} jobs\n')
+        self._call_tools([
+            (f'compile-{index}', job.cmd, {'cwd': self.build_dir, 'env': env})
+            for index, job in enumerate(jobs)
+        ], limit=self.jobs)
+
+    def _write_installer_script(self, name, output):
         installer_filename = self._installer_filename if not name else f'{self._installer_filename}-{name}'
         if isinstance(output, dict):
             output_dir = output['output_dir']
@@ -553,23 +1568,25 @@ class CompileCommand(Command):
 
         setup_script = get_template('setup.iss').render(installer_config)
 
-        with open(path.join(output_dir, 'setup.iss'), 'w') as fp:
-            fp.write(setup_script)
-
-        assert_call([self.inno_setup_path, fp.name])
+        script_filename = path.join(output_dir, f'setup-{name}.iss' if name else 'setup.iss')
+        write_if_changed(script_filename, setup_script)
+        self._set_origin(script_filename, 'installer')
 
-        filename = installer_config['installer_filename'] + '.exe'
+        return script_filename, output_dir, installer_config['installer_filename'] + '.exe'
 
+    def _publish_installer(self, output_dir, filename):
         if self.signtool:
-            assert_call(self.signtool + ' ' + path.join(output_dir, filename))
+            self._call_tool('signtool', self.signtool + ' ' + path.join(output_dir, filename))
 
         shutil.move(path.join(output_dir, filename), path.join(path.abspath('.'), filename))
 
 
     def _copy_binaries(self, env):
         # Copy the dll paths we know about
-        for dll_path in self._get_dll_paths():
-            shutil.copyfile(dll_path, path.join(self.output_dir, path.basename(dll_path)))
+        dll_origins = self._get_dll_origins()
+        self._progress.add_files(len(dll_origins))
+        for dll_path, origin in dll_origins.items():
+            self._copy_file(dll_path, path.join(self.output_dir, path.basename(dll_path)), origin)
         
         # for pyd_src, pyd_dest in self._get_pyd_paths():
         #     shutil.copyfile(pyd_src, path.join(self.output_dir, pyd_dest))
@@ -579,29 +1596,58 @@ class CompileCommand(Command):
         dest_platforms_dir = path.join(self.output_dir, 'platforms')
         if not path.isdir(dest_platforms_dir):
             os.makedirs(dest_platforms_dir)
-        shutil.copyfile(
+        self._copy_file(
             path.join(platforms_dir, 'qwindows.dll'),
-            path.join(dest_platforms_dir, 'qwindows.dll')
+            path.join(dest_platforms_dir, 'qwindows.dll'),
+            'qt'
         )
 
         # Run windeployqt
         app_binary = path.join(self.output_dir, f'{self._project_name}.exe')
-        assert_call([
+        self._call_tool('windeployqt', [
             path.join(self._qt_dir, 'windeployqt'),
             '--release'
-        ] + (['--no-compiler-runtime'] if self.vc_redist else []) + [
+        ] + (['--no-compiler-runtime'] if self.vc_redist else []) + self._get_windeployqt_plugin_args() + [
             app_binary
         ], env=env)
+        if self.prune_qt_plugins:
+            self._prune_qt_plugins(self._get_qml_files())
+        self._tag_files(self.output_dir, 'windeployqt')
 
         # Copy vc_redist if required
         if self.vc_redist:
-            shutil.copyfile(
+            self._copy_file(
                 self.vc_redist,
-                path.join(self.output_dir, path.basename(self.vc_redist))
+                path.join(self.output_dir, path.basename(self.vc_redist)),
+                'vc_redist'
             )
 
+    def _get_windeployqt_plugin_args(self):
+        if not self.prune_qt_plugins:
+            return []
+        # QML modules are deployed from the imports of the package's and resources' QML,
+        # rather than the release directory's
+        qml_dirs = [d for d in [self.package] + self.resources_dirs if self._snapshot.glob(d, '**/*.qml')]
+        args = [arg for d in qml_dirs for arg in ['--qmldir', path.abspath(d)]] or ['--no-quick-import']
+        return args + ([] if self.languages else ['--no-translations'])
+
+    def _prune_qt_plugins(self, qml_files):
+        qml_imports = get_qml_imports(qml_files)
+        selection = get_plugin_selection(get_plugin_modules(self.qt_modules, qml_imports), self.qt_plugins)
+        removed = prune_plugins(self.output_dir, selection)
+        if self.languages:
+            removed += prune_translations(path.join(self.output_dir, 'translations'), self.languages)
+        for filename, _ in removed:
+            self.file_origins.pop(self._get_release_path(filename), None)
+        plugins = ', '.join(t if n is None else ', '.join(f'{t}/{p}' for p in sorted(n)) for t, n in sorted(selection.items()))
+        sys.stdout.write(f'Deploying the Qt plugins {plugins}\n')
+        sys.stdout.write(
+            f'Removed {len(removed)} Qt plugins and translations ({format_size(sum(s for _, s in removed))}) '
+            'not required by the application\n'
+        )
+
     def _resolve_egg_link(self, external_packages_path, package):
-        if not path.isfile(path.join(external_packages_path, package + '.egg-link')):
+        if not self._snapshot.isfile(path.join(external_packages_path, package + '.egg-link')):
             return external_packages_path, package
         else:
             with open(path.join(external_packages_path, package + '.egg-link'), 'r') as fp:
@@ -610,24 +1656,56 @@ class CompileCommand(Command):
         
 
     def _copy_external_packages(self):
-        external_packages_path = self._get_external_package_path(self.external_packages)
         package_dest = path.join(self.output_dir, 'packages')
+        if path.isdir(package_dest):
+            # Left over from the build being resumed
+            shutil.rmtree(package_dest)
+        if 'external_packages' in self.shared_stages:
+            shutil.copytree(self.shared_stages['external_packages'], package_dest, copy_function=link_or_copy)
+        else:
+            self._stage_external_packages(package_dest)
+        for module in self.external_stdlib_modules:
+            self._tag_files(path.join(package_dest, module), 'external_stdlib')
+        self._tag_files(package_dest, 'external_packages')
+
+    def _stage_external_packages(self, package_dest):
+        external_packages_path = self._get_external_package_path(self.external_packages)
+        os.makedirs(package_dest, exist_ok=True)
+        on_excluded = partial(self._count_excluded, 'external packages')
         for package in self.external_packages:
             current_path, package = self._resolve_egg_link(external_packages_path, package)
-            if path.isdir(path.join(current_path, package)) and not path.isdir(path.join(package_dest, package)):
-                shutil.copytree(path.join(current_path, package), path.join(package_dest, package), ignore=shutil.ignore_patterns('__pycache__', '*.pyc'))
-            elif path.isfile(path.join(current_path, f'{package}.py')) and not path.isfile(path.join(package_dest, f'{package}.py')):
+            if self._snapshot.isdir(path.join(current_path, package)) and not path.isdir(path.join(package_dest, package)):
+                ignore = self._path_filter.get_copytree_ignore(
+                    current_path, on_excluded, isdir=self._snapshot.isdir
+                )
+                shutil.copytree(
+                    path.join(current_path, package),
+                    path.join(package_dest, package),
+                    ignore=ignore,
+                    copy_function=self._copy_file
+                )
+            elif self._snapshot.isfile(path.join(current_path, f'{package}.py')) and not path.isfile(path.join(package_dest, f'{package}.py')):
                 shutil.copyfile(path.join(current_path, f'{package}.py'), path.join(package_dest, f'{package}.py'))
-            elif glob(path.join(current_path, f'{package}.*.pyd')):
-                compiled_package_binary = glob(path.join(current_path, f'{package}.*.pyd'))[0]
+            elif self._snapshot.glob(current_path, f'{package}.*.pyd'):
+                compiled_package_binary = self._snapshot.glob(current_path, f'{package}.*.pyd')[0]
                 shutil.copyfile(compiled_package_binary, path.join(package_dest, path.basename(compiled_package_binary)))
 
         external_stdlib_path = self._get_external_package_path(self.external_stdlib_modules)
         for package in self.external_stdlib_modules:
             if path.isdir(path.join(external_stdlib_path, package)) and not path.isdir(path.join(package_dest, package)):
-                shutil.copytree(path.join(external_stdlib_path, package), path.join(package_dest, package), ignore=shutil.ignore_patterns('__pycache__', '*.pyc'))
+                ignore = self._path_filter.get_copytree_ignore(external_stdlib_path, on_excluded)
+                shutil.copytree(
+                    path.join(external_stdlib_path, package),
+                    path.join(package_dest, package),
+                    ignore=ignore,
+                    copy_function=self._copy_file
+                )
+        self._report_excluded('external packages')
 
     def _get_dll_paths(self):
+        return list(self._get_dll_origins())
+
+    def _get_dll_origins(self):
         pyqt_dlls = [
             path.join(p, f'{m}.dll') for p, m in zip(self._get_pyqt_lib_paths(), self.qt_modules)
         ]
@@ -639,15 +1717,26 @@ class CompileCommand(Command):
         ]
         python_dlls = [path.join(self.python_dir, f'{d}.dll') for d in ['python3', 'python36']]
         if self.stdlib_binaries:
-            module_path = self._get_external_package_path(self.stdlib_binaries, lambda d, r: path.isfile(path.join(d, f'{r}.pyd')))
+            module_path = self._get_external_package_path(self.stdlib_binaries, lambda d, r: self._snapshot.isfile(path.join(d, f'{r}.pyd')))
             python_compiled_module_dlls = [path.join(module_path, f'{r}.pyd') for r in self.stdlib_binaries]
         else:
             python_compiled_module_dlls = []
         external_module_dlls = []
         packages_path = self._get_external_package_path(self.external_packages)
         for package in self.external_packages:
-            external_module_dlls += glob(path.join(packages_path, package) + '/**/*.dll')
-        return pyqt_dlls + [sip_dll] + qt_dlls + python_dlls + python_compiled_module_dlls + external_module_dlls
+            # The pattern has always matched a single level, as glob's ** is only recursive when asked to be
+            external_module_dlls += self._snapshot.glob(path.join(packages_path, package), '*/*.dll')
+        origins = OrderedDict()
+        for origin, dlls in [
+                ('pyqt', pyqt_dlls),
+                ('sip', [sip_dll]),
+                ('qt', qt_dlls),
+                ('python', python_dlls),
+                ('stdlib_binaries', python_compiled_module_dlls),
+                ('external_packages', external_module_dlls)
+        ]:
+            origins.update((dll, origin) for dll in dlls)
+        return origins
 
     def _get_pyd_paths(self):
         pyd_paths = []
@@ -659,7 +1748,7 @@ class CompileCommand(Command):
             return path.relpath(source_dir, packages_path).replace(path.sep, '.') + '.' + source_file
 
         for package in self.external_packages:
-            source_files = glob(path.join(packages_path, package) + '/**/*.pyd')
+            source_files = self._snapshot.glob(path.join(packages_path, package), '*/*.pyd')
             dest_files = [source_to_dest(src, packages_path) for src in source_files]
             pyd_paths += list(zip(source_files, dest_files))
         return pyd_paths
@@ -679,6 +1768,7 @@ class CompileCommand(Command):
 
     def _exec_build_step(self, build_step):
         filename, function = build_step.split(':')
+        import importlib.util
         spec = importlib.util.spec_from_file_location("module", filename)
         module = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(module)
@@ -0,0 +1,345 @@
+# pyqttoolkit
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""CompilerCache
+
+This module defines a compiler launcher which caches the objects built by msvc or gcc compatible compilers,
+keyed on the preprocessed source, the compiler flags and the compiler itself.
+
+The launcher is run as a script in front of the compiler, so that it does not depend on the package being importable:
+`python compiler_cache.py --cache-dir DIR --max-size MB cl -c ...`
+"""
+import os
+from os import path
+import sys
+import json
+import shlex
+import shutil
+import hashlib
+import argparse
+import tempfile
+import subprocess
+
+CACHE_VERSION = '1'
+DEFAULT_MAX_SIZE = 2048
+
+_SOURCE_EXTENSIONS = ['.c', '.cpp', '.cc', '.cxx']
+# Options which write files other than the object, so their compilations can't be cached
+_MSVC_UNCACHEABLE = ['E', 'EP', 'P']
+_MSVC_UNCACHEABLE_PREFIXES = ['Zi', 'ZI', 'Fd', 'Fa', 'FA', 'Fp', 'Yc', 'Yu']
+_GCC_UNCACHEABLE = ['-MD', '-MMD', '-MF', '-E', '-S', '-save-temps']
+# Longer command lines are passed to the compiler in a response file
+_MAX_COMMAND_LINE = 8000
+
+
+def get_default_cache_dir():
+    """Gets the directory of the compiler cache shared by every build of the current user
+    """
+    root = os.environ.get('LOCALAPPDATA') or path.join(path.expanduser('~'), '.cache')
+    return path.join(root, 'pyqtinstaller', 'compiler_cache')
+
+
+def get_launcher(cache_dir, max_size):
+    """Gets the command line prefix which runs a compiler through the cache
+    """
+    return '"{}" "{}" --cache-dir "{}" --max-size {}'.format(
+        sys.executable, path.abspath(__file__), path.abspath(cache_dir), max_size
+    )
+
+
+def expand_response_files(args):
+    """Replaces `@file` arguments with the arguments the file contains
+    """
+    expanded = []
+    for arg in args:
+        if arg.startswith('@') and path.isfile(arg[1:]):
+            with open(arg[1:]) as fp:
+                expanded += expand_response_files(shlex.split(fp.read(), posix=os.name != 'nt'))
+        else:
+            expanded.append(arg)
+    return expanded
+
+
+def is_msvc(compiler):
+    """Whether `compiler` takes msvc style options
+    """
+    return path.splitext(path.basename(compiler.replace('\\', '/')))[0].lower() in ['cl', 'clang-cl']
+
+
+def _is_source(arg):
+    return not arg.startswith('-') and path.splitext(arg)[1].lower() in _SOURCE_EXTENSIONS
+
+
+def parse_msvc_args(args):
+    """Splits the arguments of an msvc compilation into `(flags, source, output)`
+    Returns `None` if the compilation can't be cached
+    """
+    options = [a[1:] for a in args if a[:1] in '-/' and not _is_source(a)]
+    sources = [a for a in args if a[:1] not in '-/' or _is_source(a)]
+    if 'c' not in options or len(sources) != 1:
+        return None
+    if any(o in _MSVC_UNCACHEABLE or o.startswith(tuple(_MSVC_UNCACHEABLE_PREFIXES)) for o in options):
+        return None
+    outputs = [o[2:] for o in options if o.startswith('Fo')]
+    output = outputs[-1] if outputs else ''
+    if not output or output.endswith(('/', '\\')):
+        output += path.splitext(path.basename(sources[0]))[0] + '.obj'
+    flags = [a for a in args if a not in sources and not a[1:].startswith('Fo')]
+    return flags, sources[0], output
+
+
+def split_msvc_batch(args):
+    """Splits the arguments of an msvc compilation of several sources, as run by the batch mode inference rules
+    of nmake Makefiles, into the arguments compiling each source on its own.
+    Returns `None` if the compilation is not of several sources that can be split
+    """
+    options = [a[1:] for a in args if a[:1] in '-/' and not _is_source(a)]
+    sources = [a for a in args if a[:1] not in '-/' or _is_source(a)]
+    if 'c' not in options or len(sources) < 2 or not all(_is_source(s) for s in sources):
+        return None
+    outputs = [o[2:] for o in options if o.startswith('Fo')]
+    if outputs and not outputs[-1].endswith(('/', '\\')):
+        return None
+    names = {path.basename(s.replace('\\', '/')).lower() for s in sources}
+    if len(names) != len(sources):
+        # The output of each source is told apart by its name
+        return None
+    flags = [a for a in args if a not in sources]
+    return [flags + [s] for s in sources]
+
+
+def split_msvc_output(stdout, sources):
+    """Splits the output of an msvc compilation of several `sources` into the output of each,
+    which starts with the line naming the source
+    """
+    names = {path.basename(s.replace('\\', '/')).lower(): s for s in sources}
+    outputs = {s: b'' for s in sources}
+    current = None
+    for line in stdout.splitlines(keepends=True):
+        current = names.get(line.strip().decode('utf8', 'replace').lower(), current)
+        if current:
+            outputs[current] += line
+    return outputs
+
+
+def parse_gcc_args(args):
+    """Splits the arguments of a gcc compatible compilation into `(flags, source, output)`
+    Returns `None` if the compilation can't be cached
+    """
+    if '-c' not in args or any(a in _GCC_UNCACHEABLE for a in args):
+        return None
+    flags = []
+    output = None
+    sources = []
+    iterator = iter(args)
+    for arg in iterator:
+        if arg == '-o':
+            output = next(iterator, None)
+        elif arg.startswith('-o'):
+            output = arg[2:]
+        elif _is_source(arg):
+            sources.append(arg)
+        else:
+            flags.append(arg)
+    if len(sources) != 1:
+        return None
+    return flags, sources[0], output or path.splitext(path.basename(sources[0]))[0] + '.o'
+
+
+def get_compiler_identity(compiler):
+    """Identifies the compiler executable by its path, size and modification time
+    """
+    executable = shutil.which(compiler) or compiler
+    try:
+        stat = os.stat(executable)
+        return f'{path.abspath(executable)}:{stat.st_size}:{stat.st_mtime_ns}'
+    except OSError:
+        return compiler
+
+
+def preprocess(compiler, flags, source, msvc):
+    """Runs the preprocessor on `source`, returning its output or `None` if it fails
+    """
+    if msvc:
+        cmd = [compiler] + [f for f in flags if f[1:] != 'c'] + ['-E', '-nologo', source]
+    else:
+        cmd = [compiler] + [f for f in flags if f != '-c'] + ['-E', source]
+    process = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    return process.stdout if process.returncode == 0 else None
+
+
+def get_key(compiler, flags, preprocessed):
+    """Gets the cache key of a compilation
+    """
+    digest = hashlib.sha256()
+    digest.update(CACHE_VERSION.encode('utf8'))
+    digest.update(get_compiler_identity(compiler).encode('utf8'))
+    digest.update(json.dumps(flags).encode('utf8'))
+    digest.update(preprocessed)
+    return digest.hexdigest()
+
+
+class CompilerCache:
+    """CompilerCache
+    Stores compiled objects by key in `cache_dir`, evicting the least recently used entries
+    once the cache is larger than `max_size` MB
+    """
+    def __init__(self, cache_dir, max_size=DEFAULT_MAX_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    def _get_entry(self, key):
+        return path.join(self.cache_dir, key[:2], key)
+
+    def get(self, key, output):
+        """Copies the cached object of `key` to `output`, returning the compiler output stored with it
+        Returns `None` if the key is not cached
+        """
+        entry = self._get_entry(key)
+        try:
+            with open(entry + '.out', 'rb') as fp:
+                stdout = fp.read()
+            shutil.copyfile(entry + '.obj', output)
+        except OSError:
+            return None
+        os.utime(entry + '.obj')
+        return stdout
+
+    def put(self, key, output, stdout):
+        """Stores the object `output` and the compiler output of a compilation under `key`
+        """
+        entry = self._get_entry(key)
+        os.makedirs(path.dirname(entry), exist_ok=True)
+        temp_suffix = f'.{os.getpid()}.tmp'
+        # The object is stored last so that a complete entry exists whenever the object does
+        with open(entry + '.out' + temp_suffix, 'wb') as fp:
+            fp.write(stdout)
+        os.replace(entry + '.out' + temp_suffix, entry + '.out')
+        shutil.copyfile(output, entry + '.obj' + temp_suffix)
+        os.replace(entry + '.obj' + temp_suffix, entry + '.obj')
+        self.trim()
+
+    def trim(self):
+        """Evicts the least recently used entries until the cache is within 90% of its maximum size
+        """
+        entries = []
+        for dirpath, _, filenames in os.walk(self.cache_dir):
+            for filename in filenames:
+                if filename.endswith('.obj'):
+                    try:
+                        stat = os.stat(path.join(dirpath, filename))
+                    except OSError:
+                        # Evicted by another compilation
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path.join(dirpath, filename)))
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_size * 1024 * 1024:
+            return
+        for _, size, filename in sorted(entries):
+            if total <= self.max_size * 1024 * 1024 * 0.9:
+                break
+            for name in [filename, filename[:-len('.obj')] + '.out']:
+                try:
+                    os.remove(name)
+                except OSError:
+                    pass
+            total -= size
+
+
+def _run_compiler(compiler, args):
+    if len(subprocess.list2cmdline(args)) <= _MAX_COMMAND_LINE:
+        return subprocess.run([compiler] + args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    with tempfile.NamedTemporaryFile('w', suffix='.rsp', delete=False) as fp:
+        fp.write(subprocess.list2cmdline(args))
+    try:
+        return subprocess.run([compiler, '@' + fp.name], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    finally:
+        os.remove(fp.name)
+
+
+def compile_batch_cached(cache, compiler, batch):
+    """Runs the msvc compilations of `batch`, the arguments of each source split by `split_msvc_batch`,
+    through `cache`. The sources which are not cached are compiled by a single call of `compiler`.
+    Returns the compiler's exit code
+    """
+    misses = []
+    for args in batch:
+        flags, source, output = parse_msvc_args(args)
+        preprocessed = preprocess(compiler, flags, source, True)
+        key = get_key(compiler, flags, preprocessed) if preprocessed is not None else None
+        stdout = cache.get(key, output) if key else None
+        if stdout is None:
+            misses.append((source, output, key))
+        else:
+            sys.stdout.buffer.write(stdout)
+    if not misses:
+        sys.stdout.flush()
+        return 0
+
+    process = _run_compiler(compiler, batch[0][:-1] + [source for source, _, _ in misses])
+    sys.stdout.buffer.write(process.stdout)
+    sys.stdout.flush()
+    if process.returncode == 0:
+        outputs = split_msvc_output(process.stdout, [source for source, _, _ in misses])
+        for source, output, key in misses:
+            if key and path.isfile(output):
+                cache.put(key, output, outputs[source])
+    return process.returncode
+
+
+def compile_cached(cache, compiler, args):
+    """Runs `compiler` with `args` through `cache`, returning the compiler's exit code
+    """
+    msvc = is_msvc(compiler)
+    expanded = expand_response_files(args)
+    batch = split_msvc_batch(expanded) if msvc else None
+    if batch:
+        return compile_batch_cached(cache, compiler, batch)
+    parsed = parse_msvc_args(expanded) if msvc else parse_gcc_args(expanded)
+    preprocessed = preprocess(compiler, parsed[0], parsed[1], msvc) if parsed else None
+    if preprocessed is None:
+        return subprocess.call([compiler] + args)
+
+    flags, _, output = parsed
+    key = get_key(compiler, flags, preprocessed)
+    stdout = cache.get(key, output)
+    if stdout is not None:
+        sys.stdout.buffer.write(stdout)
+        sys.stdout.flush()
+        return 0
+
+    process = subprocess.run([compiler] + args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    sys.stdout.buffer.write(process.stdout)
+    sys.stdout.flush()
+    if process.returncode == 0 and path.isfile(output):
+        cache.put(key, output, process.stdout)
+    return process.returncode
+
+
+def main(args=None):
+    """Runs a compiler through the cache
+    """
+    parser = argparse.ArgumentParser(description='Runs a compiler, caching the objects it builds')
+    parser.add_argument('--cache-dir', default=get_default_cache_dir(), help='The directory of the cache')
+    parser.add_argument('--max-size', type=int, default=DEFAULT_MAX_SIZE, help='The maximum size of the cache in MB')
+    parser.add_argument('compiler', help='The compiler to run')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help='The arguments of the compiler')
+    parsed_args = parser.parse_args(args)
+    return compile_cached(CompilerCache(parsed_args.cache_dir, parsed_args.max_size), parsed_args.compiler, parsed_args.args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
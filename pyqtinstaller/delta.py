@@ -0,0 +1,100 @@
+# pyqttoolkit
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""Delta
+
+This module defines delta packages, which contain the files of a release directory added or changed
+since a base release, a list of the files removed since it and, optionally, binary patches of large
+files. Patched files are left out of the package's files, the updater applies their patches to the
+installed files
+"""
+import os
+from os import path
+import json
+import shutil
+
+DELTA_FILENAME = 'delta.json'
+DELETIONS_FILENAME = 'deletions.txt'
+FILES_DIR = 'files'
+PATCHES_DIR = 'patches'
+# Extensions of the files which are worth patching rather than replacing
+PATCH_EXTENSIONS = ['.dll', '.pyd', '.exe']
+
+
+def create_delta(release_dir, current, base, delta_dir, patched=()):
+    """Creates the delta package from the `base` manifest to the `current` manifest of `release_dir` in `delta_dir`,
+    returning the `ManifestDiff` between them. The changed files `patched` are left out of the
+    package's files
+    """
+    if path.isdir(delta_dir):
+        shutil.rmtree(delta_dir)
+    diff = current.diff(base)
+    for relative_path in diff.added + [p for p in diff.changed if p not in patched]:
+        dest = path.join(delta_dir, FILES_DIR, *relative_path.split('/'))
+        if not path.isdir(path.dirname(dest)):
+            os.makedirs(path.dirname(dest))
+        shutil.copy2(path.join(release_dir, *relative_path.split('/')), dest)
+    if not path.isdir(delta_dir):
+        os.makedirs(delta_dir)
+    with open(path.join(delta_dir, DELETIONS_FILENAME), 'w') as fp:
+        fp.writelines(f'{p}\n' for p in diff.removed)
+    return diff
+
+
+def write_delta_description(delta_dir, current, base, diff, patches):
+    """Writes the versions and files of a delta package to its description
+    """
+    with open(path.join(delta_dir, DELTA_FILENAME), 'w') as fp:
+        json.dump({
+            'base_version': base.app_version,
+            'app_version': current.app_version,
+            'added': diff.added,
+            'changed': diff.changed,
+            'removed': diff.removed,
+            'patches': patches
+        }, fp, indent=2)
+
+
+def get_patch_candidates(diff, current, base, min_size):
+    """Gets the changed binaries of at least `min_size` bytes, which are patched rather than replaced
+    """
+    return [
+        p for p in diff.changed
+        if path.splitext(p)[1].lower() in PATCH_EXTENSIONS and min(current.entries[p].size, base.entries[p].size) >= min_size
+    ]
+
+
+def get_patch_filename(delta_dir, relative_path):
+    """Gets the binary patch of a file in a delta package
+    """
+    return path.join(delta_dir, PATCHES_DIR, *relative_path.split('/')) + '.patch'
+
+
+def store_objects(release_dir, manifest, objects_dir, min_size):
+    """Keeps copies of the binaries of `manifest` of at least `min_size` bytes in `objects_dir` by hash,
+    so that the next delta can patch them. Copies no longer in the manifest are removed
+    """
+    if not path.isdir(objects_dir):
+        os.makedirs(objects_dir)
+    hashes = set()
+    for relative_path, entry in manifest.entries.items():
+        if path.splitext(relative_path)[1].lower() in PATCH_EXTENSIONS and entry.size >= min_size:
+            hashes.add(entry.sha256)
+            if not path.isfile(path.join(objects_dir, entry.sha256)):
+                shutil.copyfile(path.join(release_dir, *relative_path.split('/')), path.join(objects_dir, entry.sha256))
+    for filename in sorted(os.listdir(objects_dir)):
+        if filename not in hashes:
+            os.remove(path.join(objects_dir, filename))
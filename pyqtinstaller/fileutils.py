@@ -0,0 +1,101 @@
+# pyqttoolkit
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""FileUtils
+
+This module defines helpers for writing the files generated by a build
+"""
+import os
+from os import path
+import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+
+def write_if_changed(filename, content):
+    """Writes `content` to `filename` unless the file already contains it, so that its modification
+    time is preserved for timestamp based tools. The file is replaced atomically. Returns whether
+    the file was written. The clean stage removes the build directory, so for files in it this only
+    saves work when a build is resumed or rebuilt by --watch
+    """
+    try:
+        with open(filename) as fp:
+            if fp.read() == content:
+                return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    temp_filename = f'{filename}.{os.getpid()}.tmp'
+    try:
+        with open(temp_filename, 'w') as fp:
+            fp.write(content)
+        os.replace(temp_filename, filename)
+    finally:
+        if path.exists(temp_filename):
+            os.remove(temp_filename)
+    return True
+
+
+def remove_tree_except(root, kept):
+    """Removes `root` and everything below it, except the files `kept` and the directories
+    containing them
+    """
+    kept = {path.normcase(path.abspath(f)) for f in kept}
+    prefix = path.normcase(path.abspath(root)) + os.sep
+    if not any(f.startswith(prefix) for f in kept):
+        shutil.rmtree(root)
+        return
+    for name in os.listdir(root):
+        filename = path.join(root, name)
+        if path.isdir(filename) and not path.islink(filename):
+            remove_tree_except(filename, kept)
+        elif path.normcase(path.abspath(filename)) not in kept:
+            os.remove(filename)
+
+
+def get_state_filename(state_dir, build_dir, name, extension='.json'):
+    """Gets the file in `state_dir` in which state `name` of the builds in `build_dir` is kept between builds
+    """
+    key = hashlib.sha1(path.abspath(build_dir).encode('utf8')).hexdigest()[:12]
+    return path.join(state_dir, f'{name}-{key}{extension}')
+
+
+def is_copy_current(source, dest):
+    """Whether `dest` is an up to date copy of `source`, as made by `shutil.copy2`,
+    judged by their size and modification time
+    """
+    try:
+        source_stat = os.stat(source)
+        dest_stat = os.stat(dest)
+    except OSError:
+        return False
+    return source_stat.st_size == dest_stat.st_size and source_stat.st_mtime_ns == dest_stat.st_mtime_ns
+
+
+def _copy_if_changed(source, dest):
+    if is_copy_current(source, dest):
+        return False
+    os.makedirs(path.dirname(dest), exist_ok=True)
+    shutil.copy2(source, dest)
+    return True
+
+
+def copy_files_if_changed(copies, jobs=None):
+    """Copies each `(source, dest)` of `copies` whose destination is missing or out of date,
+    using `jobs` threads. Returns the destinations that were copied
+    """
+    with ThreadPoolExecutor(max_workers=jobs or min(32, (os.cpu_count() or 1) + 4)) as executor:
+        copied = list(executor.map(lambda copy: _copy_if_changed(*copy), copies))
+    return [dest for (_, dest), was_copied in zip(copies, copied) if was_copied]
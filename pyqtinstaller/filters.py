@@ -0,0 +1,93 @@
+# pyqttoolkit
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""Filters
+
+This module defines the filters which leave files such as tests, documentation and type stubs out of
+the frozen package, the external packages and the resources of an application.
+
+Patterns are globs matched against paths relative to the directory being copied, using `/` separators:
+patterns ending with `/` match directories, by name at any depth unless they contain another `/`,
+other patterns containing `/` match the whole path and the rest match file names
+"""
+import os
+from os import path
+from fnmatch import fnmatch
+from collections import OrderedDict
+
+PRESETS = OrderedDict([
+    ('tests', ['tests/', 'test/', 'testing/', 'test_*.py', '*_test.py', 'conftest.py']),
+    ('docs', ['docs/', 'doc/', '*.rst', '*.md']),
+    ('examples', ['examples/', 'example/', 'samples/', 'demos/']),
+    ('stubs', ['*.pyi', 'py.typed']),
+    ('sources', ['*.c', '*.cpp', '*.h', '*.pyx', '*.pxd'])
+])
+
+
+def get_preset_patterns(presets):
+    """Gets the exclude patterns of the named presets
+    """
+    unknown = [p for p in presets if p not in PRESETS]
+    assert not unknown, f'Unknown exclude presets {", ".join(unknown)}, expected some of {", ".join(PRESETS)}'
+    return [pattern for preset in presets for pattern in PRESETS[preset]]
+
+
+def matches(pattern, relative_path, is_dir=False):
+    """Whether a file, or directory if `is_dir` is set, matches a pattern
+    """
+    parts = relative_path.split('/')
+    if pattern.endswith('/'):
+        directories = range(1, len(parts) + 1 if is_dir else len(parts))
+        if '/' in pattern[:-1]:
+            return any(fnmatch('/'.join(parts[:i]), pattern[:-1]) for i in directories)
+        return any(fnmatch(parts[i - 1], pattern[:-1]) for i in directories)
+    if '/' in pattern:
+        return fnmatch(relative_path, pattern)
+    return not is_dir and fnmatch(parts[-1], pattern)
+
+
+class PathFilter:
+    """PathFilter
+    Excludes the files and directories matching `exclude` patterns, unless they match `include` patterns
+    """
+    def __init__(self, exclude=(), include=()):
+        self.exclude = list(exclude)
+        self.include = list(include)
+
+    def is_excluded(self, relative_path, is_dir=False):
+        """Whether a path relative to the directory being filtered is excluded
+        """
+        relative_path = relative_path.replace(os.sep, '/')
+        return any(matches(p, relative_path, is_dir) for p in self.exclude)\
+            and not any(matches(p, relative_path, is_dir) for p in self.include)
+
+    def get_copytree_ignore(self, root, on_excluded=None, always=('__pycache__', '*.pyc'), isdir=path.isdir):
+        """Gets an `ignore` function for `shutil.copytree` of a directory below `root`, which also ignores
+        names matching `always`. `on_excluded` is called with each file or directory the filter excludes
+        """
+        def ignore(directory, names):
+            ignored = set()
+            for name in names:
+                if any(fnmatch(name, a) for a in always):
+                    ignored.add(name)
+                    continue
+                filename = path.join(directory, name)
+                if self.is_excluded(path.relpath(filename, root), isdir(filename)):
+                    ignored.add(name)
+                    if on_excluded:
+                        on_excluded(filename)
+            return ignored
+        return ignore
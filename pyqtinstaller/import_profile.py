@@ -0,0 +1,336 @@
+# pyqttoolkit
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""ImportProfile
+
+This module defines the import profile of an application, which records the time taken to import each module
+when the application starts under the host python, and the recommendations made from it of the modules to freeze
+and the modules to load lazily
+"""
+import os
+from os import path
+import json
+import tempfile
+import statistics
+import subprocess
+from collections import namedtuple, OrderedDict, defaultdict
+
+from .analysis import format_size
+
+PROFILE_VERSION = 1
+START_MARKER = 'pyqtinstaller-import-profile-start'
+END_MARKER = 'pyqtinstaller-import-profile-end'
+
+ModuleImport = namedtuple('ModuleImport', ['self_us', 'cumulative_us', 'parent', 'size', 'origin', 'extension'])
+ModuleImport.__doc__ = """The import of a module, taking `self_us` microseconds excluding the modules it imported
+and `cumulative_us` including them. `parent` is the module being imported when it was imported,
+or `None` if it was imported by the entrypoint. `origin` is one of application, stdlib, external or builtin
+"""
+
+Recommendation = namedtuple('Recommendation', ['action', 'module', 'time_us', 'reason'])
+
+# Runs the entrypoint, stopping once the `until` module has been imported or after `timeout` seconds.
+# Modules the profiler imports itself before the start marker, e.g. threading, are not profiled.
+# Interpreters without `-X importtime`, i.e. python 3.6, time the imports with a meta path finder
+# instead, which writes the same lines without the time taken to find each module
+_BOOTSTRAP = '''
+import os, sys, time, runpy, sysconfig, threading, importlib.util
+
+OUTPUT, ENTRYPOINT, MODULE, UNTIL, TIMEOUT = {args!r}
+STDLIB = sysconfig.get_paths()['stdlib']
+# Files of the modules whose imports were interrupted, as they are removed from sys.modules
+stopped = {{}}
+
+def finish():
+    sys.stderr.write({end_marker!r} + '\\n')
+    sys.stderr.flush()
+    modules = {{**stopped, **{{n: getattr(m, '__file__', None) for n, m in list(sys.modules.items())}}}}
+    import json
+    with open(OUTPUT, 'w') as fp:
+        json.dump({{'stdlib': STDLIB, 'modules': modules}}, fp)
+
+class StopProfile(BaseException):
+    pass
+
+class UntilFinder:
+    def find_spec(self, name, target_path=None, target=None):
+        if name != UNTIL:
+            return None
+        sys.meta_path.remove(self)
+        spec = importlib.util.find_spec(name)
+        exec_module = spec.loader.exec_module
+        def exec_and_stop(module):
+            exec_module(module)
+            stopped[name] = getattr(module, '__file__', None)
+            raise StopProfile()
+        spec.loader.exec_module = exec_and_stop
+        return spec
+
+class TimedLoader:
+    def __init__(self, loader):
+        self.loader = loader
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+    def create_module(self, spec):
+        create_module = getattr(self.loader, 'create_module', None)
+        return create_module(spec) if create_module else None
+
+    def exec_module(self, module):
+        depth = len(ImportTimer.children)
+        ImportTimer.children.append(0)
+        start = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            cumulative = int((time.perf_counter() - start) * 1000000)
+            children = ImportTimer.children.pop()
+            if ImportTimer.children:
+                ImportTimer.children[-1] += cumulative
+            module.__loader__ = module.__spec__.loader = self.loader
+        os.write(2, 'import time: {{:9d}} | {{:10d}} | {{}}{{}}\\n'.format(
+            cumulative - children, cumulative, '  ' * depth, module.__name__
+        ).encode('utf8'))
+
+class ImportTimer:
+    # The cumulative time of the modules imported by each module being imported
+    children = []
+
+    def find_spec(self, name, target_path=None, target=None):
+        for finder in sys.meta_path[sys.meta_path.index(self) + 1:]:
+            find_spec = getattr(finder, 'find_spec', None)
+            spec = find_spec(name, target_path, target) if find_spec else None
+            if spec is not None:
+                break
+        else:
+            return None
+        if hasattr(spec.loader, 'exec_module'):
+            spec.loader = TimedLoader(spec.loader)
+        return spec
+
+def timed_out():
+    finish()
+    sys.stderr.flush()
+    os._exit(0)
+
+if sys.version_info < (3, 7) or 'importtime' not in sys._xoptions:
+    sys.meta_path.insert(0, ImportTimer())
+if UNTIL:
+    sys.meta_path.insert(0, UntilFinder())
+timer = threading.Timer(TIMEOUT, timed_out)
+timer.daemon = True
+timer.start()
+sys.stderr.write({start_marker!r} + '\\n')
+sys.stderr.flush()
+try:
+    if MODULE:
+        runpy.run_module(MODULE, run_name='__main__', alter_sys=True)
+    else:
+        sys.argv = [ENTRYPOINT]
+        runpy.run_path(ENTRYPOINT, run_name='__main__')
+except (StopProfile, SystemExit):
+    pass
+finish()
+sys.stderr.flush()
+os._exit(0)
+'''
+
+
+def parse_importtime(output):
+    """Parses the `-X importtime` lines written between the start and end markers,
+    returning `(self_us, cumulative_us, parent)` by module in import order
+    """
+    lines = output.splitlines()
+    if START_MARKER in lines:
+        lines = lines[lines.index(START_MARKER) + 1:]
+    if END_MARKER in lines:
+        lines = lines[:lines.index(END_MARKER)]
+    imports = OrderedDict()
+    pending = defaultdict(list)
+    for line in lines:
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        depth = (len(parts[2]) - len(parts[2].lstrip()) - 1) // 2
+        # Modules are written once imported, after the modules they imported
+        for child in pending.pop(depth + 1, []):
+            imports[child][2] = name
+        pending[depth].append(name)
+        imports[name] = [int(parts[0]), int(parts[1]), None]
+    return OrderedDict((name, tuple(i)) for name, i in imports.items())
+
+
+def get_origin(name, filename, package, package_dir, stdlib_dir):
+    """Classifies the module `name` loaded from `filename` as application, stdlib, external or builtin
+    """
+    if name.split('.')[0] == package:
+        return 'application'
+    if not filename or not path.isfile(filename):
+        return 'builtin'
+    filename = path.normcase(path.abspath(filename))
+    if filename.startswith(path.normcase(path.abspath(package_dir)) + os.sep):
+        return 'application'
+    if 'site-packages' in filename.split(os.sep) or 'dist-packages' in filename.split(os.sep):
+        return 'external'
+    if filename.startswith(path.normcase(path.abspath(stdlib_dir)) + os.sep):
+        return 'stdlib'
+    return 'external'
+
+
+def get_run_command(python, entrypoint, package, until, timeout, output):
+    """Gets the command which profiles the imports of `entrypoint`, writing the modules it loaded to `output`
+    """
+    entrypoint_path = path.normpath(entrypoint)
+    module = None
+    if entrypoint_path.startswith(path.normpath(package) + os.sep):
+        # Entrypoints within the package are run as modules, so that relative imports work
+        module = path.splitext(entrypoint_path)[0].replace(os.sep, '.')
+        module = module[:-len('.__main__')] if module.endswith('.__main__') else module
+    args = (output, path.abspath(entrypoint), module, until, timeout)
+    return [python, '-X', 'importtime', '-c', _BOOTSTRAP.format(args=args, start_marker=START_MARKER, end_marker=END_MARKER)]
+
+
+def run_profile(python, entrypoint, package, until=None, timeout=10.0, env=None):
+    """Starts the application once, returning its imports as `ModuleImport`s by module name
+    """
+    handle, output = tempfile.mkstemp(suffix='.json')
+    os.close(handle)
+    try:
+        env = {
+            **os.environ,
+            'QT_QPA_PLATFORM': 'offscreen',
+            'PYTHONPATH': os.pathsep.join([path.abspath('.'), os.environ.get('PYTHONPATH', '')]),
+            **(env or {})
+        }
+        process = subprocess.run(
+            get_run_command(python, entrypoint, package, until, timeout, output),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            env=env,
+            timeout=timeout + 60
+        )
+        with open(output) as fp:
+            loaded = json.load(fp)
+    except ValueError:
+        raise AssertionError(f'{entrypoint} did not start:\n{process.stderr.decode("utf8", "replace")}')
+    finally:
+        os.remove(output)
+
+    imports = OrderedDict()
+    for name, (self_us, cumulative_us, parent) in parse_importtime(process.stderr.decode('utf8', 'replace')).items():
+        filename = loaded['modules'].get(name)
+        size = path.getsize(filename) if filename and path.isfile(filename) else 0
+        imports[name] = ModuleImport(
+            self_us,
+            cumulative_us,
+            parent,
+            size,
+            get_origin(name, filename, package, package, loaded['stdlib']),
+            bool(filename) and path.splitext(filename)[1].lower() in ['.pyd', '.so']
+        )
+    return imports
+
+
+def merge_runs(runs):
+    """Merges the imports of several runs, using the median times of each module so that profiles are comparable
+    """
+    merged = OrderedDict()
+    for name, module_import in runs[-1].items():
+        times = [r[name] for r in runs if name in r]
+        merged[name] = module_import._replace(
+            self_us=int(statistics.median(t.self_us for t in times)),
+            cumulative_us=int(statistics.median(t.cumulative_us for t in times))
+        )
+    return merged
+
+
+def get_total_us(imports):
+    """Gets the total import time of a profile
+    """
+    return sum(i.self_us for i in imports.values())
+
+
+def get_package_times(imports):
+    """Gets the import time, number of modules, size and origin of each top level package,
+    ordered from slowest to fastest
+    """
+    packages = OrderedDict()
+    for name, module_import in imports.items():
+        top_level = name.split('.')[0]
+        time_us, modules, size, _, extension = packages.get(top_level, (0, 0, 0, None, False))
+        packages[top_level] = (
+            time_us + module_import.self_us,
+            modules + 1,
+            size + module_import.size,
+            module_import.origin if top_level == name or top_level not in packages else packages[top_level][3],
+            extension or module_import.extension
+        )
+    return OrderedDict(sorted(packages.items(), key=lambda item: item[1][0], reverse=True))
+
+
+def get_recommendations(imports, compiled_packages, stdlib_modules, freeze_threshold_us, lazy_threshold_us):
+    """Recommends the external packages to move into `compiled_packages`, the stdlib modules to add to
+    `stdlib_modules` and the modules the application should import lazily
+    """
+    recommendations = []
+    for package, (time_us, modules, size, origin, extension) in get_package_times(imports).items():
+        if origin == 'external' and not extension and package not in compiled_packages and time_us >= freeze_threshold_us:
+            recommendations.append(Recommendation(
+                'compiled_packages', package, time_us, f'{modules} pure python modules, {format_size(size)}'
+            ))
+        elif origin == 'stdlib' and not extension and package not in stdlib_modules:
+            recommendations.append(Recommendation(
+                'stdlib_modules', package, time_us, 'imported at startup'
+            ))
+
+    for name, module_import in imports.items():
+        parent = imports.get(module_import.parent)
+        imported_by_application = module_import.parent is None or (parent and parent.origin == 'application')
+        if imported_by_application and module_import.origin != 'application'\
+                and module_import.cumulative_us >= lazy_threshold_us:
+            recommendations.append(Recommendation(
+                'lazy', name, module_import.cumulative_us, f'imported by {module_import.parent or "the entrypoint"}'
+            ))
+    return sorted(recommendations, key=lambda r: (r.action, -r.time_us))
+
+
+def save_profile(filename, imports, previous_filename=None):
+    """Saves a profile, keeping the profile it replaces as `previous_filename`
+    """
+    directory = path.dirname(filename)
+    if directory and not path.isdir(directory):
+        os.makedirs(directory)
+    if previous_filename and path.isfile(filename):
+        os.replace(filename, previous_filename)
+    with open(filename, 'w') as fp:
+        json.dump({'version': PROFILE_VERSION, 'modules': imports}, fp)
+
+
+def load_profile(filename):
+    """Loads a profile, returning `None` if it doesn't exist or is from another version
+    """
+    try:
+        with open(filename) as fp:
+            content = json.load(fp)
+    except (OSError, ValueError):
+        return None
+    if content.get('version') != PROFILE_VERSION:
+        return None
+    return OrderedDict((n, ModuleImport(*i)) for n, i in content['modules'].items())
@@ -0,0 +1,135 @@
+# pyqttoolkit
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""Manifest
+
+This module defines the manifest of a release directory, which records the size, modification time
+and hash of every file so that other stages and post build steps can detect changes
+"""
+import os
+from os import path
+import json
+import mmap
+import hashlib
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+MANIFEST_FILENAME = 'manifest.json'
+MANIFEST_VERSION = 1
+# Files at least this large are hashed from a memory map rather than read in chunks
+MMAP_THRESHOLD = 1024 * 1024
+_CHUNK_SIZE = 1024 * 1024
+
+ManifestEntry = namedtuple('ManifestEntry', ['size', 'mtime_ns', 'sha256'])
+
+ManifestDiff = namedtuple('ManifestDiff', ['added', 'changed', 'removed'])
+ManifestDiff.__doc__ = """The paths of the files added, changed and removed between two manifests
+"""
+
+
+def hash_file(filename, size):
+    """Gets the sha256 of a file of `size` bytes
+    """
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as fp:
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+        else:
+            for chunk in iter(lambda: fp.read(_CHUNK_SIZE), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """Manifest
+    The entries of a directory's files by path relative to it, using `/` separators,
+    and the version of the application the directory was built for, if known
+    """
+    def __init__(self, entries=None, app_version=None):
+        self.entries = OrderedDict(entries or {})
+        self.app_version = app_version
+
+    @classmethod
+    def create(cls, root, cached=None, jobs=None):
+        """Creates the manifest of `root`, hashing files in parallel with `jobs` threads.
+        Hashes are reused from the `cached` manifest for files whose size and modification time are unchanged
+        """
+        cached = cached or cls()
+        entries = OrderedDict()
+        to_hash = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                full_path = path.join(dirpath, filename)
+                relative_path = path.relpath(full_path, root).replace(path.sep, '/')
+                stat = os.stat(full_path)
+                cached_entry = cached.entries.get(relative_path)
+                if cached_entry and (cached_entry.size, cached_entry.mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+                    entries[relative_path] = cached_entry
+                else:
+                    entries[relative_path] = None
+                    to_hash.append((relative_path, full_path, stat))
+
+        if to_hash:
+            with ThreadPoolExecutor(max_workers=jobs or min(32, (os.cpu_count() or 1) + 4)) as executor:
+                hashes = executor.map(lambda item: hash_file(item[1], item[2].st_size), to_hash)
+                for (relative_path, _, stat), sha256 in zip(to_hash, hashes):
+                    entries[relative_path] = ManifestEntry(stat.st_size, stat.st_mtime_ns, sha256)
+        return cls(entries)
+
+    @classmethod
+    def load(cls, filename):
+        """Loads a manifest, returning an empty manifest if it doesn't exist or is from another version
+        """
+        try:
+            with open(filename) as fp:
+                content = json.load(fp)
+        except (OSError, ValueError):
+            return cls()
+        if content.get('version') != MANIFEST_VERSION:
+            return cls()
+        return cls(((p, ManifestEntry(*e)) for p, e in content['files'].items()), content.get('app_version'))
+
+    def save(self, filename):
+        """Saves the manifest atomically in a compact form
+        """
+        directory = path.dirname(filename)
+        if directory and not path.isdir(directory):
+            os.makedirs(directory)
+        temp_filename = f'{filename}.{os.getpid()}.tmp'
+        with open(temp_filename, 'w') as fp:
+            json.dump(
+                {'version': MANIFEST_VERSION, 'app_version': self.app_version, 'files': self.entries},
+                fp,
+                separators=(',', ':')
+            )
+        os.replace(temp_filename, filename)
+
+    def get_hash(self, relative_path):
+        """Gets the sha256 of a file, or `None` if it isn't in the manifest
+        """
+        entry = self.entries.get(relative_path)
+        return entry.sha256 if entry else None
+
+    def diff(self, previous):
+        """Gets the files added, changed and removed since the `previous` manifest
+        """
+        return ManifestDiff(
+            [p for p in self.entries if p not in previous.entries],
+            [p for p, e in self.entries.items() if p in previous.entries and previous.entries[p].sha256 != e.sha256],
+            [p for p in previous.entries if p not in self.entries]
+        )
@@ -0,0 +1,172 @@
+# pyqttoolkit
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""Matrix
+
+This module defines the matrix runner, which builds several configurations of an application
+from a single manifest, running the stages they have in common only once.
+
+A manifest is an ini file with a section per configuration, containing the "compile" options
+that differ from the base configuration. Options in the `DEFAULT` section apply to every configuration.
+"""
+import os
+from os import path
+import sys
+import configparser
+import multiprocessing
+import traceback
+from collections import OrderedDict
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+MATRIX_OPTIONS = ['matrix', 'matrix_jobs', 'matrix_memory_limit', 'watch']
+
+
+def load_manifest(filename):
+    """Loads a matrix manifest, returning the options of each configuration by name
+    """
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.optionxform = lambda option: option.replace('-', '_')
+    assert parser.read(filename), f'Could not read matrix manifest {filename}'
+    assert parser.sections(), f'Matrix manifest {filename} does not define any configurations'
+    return OrderedDict((name, dict(parser.items(name))) for name in parser.sections())
+
+
+def get_configurations(base_options, manifest, build_dir):
+    """Merges the base options with the options of each configuration in the manifest
+    Each configuration builds in its own workspace under `build_dir` unless it sets `build_dir` itself
+    """
+    configurations = OrderedDict()
+    for name, options in manifest.items():
+        configuration = {k: v for k, v in base_options.items() if k not in MATRIX_OPTIONS}
+        configuration.update(options)
+        if 'build_dir' not in options:
+            configuration['build_dir'] = path.join(build_dir, name)
+        configuration['workspace'] = True
+        configuration['no_build_server'] = True
+        configurations[name] = configuration
+    build_dirs = [path.normpath(c['build_dir']) for c in configurations.values()]
+    assert len(set(build_dirs)) == len(build_dirs), 'Matrix configurations must use different build directories'
+    return configurations
+
+
+def create_command(options):
+    """Creates a finalized compile command from its raw options
+    """
+    from setuptools import Distribution
+    from .compile_command import CompileCommand
+    command = CompileCommand(Distribution())
+    for name, value in options.items():
+        setattr(command, name, value)
+    command.ensure_finalized()
+    return command
+
+
+def _limit_resources(memory_limit):
+    if memory_limit and resource:
+        limit = memory_limit * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _build_configuration(task):
+    cwd, name, options, shared_stages, log_filename = task
+    try:
+        with open(log_filename, 'w') as log:
+            os.dup2(log.fileno(), 1)
+            os.dup2(log.fileno(), 2)
+            try:
+                os.chdir(cwd)
+                command = create_command(options)
+                command.shared_stages = shared_stages
+                command.run()
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+        return name, None
+    except Exception: #pylint: disable=broad-except
+        return name, traceback.format_exc()
+
+
+class MatrixRunner:
+    """MatrixRunner
+    Builds a set of configurations, first running the stages they share once per distinct set of inputs,
+    then building the configurations in a pool of `jobs` worker processes, each limited to
+    `memory_limit` MB of address space where the platform supports it
+    """
+    def __init__(self, configurations, shared_dir, jobs=None, memory_limit=None):
+        self.configurations = configurations
+        self.shared_dir = shared_dir
+        self.jobs = jobs or os.cpu_count() or 1
+        self.memory_limit = memory_limit
+
+    def run(self):
+        """Builds every configuration, raising if any of them fail
+        """
+        os.makedirs(self.shared_dir, exist_ok=True)
+        commands = OrderedDict((name, create_command(options)) for name, options in self.configurations.items())
+        shared_stages = self.run_shared_stages(commands)
+
+        log_dir = path.dirname(self.shared_dir)
+        tasks = [
+            (os.getcwd(), name, options, shared_stages[name], path.join(log_dir, f'{name}.log'))
+            for name, options in self.configurations.items()
+        ]
+        if self.memory_limit and not resource:
+            sys.stdout.write('Memory limits are not supported on this platform and will be ignored\n')
+        failed = []
+        pool = multiprocessing.Pool(
+            processes=min(self.jobs, len(tasks)),
+            initializer=_limit_resources,
+            initargs=(self.memory_limit,),
+            maxtasksperchild=1
+        )
+        try:
+            for name, error in pool.imap_unordered(_build_configuration, tasks):
+                log_filename = path.join(log_dir, f'{name}.log')
+                if error:
+                    failed.append(name)
+                    sys.stdout.write(f'{name} failed, see {log_filename} for details\n{error}\n')
+                else:
+                    sys.stdout.write(f'{name} succeeded, see {log_filename} for details\n')
+        finally:
+            pool.close()
+            pool.join()
+        assert not failed, 'Matrix configurations failed: {}'.format(', '.join(failed))
+
+    def run_shared_stages(self, commands):
+        """Runs each shared stage once per distinct set of inputs
+        Returns the results of the shared stages for each configuration
+        """
+        shared_stages = OrderedDict((name, {}) for name in commands)
+        stage_names = []
+        for command in commands.values():
+            stage_names += [s for s in command.get_shared_stage_keys() if s not in stage_names]
+        for stage in stage_names:
+            groups = OrderedDict()
+            for name, command in commands.items():
+                key = command.get_shared_stage_keys().get(stage)
+                if key is not None:
+                    groups.setdefault(key, []).append(name)
+            for index, names in enumerate(groups.values()):
+                sys.stdout.write('Running shared stage {} for {}\n'.format(stage, ', '.join(names)))
+                stage_dir = path.join(self.shared_dir, f'{stage}-{index}')
+                result = commands[names[0]].run_shared_stage(stage, stage_dir)
+                for name in names:
+                    shared_stages[name][stage] = result
+        return shared_stages
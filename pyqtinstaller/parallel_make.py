@@ -0,0 +1,157 @@
+# pyqttoolkit
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""ParallelMake
+
+This module reads the compiler invocations for each object of a qmake generated Makefile,
+so that they can be run in parallel when the build tool can only run one compiler at a time
+"""
+import os
+from os import path
+import re
+from collections import namedtuple
+
+_VARIABLE = re.compile(r'^([A-Za-z_][A-Za-z0-9_]*)\s*=(.*)$')
+# Targets are separated from their prerequisites by a colon that isn't part of a drive letter
+_RULE_SEPARATOR = re.compile(r'::?(?=\s|$)')
+_HEADER_EXTENSIONS = ['.h', '.hh', '.hpp', '.hxx']
+_REFERENCE = re.compile(r'\$\(([A-Za-z_][A-Za-z0-9_]*)\)')
+_COMPILERS = {
+    '.c': ('CC', 'CFLAGS'),
+    '.cpp': ('CXX', 'CXXFLAGS'),
+    '.cc': ('CXX', 'CXXFLAGS'),
+    '.cxx': ('CXX', 'CXXFLAGS')
+}
+
+CompileJob = namedtuple('CompileJob', ['source', 'object', 'cmd', 'depends'])
+CompileJob.__doc__ = """The compiler invocation building `object` from `source`.
+`depends` are the prerequisites of the object's rule in the makefile, e.g. the headers qmake found
+it includes, or `None` if it has no rule
+"""
+
+
+def get_makefile(build_dir):
+    """Gets the makefile containing the compiler settings of a qmake build directory
+    """
+    release_makefile = path.join(build_dir, 'Makefile.Release')
+    return release_makefile if path.isfile(release_makefile) else path.join(build_dir, 'Makefile')
+
+
+def _read_makefile_lines(filename):
+    with open(filename) as fp:
+        return re.sub(r'\\\r?\n', ' ', fp.read()).splitlines()
+
+
+def _normalize(filename):
+    return path.normpath(filename.strip('"').replace('\\', '/'))
+
+
+def read_makefile_variables(filename):
+    """Reads the variable definitions of a makefile, joining continued lines
+    """
+    lines = _read_makefile_lines(filename)
+    variables = {}
+    for line in lines:
+        if line.startswith('\t') or line.lstrip().startswith('#'):
+            continue
+        match = _VARIABLE.match(line.strip())
+        if match:
+            variables[match.group(1)] = match.group(2).strip()
+    return variables
+
+
+def read_makefile_rules(filename, variables):
+    """Reads the prerequisites of each target of a makefile's rules,
+    expanding the references to `variables`
+    """
+    rules = {}
+    for line in _read_makefile_lines(filename):
+        if line.startswith('\t') or line.lstrip().startswith('#') or _VARIABLE.match(line.strip()):
+            continue
+        parts = _RULE_SEPARATOR.split(line, 1)
+        if len(parts) != 2:
+            continue
+        prerequisites = expand(parts[1], variables).split()
+        for target in expand(parts[0], variables).split():
+            rules.setdefault(_normalize(target), []).extend(prerequisites)
+    return rules
+
+
+def expand(value, variables, depth=0):
+    """Expands the `$(NAME)` references of `value`, undefined variables expand to nothing
+    """
+    assert depth < 32, f'Makefile variables are recursive: {value}'
+    return _REFERENCE.sub(lambda m: expand(variables.get(m.group(1), ''), variables, depth + 1), value)
+
+
+def _get_output_flag(compiler):
+    # The compiler is the last word, after any launcher such as the compiler cache
+    name = path.splitext(path.basename(compiler.split()[-1].strip('"').replace('\\', '/')))[0].lower()
+    return '-Fo' if name == 'cl' else '-o '
+
+
+def get_compile_jobs(filename):
+    """Gets the compiler invocation building each object of the makefile, relative to the makefile's directory
+    Objects are matched to sources by name using the makefile's `OBJECTS` list
+    """
+    variables = read_makefile_variables(filename)
+    rules = read_makefile_rules(filename, variables)
+    objects = {
+        path.splitext(path.basename(o.replace('\\', '/')))[0]: o
+        for o in expand(variables.get('OBJECTS', ''), variables).split()
+    }
+    includes = expand(variables.get('INCPATH', ''), variables)
+    jobs = []
+    for source in expand(variables.get('SOURCES', ''), variables).split():
+        name, extension = path.splitext(path.basename(source.replace('\\', '/')))
+        if extension.lower() not in _COMPILERS or name not in objects:
+            continue
+        compiler_variable, flags_variable = _COMPILERS[extension.lower()]
+        compiler = expand(variables.get(compiler_variable, ''), variables)
+        flags = expand(variables.get(flags_variable, ''), variables)
+        cmd = f'{compiler} -c {flags} {includes} {_get_output_flag(compiler)}{objects[name]} {source}'
+        depends = rules.get(_normalize(objects[name]))
+        depends = [_normalize(d) for d in depends] if depends else None
+        jobs.append(CompileJob(source, objects[name], cmd, depends))
+    return jobs
+
+
+def get_newest_header(build_dir):
+    """Gets the modification time of the most recently modified header of `build_dir`,
+    or 0 if it has none
+    """
+    newest = 0
+    for dirpath, _, filenames in os.walk(build_dir):
+        for filename in filenames:
+            if path.splitext(filename)[1].lower() in _HEADER_EXTENSIONS:
+                newest = max(newest, os.stat(path.join(dirpath, filename)).st_mtime_ns)
+    return newest
+
+
+def is_up_to_date(job, build_dir, newest_header=0):
+    """Whether the object of `job` is newer than its source and the files it depends on.
+    Objects without a rule in the makefile must also be newer than `newest_header`,
+    as the headers they include are unknown
+    """
+    try:
+        object_mtime = os.stat(path.join(build_dir, job.object)).st_mtime_ns
+        inputs = [job.source] + (job.depends or [])
+        newest_input = max(os.stat(path.join(build_dir, f)).st_mtime_ns for f in inputs)
+    except OSError:
+        return False
+    if job.depends is None:
+        newest_input = max(newest_input, newest_header)
+    return object_mtime >= newest_input
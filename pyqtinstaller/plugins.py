@@ -0,0 +1,152 @@
+# pyqttoolkit
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""Plugins
+
+This module defines the selection of the Qt plugins deployed with an application, derived from the Qt modules
+it uses and the QML modules it imports, and the pruning of the plugins and translations that windeployqt deploys
+beyond them.
+
+Plugins are given as `<type>` for every plugin of a type or `<type>/<name>` for a single plugin,
+e.g. `sqldrivers` or `imageformats/qjpeg`
+"""
+import os
+from os import path
+import re
+from collections import OrderedDict
+
+# The plugins each module needs, those of types with many optional plugins are limited to the common ones
+MODULE_PLUGINS = OrderedDict([
+    ('QtGui', ['platforms/qwindows', 'imageformats/qgif', 'imageformats/qico', 'imageformats/qjpeg']),
+    ('QtWidgets', ['styles/qwindowsvistastyle']),
+    ('QtSvg', ['imageformats/qsvg', 'iconengines/qsvgicon']),
+    ('QtSql', ['sqldrivers/qsqlite']),
+    ('QtNetwork', ['bearer']),
+    ('QtMultimedia', ['audio', 'mediaservice', 'playlistformats']),
+    ('QtPrintSupport', ['printsupport']),
+    ('QtPositioning', ['position']),
+    ('QtLocation', ['geoservices']),
+    ('QtSensors', ['sensors', 'sensorgestures']),
+    ('QtSerialBus', ['canbus']),
+    ('QtQuick', ['scenegraph']),
+    ('QtTextToSpeech', ['texttospeech']),
+    ('QtGamepad', ['gamepads']),
+    ('Qt3DRender', ['sceneparsers', 'renderplugins', 'geometryloaders']),
+    ('QtVirtualKeyboard', ['platforminputcontexts', 'virtualkeyboard'])
+])
+
+# The plugin directories windeployqt may deploy, other directories of the release are never pruned
+PLUGIN_TYPES = sorted({p.split('/')[0] for plugins in MODULE_PLUGINS.values() for p in plugins} | {
+    'accessible', 'generic', 'iconengines', 'platforminputcontexts', 'platformthemes', 'qmltooling', 'webview'
+})
+
+# QML modules whose plugins belong to a Qt module of a different name
+QML_IMPORT_MODULES = {'Qt3D.Render': 'Qt3DRender', 'QtQuick.VirtualKeyboard': 'QtVirtualKeyboard'}
+
+_QML_IMPORT = re.compile(r'^\s*import\s+([A-Za-z_][\w.]*)\s+\d', re.MULTILINE)
+_QT_TRANSLATION = re.compile(r'^qt[a-z]*_([a-z]{2,3}(?:_[A-Za-z]{2,4})?)\.qm$')
+
+
+def get_qml_imports(filenames):
+    """Gets the QML modules imported by the QML files `filenames`, ignoring directory imports
+    """
+    imports = set()
+    for filename in filenames:
+        with open(filename, encoding='utf8') as fp:
+            imports.update(_QML_IMPORT.findall(fp.read()))
+    return sorted(imports)
+
+
+def get_plugin_modules(qt_modules, qml_imports=()):
+    """Gets the Qt modules whose plugins are needed by an application using `qt_modules` and importing `qml_imports`
+    """
+    modules = {'QtGui'} | set(qt_modules)
+    for qml_import in qml_imports:
+        module = qml_import.split('.')[0]
+        for prefix, qml_module in QML_IMPORT_MODULES.items():
+            if qml_import.startswith(prefix):
+                module = qml_module
+        modules.add(module)
+    return sorted(modules)
+
+
+def get_plugin_selection(modules, additional=()):
+    """Gets the plugins to deploy for `modules` and the `additional` plugins, as a dict of plugin type
+    to the names of its plugins, or `None` where every plugin of the type is deployed
+    """
+    selection = {}
+    for plugin in [p for m in modules for p in MODULE_PLUGINS.get(m, [])] + list(additional):
+        plugin_type, _, name = plugin.partition('/')
+        if not name:
+            selection[plugin_type] = None
+        elif selection.get(plugin_type, set()) is not None:
+            selection.setdefault(plugin_type, set()).add(name)
+    return selection
+
+
+def is_plugin_selected(selection, plugin_type, filename):
+    """Whether the plugin `filename` of `plugin_type` is deployed by `selection`
+    """
+    if plugin_type not in selection:
+        return False
+    return selection[plugin_type] is None or path.splitext(filename)[0] in selection[plugin_type]
+
+
+def _remove(filename, removed):
+    removed.append((filename, os.stat(filename).st_size))
+    os.remove(filename)
+
+
+def prune_plugins(root, selection):
+    """Removes the plugins deployed to `root` which are not in `selection`,
+    returning the `(filename, size)` of each file removed
+    """
+    removed = []
+    for plugin_type in sorted(os.listdir(root)):
+        plugin_dir = path.join(root, plugin_type)
+        if plugin_type not in PLUGIN_TYPES or not path.isdir(plugin_dir):
+            continue
+        for name in sorted(os.listdir(plugin_dir)):
+            if path.isfile(path.join(plugin_dir, name)) and not is_plugin_selected(selection, plugin_type, name):
+                _remove(path.join(plugin_dir, name), removed)
+        if not os.listdir(plugin_dir):
+            os.rmdir(plugin_dir)
+    return removed
+
+
+def is_language_used(code, languages):
+    """Whether the translation for language `code`, e.g. `pt_BR`, is used by an application translated to `languages`.
+    Languages without a region use the translations of every region and vice versa
+    """
+    code = code.lower().replace('-', '_')
+    for language in [l.lower().replace('-', '_') for l in languages]:
+        if code == language or code.split('_')[0] == language or code == language.split('_')[0]:
+            return True
+    return False
+
+
+def prune_translations(translations_dir, languages):
+    """Removes the Qt translations in `translations_dir` of languages other than `languages`,
+    returning the `(filename, size)` of each file removed
+    """
+    removed = []
+    if not path.isdir(translations_dir):
+        return removed
+    for name in sorted(os.listdir(translations_dir)):
+        match = _QT_TRANSLATION.match(name)
+        if match and not is_language_used(match.group(1), languages):
+            _remove(path.join(translations_dir, name), removed)
+    return removed
@@ -0,0 +1,152 @@
+# pyqttoolkit
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""Process
+
+This module defines the asynchronous runner used to call the external tools of a build
+"""
+import asyncio
+from asyncio.subprocess import PIPE, STDOUT
+import codecs
+import os
+from os import path
+import sys
+import time
+from collections import namedtuple
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+ToolResult = namedtuple('ToolResult', ['cmd', 'returncode', 'duration', 'rusage', 'timed_out', 'log_filename'])
+ToolResult.__doc__ = """The outcome of running a tool
+`rusage` is the resource usage of child processes while the tool ran, or `None` where unsupported.
+When tools run concurrently it includes the usage of every tool that finished in that time
+"""
+
+
+def _get_children_usage():
+    if not resource:
+        return None
+    return resource.getrusage(resource.RUSAGE_CHILDREN)
+
+
+def _get_usage_delta(before, after):
+    if not before or not after:
+        return None
+    return {
+        'user_time': after.ru_utime - before.ru_utime,
+        'system_time': after.ru_stime - before.ru_stime,
+        'max_rss': after.ru_maxrss
+    }
+
+
+async def _copy_output(stream, log, tee):
+    decoder = codecs.getincrementaldecoder('utf8')('replace')
+    while True:
+        chunk = await stream.read(64 * 1024)
+        if not chunk:
+            return
+        if log:
+            log.write(chunk)
+        if tee:
+            sys.stdout.write(decoder.decode(chunk))
+            sys.stdout.flush()
+
+
+async def _communicate(process, log, tee):
+    await _copy_output(process.stdout, log, tee)
+    return await process.wait()
+
+
+async def run_tool(cmd, log_filename=None, tee=True, timeout=None, **kwargs):
+    """Runs `cmd`, a sequence of arguments or a command line, with its output written to `log_filename`
+    and, if `tee` is set, to the console. The tool is killed if it runs for longer than `timeout` seconds.
+    Additional keyword arguments (e.g. `cwd` and `env`) are passed on to the subprocess
+    """
+    if log_filename and not path.isdir(path.dirname(path.abspath(log_filename))):
+        os.makedirs(path.dirname(path.abspath(log_filename)))
+    usage_before = _get_children_usage()
+    start = time.monotonic()
+    if isinstance(cmd, str):
+        process = await asyncio.create_subprocess_shell(cmd, stdout=PIPE, stderr=STDOUT, **kwargs)
+    else:
+        process = await asyncio.create_subprocess_exec(*cmd, stdout=PIPE, stderr=STDOUT, **kwargs)
+    log = open(log_filename, 'ab') if log_filename else None
+    timed_out = False
+    try:
+        returncode = await asyncio.wait_for(_communicate(process, log, tee), timeout)
+    except asyncio.TimeoutError:
+        timed_out = True
+        process.kill()
+        returncode = await process.wait()
+    finally:
+        if log:
+            log.close()
+    return ToolResult(
+        cmd,
+        returncode,
+        time.monotonic() - start,
+        _get_usage_delta(usage_before, _get_children_usage()),
+        timed_out,
+        log_filename
+    )
+
+
+async def _run_limited(semaphore, call):
+    async with semaphore:
+        return await call
+
+
+async def run_tools(*calls, limit=None):
+    """Runs several `run_tool` coroutines concurrently, at most `limit` at a time,
+    returning their results in order
+    """
+    if limit:
+        semaphore = asyncio.Semaphore(limit)
+        calls = [_run_limited(semaphore, c) for c in calls]
+    return list(await asyncio.gather(*calls))
+
+
+def run_sync(coroutine):
+    """Runs `coroutine` to completion on a new event loop
+    """
+    # Subprocesses are only supported by the proactor event loop on windows
+    loop = asyncio.ProactorEventLoop() if sys.platform == 'win32' else asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+def check_result(result: ToolResult):
+    """Asserts that a tool ran successfully
+    """
+    cmd = result.cmd if isinstance(result.cmd, str) else ' '.join(result.cmd)
+    details = f'see {result.log_filename} for details' if result.log_filename else 'see output for details'
+    assert not result.timed_out, f'{cmd} timed out after {result.duration:.0f}s - {details}'
+    assert not result.returncode, f'{cmd} exited with code {result.returncode} - {details}'
+
+
+def assert_call(cmd, log_filename=None, tee=True, timeout=None, **kwargs):
+    """Runs `cmd` using `run_tool`, asserting that it succeeded
+    """
+    result = run_sync(run_tool(cmd, log_filename, tee, timeout, **kwargs))
+    check_result(result)
+    return result
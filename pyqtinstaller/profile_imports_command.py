@@ -0,0 +1,158 @@
+# pyqttoolkit
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""ProfileImportsCommand
+
+This module defines the profile_imports command, which profiles the imports of an application as it starts
+and recommends the modules to freeze and the modules to load lazily
+"""
+import sys
+from os import path
+
+from setuptools import Command
+
+from .import_profile import (
+    run_profile, merge_runs, get_total_us, get_package_times, get_recommendations, save_profile, load_profile
+)
+from .fileutils import get_state_filename
+from .analysis import format_size
+from .timings import DEFAULT_DATABASE
+
+_RECOMMENDATIONS = {
+    'compiled_packages': 'Freeze in compiled_packages',
+    'stdlib_modules': 'Freeze in stdlib_modules',
+    'lazy': 'Import lazily'
+}
+
+
+def _format_ms(time_us):
+    return f'{time_us / 1000:.1f}ms'
+
+
+class ProfileImportsCommand(Command):
+    """ProfileImportsCommand
+    Implements the `Command` interface from `setuptools`
+    to profile the imports of the application's entrypoint under the host python
+    """
+    user_options = [
+        ('package=', None, 'The package of the application, defaults to that of the compile command'),
+        ('entrypoint=', None, 'The entrypoint, defaults to that of the compile command or <package>/__main__.py'),
+        ('python=', None, 'The python to run the application with, defaults to this python'),
+        ('until=', None, 'Stop once this module has been imported, rather than after the timeout'),
+        ('timeout=', None, 'Seconds to let the application run for, defaults to 10'),
+        ('repeat=', None, 'The number of runs whose median times are reported, defaults to 3'),
+        ('build-dir=', None, 'The build directory of the compile command'),
+        ('timings-db=', None, 'The timings database of the compile command, profiles are kept alongside it'),
+        ('compiled-packages=', None, 'The packages already frozen, defaults to those of the compile command'),
+        ('stdlib-modules=', None, 'The stdlib modules already frozen, defaults to those of the compile command'),
+        ('freeze-threshold=', None, 'Milliseconds of imports from which a package is recommended for freezing, defaults to 5'),
+        ('lazy-threshold=', None, 'Milliseconds of imports from which a module is recommended for lazy loading, defaults to 20'),
+        ('top=', None, 'The number of packages to list, defaults to 20')
+    ]
+
+    # Options shared with the compile command, which are read from its configuration if not set
+    _COMPILE_OPTIONS = ['package', 'entrypoint', 'build_dir', 'timings_db', 'compiled_packages', 'stdlib_modules']
+
+    def initialize_options(self):
+        """Implementation of `Command` initialize_options
+        """
+        #pylint: disable=attribute-defined-outside-init
+        self.package = None
+        self.entrypoint = None
+        self.python = None
+        self.until = None
+        self.timeout = None
+        self.repeat = None
+        self.build_dir = None
+        self.timings_db = None
+        self.compiled_packages = None
+        self.stdlib_modules = None
+        self.freeze_threshold = None
+        self.lazy_threshold = None
+        self.top = None
+
+    def finalize_options(self):
+        """Implementation of `Command` finalize_options
+        """
+        compile_options = self.distribution.get_option_dict('compile')
+        for name in self._COMPILE_OPTIONS:
+            if getattr(self, name) is None and name in compile_options:
+                setattr(self, name, compile_options[name][1])
+        assert self.package, 'package must be specified'
+        self.entrypoint = self.entrypoint or f'{self.package}/__main__.py'
+        assert path.isfile(self.entrypoint), 'entrypoint not found'
+        self.python = self.python or sys.executable
+        self.timeout = float(self.timeout or 10)
+        self.repeat = int(self.repeat or 3)
+        self.build_dir = self.build_dir or 'build'
+        self.timings_db = self.timings_db or DEFAULT_DATABASE
+        self.compiled_packages = self.compiled_packages.split(',') if self.compiled_packages else []
+        self.stdlib_modules = self.stdlib_modules.split(',') if self.stdlib_modules else []
+        self.freeze_threshold = float(self.freeze_threshold or 5)
+        self.lazy_threshold = float(self.lazy_threshold or 20)
+        self.top = int(self.top or 20)
+
+    def run(self):
+        """Runs the command
+        """
+        runs = []
+        for index in range(self.repeat):
+            sys.stdout.write(f'Profiling the imports of {self.entrypoint} ({index + 1} of {self.repeat})\n')
+            runs.append(run_profile(self.python, self.entrypoint, self.package, self.until, self.timeout))
+        imports = merge_runs(runs)
+        state_dir = path.dirname(path.abspath(self.timings_db))
+        filename = get_state_filename(state_dir, self.build_dir, 'import-profile')
+        previous = load_profile(filename)
+        save_profile(filename, imports, get_state_filename(state_dir, self.build_dir, 'import-profile-previous'))
+        sys.stdout.write(self.format_report(imports, previous))
+
+    def format_report(self, imports, previous):
+        """Formats the report of the profiled `imports`, compared with the `previous` profile if there is one
+        """
+        total = get_total_us(imports)
+        lines = [f'Startup imports: {len(imports)} modules, {_format_ms(total)}' + (
+            f' ({self._format_change(total - get_total_us(previous))} since the previous profile)'
+            if previous is not None else ''
+        ), '']
+
+        packages = get_package_times(imports)
+        previous_packages = get_package_times(previous) if previous is not None else {}
+        lines.append(f'{"Package":<30}{"Time":>10}{"Change":>10}{"Modules":>9}{"Size":>10}  Origin')
+        for package, (time_us, modules, size, origin, _) in list(packages.items())[:self.top]:
+            change = self._format_change(time_us - previous_packages.get(package, (0,))[0])\
+                if previous is not None else '-'
+            lines.append(
+                f'{package:<30}{_format_ms(time_us):>10}{change:>10}{modules:>9}{format_size(size):>10}  {origin}'
+            )
+
+        recommendations = get_recommendations(
+            imports,
+            self.compiled_packages,
+            self.stdlib_modules,
+            self.freeze_threshold * 1000,
+            self.lazy_threshold * 1000
+        )
+        lines += ['', 'Recommendations' if recommendations else 'No recommendations']
+        for recommendation in recommendations:
+            lines.append(
+                f'{_RECOMMENDATIONS[recommendation.action]:<30}{recommendation.module:<30}'
+                f'{_format_ms(recommendation.time_us):>10}  {recommendation.reason}'
+            )
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _format_change(change_us):
+        return ('+' if change_us >= 0 else '-') + _format_ms(abs(change_us))
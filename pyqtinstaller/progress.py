@@ -0,0 +1,115 @@
+# pyqttoolkit
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""Progress
+
+This module defines the progress reporter of a build, which estimates the time remaining
+from the durations of the stages in previous builds
+"""
+import sys
+import time
+
+
+def format_duration(seconds):
+    """Formats a duration in seconds for display, e.g. `1h02m`, `12m30s` or `45s`
+    """
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f'{seconds // 3600}h{seconds % 3600 // 60:02}m'
+    if seconds >= 60:
+        return f'{seconds // 60}m{seconds % 60:02}s'
+    return f'{seconds}s'
+
+
+class ProgressReporter:
+    """ProgressReporter
+    Reports the progress of a build through its `stages` to `stream`, estimating the time remaining
+    from `estimates`, the expected duration in seconds of each stage.
+    File progress is reported at most once every `interval` seconds, so that copy loops aren't slowed by console writes.
+    Nothing is reported if `stream` is `None`
+    """
+    def __init__(self, stages, estimates=None, stream=sys.stdout, interval=2.0, clock=time.monotonic):
+        self.stages = list(stages)
+        self.estimates = estimates or {}
+        self.stream = stream
+        self.interval = interval
+        self.clock = clock
+        self._finished = set()
+        self._current = None
+        self._stage_start = None
+        self._files = 0
+        self._total_files = 0
+        self._next_update = 0
+
+    def start_stage(self, name):
+        """Marks the start of stage `name`
+        """
+        self._current = name
+        self._stage_start = self.clock()
+        self._files = 0
+        self._total_files = 0
+        self._next_update = self._stage_start + self.interval
+        remaining = self.get_remaining()
+        self._write('[{:>{width}}/{}] {}{}'.format(
+            self.stages.index(name) + 1 if name in self.stages else '?',
+            len(self.stages),
+            name,
+            f', about {format_duration(remaining)} remaining' if remaining is not None else '',
+            width=len(str(len(self.stages)))
+        ))
+
+    def finish_stage(self, name):
+        """Marks stage `name` as complete, or skipped
+        """
+        self._finished.add(name)
+        if self._current == name:
+            self._current = None
+
+    def add_files(self, count):
+        """Adds `count` files to the number expected to be copied by the current stage
+        """
+        self._total_files += count
+
+    def advance(self, count=1):
+        """Records that `count` files have been copied by the current stage
+        """
+        self._files += count
+        if self.stream is not None and self.clock() >= self._next_update:
+            self._next_update = self.clock() + self.interval
+            total = f'/{self._total_files}' if self._total_files >= self._files else ''
+            self._write(f'    {self._current}: {self._files}{total} files copied')
+
+    def get_remaining(self):
+        """Estimates the seconds remaining until the build completes, or `None` if there are stages without an estimate
+        """
+        remaining = 0.0
+        for stage in self.stages:
+            if stage in self._finished:
+                continue
+            if stage not in self.estimates:
+                return None
+            if stage == self._current and self._total_files and self._files <= self._total_files:
+                remaining += self.estimates[stage] * (1 - self._files / self._total_files)
+            elif stage == self._current:
+                remaining += max(self.estimates[stage] - (self.clock() - self._stage_start), 0.0)
+            else:
+                remaining += self.estimates[stage]
+        return remaining
+
+    def _write(self, message):
+        if self.stream is not None:
+            self.stream.write(message + '\n')
+            self.stream.flush()
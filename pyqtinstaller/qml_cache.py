@@ -0,0 +1,89 @@
+# pyqttoolkit
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""QmlCache
+
+This module defines the cache of the `.qmlc` files compiled ahead of time from QML files shipped as resources,
+which Qt loads from beside each QML file instead of compiling it on the first launch.
+
+Compiled files are keyed on the content and modification time of the QML file, as Qt ignores a `.qmlc`
+recording a different time, and on the command and executable of the tool compiling them
+"""
+import os
+from os import path
+import shlex
+import shutil
+import hashlib
+
+from .compiler_cache import get_compiler_identity
+
+CACHE_VERSION = '1'
+QML_CACHE_DIRNAME = 'qml_cache'
+DEFAULT_TOOL = '"{qmlcachegen}" -o {output} {input}'
+
+
+def get_output_filename(qml_filename):
+    """Gets the compiled file Qt loads for `qml_filename`
+    """
+    return qml_filename + 'c'
+
+
+def get_tool_identity(cmd):
+    """Identifies the tool run by the command line `cmd`, by the command and the executable it runs
+    """
+    args = shlex.split(cmd, posix=os.name != 'nt')
+    return '{}\n{}'.format(cmd, get_compiler_identity(args[0].strip('"')) if args else '')
+
+
+def get_key(qml_filename, tool_identity):
+    """Gets the cache key of compiling `qml_filename` with the tool identified by `tool_identity`
+    """
+    digest = hashlib.sha256()
+    digest.update(CACHE_VERSION.encode('utf8'))
+    digest.update(tool_identity.encode('utf8'))
+    digest.update(str(os.stat(qml_filename).st_mtime_ns).encode('utf8'))
+    with open(qml_filename, 'rb') as fp:
+        digest.update(fp.read())
+    return digest.hexdigest()
+
+
+class QmlCache:
+    """QmlCache
+    Stores compiled QML files by key in `cache_dir`
+    """
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def _get_entry(self, key):
+        return path.join(self.cache_dir, key[:2], key + '.qmlc')
+
+    def get(self, key, output):
+        """Copies the compiled file of `key` to `output`, returning whether it was cached
+        """
+        try:
+            shutil.copyfile(self._get_entry(key), output)
+        except OSError:
+            return False
+        return True
+
+    def put(self, key, output):
+        """Stores the compiled file `output` under `key`
+        """
+        entry = self._get_entry(key)
+        os.makedirs(path.dirname(entry), exist_ok=True)
+        temp_filename = f'{entry}.{os.getpid()}.tmp'
+        shutil.copyfile(output, temp_filename)
+        os.replace(temp_filename, entry)
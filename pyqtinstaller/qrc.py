@@ -0,0 +1,98 @@
+# pyqttoolkit
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""Qrc
+
+This module defines the layout of the application's Qt resource files, which contain the QML files
+of the package: the compression of each file, set by rules of the form
+`<pattern>:<level>[:<threshold>]` or `<pattern>:none`, e.g. `*/generated/*.qml:none,*.qml:9:10`,
+and the sharding of the files over several `.qrc` files, which rcc and the compiler build in parallel
+and only rebuild when their files change
+"""
+from os import path
+import zlib
+from fnmatch import fnmatch
+from collections import namedtuple
+
+SHARD_BY = ['directory', 'size']
+
+CompressionRule = namedtuple('CompressionRule', ['pattern', 'level', 'threshold'])
+CompressionRule.__doc__ = """Compresses files matching `pattern` with zlib `level`, keeping the compressed data
+only if it is at least `threshold` percent smaller. A `level` of `None` stores files uncompressed
+"""
+
+
+def parse_compression_rules(rules):
+    """Parses compression rules, e.g. `['*/generated/*.qml:none', '*.qml:9:10']`
+    """
+    parsed = []
+    for rule in rules:
+        parts = rule.split(':')
+        assert 2 <= len(parts) <= 3, f'Invalid resource compression rule {rule}, expected <pattern>:<level>[:<threshold>]'
+        if parts[1] == 'none':
+            assert len(parts) == 2, f'Invalid resource compression rule {rule}, none takes no threshold'
+            parsed.append(CompressionRule(parts[0], None, None))
+            continue
+        level = int(parts[1])
+        assert 1 <= level <= 9, f'Invalid compression level in {rule}, expected 1 to 9 or none'
+        threshold = int(parts[2]) if len(parts) == 3 else None
+        assert threshold is None or 0 <= threshold <= 100, f'Invalid compression threshold in {rule}, expected 0 to 100'
+        parsed.append(CompressionRule(parts[0], level, threshold))
+    return parsed
+
+
+def get_compression_attributes(filename, rules):
+    """Gets the `<file>` attributes of `filename` from the first of `rules` matching its name or path
+    """
+    name = filename.replace('\\', '/')
+    for rule in rules:
+        if fnmatch(path.basename(name), rule.pattern) or fnmatch(name, rule.pattern):
+            if rule.level is None:
+                # rcc has no per file switch in every Qt 5 release, data is stored unless compression saves 100%
+                return [('compress', '0'), ('threshold', '100')]
+            attributes = [('compress', str(rule.level))]
+            if rule.threshold is not None:
+                attributes.append(('threshold', str(rule.threshold)))
+            return attributes
+    return []
+
+
+def get_shard_names(name, shards):
+    """Gets the names of the `.qrc` files of resource file `name` split into `shards`
+    """
+    if shards <= 1:
+        return [f'{name}.qrc']
+    return [f'{name}_{index}.qrc' for index in range(shards)]
+
+
+def shard_files(files, shards, shard_by='directory', get_size=path.getsize):
+    """Splits `files` into `shards` lists. Files are either grouped by directory, with each directory
+    assigned to a shard by a hash of its name so that it stays in the same shard as files are added and removed,
+    or balanced by size, with each file assigned to the smallest shard in order of decreasing size
+    """
+    assert shard_by in SHARD_BY, f'Unknown resource sharding {shard_by}, expected one of {", ".join(SHARD_BY)}'
+    sharded = [[] for _ in range(max(shards, 1))]
+    if shard_by == 'directory':
+        for filename in files:
+            directory = path.dirname(filename.replace('\\', '/'))
+            sharded[zlib.crc32(directory.encode('utf8')) % len(sharded)].append(filename)
+    else:
+        sizes = [0] * len(sharded)
+        for filename in sorted(files, key=lambda f: (-get_size(f), f)):
+            index = sizes.index(min(sizes))
+            sharded[index].append(filename)
+            sizes[index] += get_size(filename)
+    return [sorted(s) for s in sharded]
@@ -0,0 +1,182 @@
+# pyqttoolkit
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""Snapshot
+
+This module defines the filesystem snapshot of a build, which lists each directory the build reads at most once
+and answers the stages' queries for files, directories and their stat information from memory
+"""
+import os
+from os import path
+import re
+from collections import OrderedDict
+
+_CASE_FLAGS = re.IGNORECASE if os.name == 'nt' else 0
+
+
+def _translate_component(component):
+    regex = ''
+    for char in component:
+        if char == '*':
+            regex += '[^/]*'
+        elif char == '?':
+            regex += '[^/]'
+        else:
+            regex += re.escape(char)
+    return regex
+
+
+def translate_pattern(pattern):
+    """Translates a glob pattern relative to a directory, in which `**` matches any number of directories,
+    to a regular expression
+    """
+    regex = ''
+    components = pattern.split('/')
+    for index, component in enumerate(components):
+        if component == '**':
+            regex += '(?:[^/]+/)*' if index < len(components) - 1 else '.*'
+        else:
+            regex += _translate_component(component) + ('/' if index < len(components) - 1 else '')
+    return re.compile(regex + r'\Z', _CASE_FLAGS)
+
+
+class FileSnapshot:
+    """FileSnapshot
+    Caches the entries of each directory when it is first read. Entries are `os.DirEntry` objects,
+    which cache their stat information, so each file is also stat'd at most once
+    """
+    def __init__(self):
+        self._directories = {}
+        self.scans = 0
+
+    @staticmethod
+    def _get_key(directory):
+        return path.normcase(path.abspath(directory))
+
+    def _get_entries(self, directory):
+        key = self._get_key(directory)
+        if key not in self._directories:
+            try:
+                with os.scandir(directory) as iterator:
+                    entries = OrderedDict((e.name, e) for e in sorted(iterator, key=lambda e: e.name))
+            except OSError:
+                entries = None
+            self._directories[key] = entries
+            self.scans += 1
+        return self._directories[key]
+
+    def _get_entry(self, filename):
+        filename = path.abspath(filename)
+        entries = self._get_entries(path.dirname(filename))
+        return entries.get(path.basename(filename)) if entries else None
+
+    def listdir(self, directory):
+        """Lists the names in `directory` in sorted order
+        """
+        entries = self._get_entries(directory)
+        if entries is None:
+            raise FileNotFoundError(f'No such directory: {directory}')
+        return list(entries)
+
+    def isdir(self, filename):
+        """Whether `filename` is a directory
+        """
+        entry = self._get_entry(filename)
+        return bool(entry) and entry.is_dir()
+
+    def isfile(self, filename):
+        """Whether `filename` is a file
+        """
+        entry = self._get_entry(filename)
+        return bool(entry) and entry.is_file()
+
+    def exists(self, filename):
+        """Whether `filename` exists
+        """
+        return self.isdir(filename) or self.isfile(filename)
+
+    def stat(self, filename):
+        """Gets the stat information of `filename`, as `os.stat` does
+        """
+        entry = self._get_entry(filename)
+        if entry is None:
+            raise FileNotFoundError(f'No such file: {filename}')
+        return entry.stat()
+
+    def walk(self, root, max_depth=None):
+        """Walks `root` top down, as `os.walk` does, to at most `max_depth` directories below it
+        """
+        entries = self._get_entries(root)
+        if entries is None:
+            return
+        dirnames = [n for n, e in entries.items() if e.is_dir()]
+        filenames = [n for n, e in entries.items() if not e.is_dir()]
+        yield root, dirnames, filenames
+        if max_depth is None or max_depth > 0:
+            for dirname in dirnames:
+                # Links to directories are listed but not followed, as in `os.walk`
+                if entries[dirname].is_symlink():
+                    continue
+                yield from self.walk(path.join(root, dirname), None if max_depth is None else max_depth - 1)
+
+    def walk_files(self, *roots):
+        """Gets every file below `roots`, skipping python caches, as `stages.walk_files` does
+        """
+        files = []
+        for root in roots:
+            if self.isfile(root):
+                files.append(root)
+            for dirpath, dirnames, filenames in self.walk(root):
+                dirnames[:] = [d for d in dirnames if d != '__pycache__']
+                files += [path.join(dirpath, f) for f in filenames if not f.endswith('.pyc')]
+        return files
+
+    def glob(self, root, pattern):
+        """Gets the files below `root` matching `pattern`, in sorted order.
+        As with `glob.glob`, names starting with a dot are only matched by patterns that start with one
+        """
+        regex = translate_pattern(pattern)
+        max_depth = None if '**' in pattern else pattern.count('/')
+        matches = []
+        for dirpath, dirnames, filenames in self.walk(root, max_depth):
+            relative_dir = path.relpath(dirpath, root).replace(os.sep, '/')
+            prefix = '' if relative_dir == '.' else relative_dir + '/'
+            dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+            matches += [
+                path.join(dirpath, f) for f in filenames if not f.startswith('.') and regex.match(prefix + f)
+            ]
+        return sorted(matches)
+
+    def get_tree_size(self, filename):
+        """Gets the number of files and bytes of a file or directory
+        """
+        if self.isfile(filename):
+            return 1, self.stat(filename).st_size
+        files = self.walk_files(filename)
+        return len(files), sum(self.stat(f).st_size for f in files)
+
+    def invalidate(self, directory=None):
+        """Forgets the entries of `directory` and the directories below it, or of every directory,
+        once they have been written to
+        """
+        if directory is None:
+            self._directories = {}
+            return
+        key = self._get_key(directory)
+        self._directories = {
+            k: v for k, v in self._directories.items()
+            if k != key and not k.startswith(key + os.sep) and k != path.dirname(key)
+        }
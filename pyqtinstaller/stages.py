@@ -0,0 +1,118 @@
+# pyqttoolkit
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""Stages
+
+This module defines the stages of a build and the stage journal, which records the stages
+that have completed so that a failed build can be resumed
+"""
+import os
+from os import path
+import json
+import hashlib
+from collections import namedtuple
+
+JOURNAL_FILENAME = 'stage_journal.json'
+
+Stage = namedtuple('Stage', ['name', 'run', 'inputs', 'needs_version'])
+Stage.__doc__ = """A stage of a build
+`run` performs the stage, returning a JSON serializable result.
+`inputs` returns the option values and files the stage depends on, as a tuple `(values, files)`.
+`needs_version` is set for stages which need the version stamp applied to the package
+"""
+
+
+def get_fingerprint(previous, values, files, stat=os.stat):
+    """Gets a fingerprint of a stage, from the fingerprint of the previous stage,
+    the stage's option values and the size and modification time of its input files, as given by `stat`
+    """
+    digest = hashlib.sha256()
+    digest.update(previous.encode('utf8'))
+    digest.update(json.dumps(values, sort_keys=True, default=str).encode('utf8'))
+    for filename in sorted(set(files)):
+        try:
+            file_stat = stat(filename)
+            digest.update(f'{filename}:{file_stat.st_size}:{file_stat.st_mtime_ns}\n'.encode('utf8'))
+        except OSError:
+            digest.update(f'{filename}:missing\n'.encode('utf8'))
+    return digest.hexdigest()
+
+
+def walk_files(*roots):
+    """Gets every file below `roots`, skipping python caches
+    Roots which are files are returned as they are
+    """
+    files = []
+    for root in roots:
+        if path.isfile(root):
+            files.append(root)
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if d != '__pycache__')
+            files += [path.join(dirpath, f) for f in sorted(filenames) if not f.endswith('.pyc')]
+    return files
+
+
+class StageJournal:
+    """StageJournal
+    Records the completed stages of a build in order, with their fingerprints and results
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.filename) as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            return []
+
+    def reset(self):
+        """Forgets every completed stage
+        """
+        self.entries = []
+
+    def get_completed(self, index, name, fingerprint):
+        """Gets the journal entry of the stage at `index` if it completed with the same fingerprint,
+        otherwise `None`
+        """
+        if index < len(self.entries):
+            entry = self.entries[index]
+            if entry['name'] == name and entry['fingerprint'] == fingerprint:
+                return entry
+        return None
+
+    def record(self, index, name, fingerprint, result, state):
+        """Records the stage at `index` as complete, discarding any later stages
+        Stages whose result cannot be serialized are not recorded, so they are always rerun
+        """
+        entry = {'name': name, 'fingerprint': fingerprint, 'result': result, 'state': state}
+        del self.entries[index:]
+        try:
+            json.dumps(entry)
+        except (TypeError, ValueError):
+            return
+        self.entries.append(entry)
+        self._save()
+
+    def _save(self):
+        directory = path.dirname(self.filename)
+        if directory and not path.isdir(directory):
+            os.makedirs(directory)
+        temp_filename = self.filename + '.tmp'
+        with open(temp_filename, 'w') as fp:
+            json.dump(self.entries, fp, indent=2)
+        os.replace(temp_filename, self.filename)
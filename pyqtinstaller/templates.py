@@ -0,0 +1,92 @@
+# pyqttoolkit
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""Templates
+
+This module defines the loading of the package's jinja templates. Templates are compiled ahead of time into
+python modules when the package is built, so that builds don't parse and compile them. The template source
+is used when the compiled modules are missing or stale
+"""
+from os import path
+import json
+import hashlib
+from functools import lru_cache
+
+TEMPLATES_DIR = path.realpath(path.dirname(__file__))
+COMPILED_TEMPLATES_DIR = path.join(TEMPLATES_DIR, 'compiled_templates')
+INDEX_FILENAME = 'index.json'
+TEMPLATE_NAMES = ['package.pdy', 'resources.qrc', 'setup.iss']
+
+
+def _get_source_hash(source):
+    return hashlib.sha256(source).hexdigest()
+
+
+def compile_templates(templates_dir=TEMPLATES_DIR, target_dir=COMPILED_TEMPLATES_DIR):
+    """Compiles the templates of `templates_dir` into python modules in `target_dir`,
+    with an index of the source each module was compiled from
+    """
+    from jinja2 import Environment, FileSystemLoader, __version__ as jinja2_version
+    environment = Environment(loader=FileSystemLoader(templates_dir))
+    names = [f'{n}.jinja' for n in TEMPLATE_NAMES]
+    environment.compile_templates(target_dir, filter_func=lambda n: n in names, zip=None, ignore_errors=False)
+    hashes = {}
+    for name in names:
+        with open(path.join(templates_dir, name), 'rb') as fp:
+            hashes[name] = _get_source_hash(fp.read())
+    with open(path.join(target_dir, INDEX_FILENAME), 'w') as fp:
+        json.dump({'jinja2': jinja2_version, 'templates': hashes}, fp, indent=2, sort_keys=True)
+
+
+@lru_cache()
+def _get_compiled_templates(compiled_dir):
+    from jinja2 import Environment, ModuleLoader, __version__ as jinja2_version
+    try:
+        with open(path.join(compiled_dir, INDEX_FILENAME)) as fp:
+            index = json.load(fp)
+    except (OSError, ValueError):
+        return None, {}
+    # Compiled templates depend on the version of jinja2 which compiled them
+    if index.get('jinja2') != jinja2_version:
+        return None, {}
+    return Environment(loader=ModuleLoader(compiled_dir)), index['templates']
+
+
+def load_template(name, templates_dir=TEMPLATES_DIR, compiled_dir=COMPILED_TEMPLATES_DIR):
+    """Loads a jinja template from the name of the template file, from its compiled module if it is up to date
+    """
+    from jinja2 import Template
+    filename = f'{name}.jinja'
+    with open(path.join(templates_dir, filename), 'rb') as fp:
+        source = fp.read()
+    environment, hashes = _get_compiled_templates(compiled_dir)
+    if environment and hashes.get(filename) == _get_source_hash(source):
+        return environment.get_template(filename)
+    return Template(source.decode('utf8'))
+
+
+@lru_cache()
+def get_template(name: str):
+    """Loads a jinja template from the name of the template file
+    Templates are cached for the lifetime of the process
+    """
+    return load_template(name)
+
+
+if __name__ == '__main__':
+    # Compiles the templates of a development checkout
+    compile_templates()
+    print(f'Compiled templates to {COMPILED_TEMPLATES_DIR}')
@@ -0,0 +1,181 @@
+# pyqttoolkit
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""Timings
+
+This module defines the database of build timings, which records the time taken by each stage of every build
+so that builds which become slower can be detected
+"""
+import os
+from os import path
+import time
+import sqlite3
+import statistics
+from collections import namedtuple, OrderedDict
+
+# Kept per user rather than in the checkout, alongside the compiler cache
+DEFAULT_DATABASE = path.join(
+    os.environ.get('LOCALAPPDATA') or path.join(path.expanduser('~'), '.cache'),
+    'pyqtinstaller',
+    'timings.sqlite3'
+)
+TOTAL = 'total'
+# Slowdowns smaller than this are treated as noise however large they are relative to the baseline
+MIN_REGRESSION_SECONDS = 0.5
+
+StageTiming = namedtuple('StageTiming', ['duration', 'files', 'bytes'])
+
+Run = namedtuple('Run', ['id', 'started', 'build_dir', 'app_version', 'config_hash', 'stages'])
+Run.__doc__ = """A recorded build
+`stages` maps the name of each stage that ran, and `TOTAL`, to its `StageTiming`
+"""
+
+Regression = namedtuple('Regression', ['stage', 'duration', 'baseline', 'threshold'])
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    build_dir TEXT NOT NULL,
+    app_version TEXT,
+    config_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stages (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    duration REAL NOT NULL,
+    files INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_config_hash ON runs(config_hash, id);
+"""
+
+
+def get_files_size(files):
+    """Gets the number of files and their total size in bytes, ignoring missing files
+    """
+    count = 0
+    size = 0
+    for filename in set(files):
+        try:
+            size += os.stat(filename).st_size
+            count += 1
+        except OSError:
+            pass
+    return count, size
+
+
+class TimingsDatabase:
+    """TimingsDatabase
+    Stores the stage timings of builds in an SQLite database
+    """
+    def __init__(self, filename=DEFAULT_DATABASE):
+        self.filename = filename
+
+    def _connect(self):
+        directory = path.dirname(self.filename)
+        if directory and not path.isdir(directory):
+            os.makedirs(directory)
+        connection = sqlite3.connect(self.filename, timeout=30)
+        connection.executescript(_SCHEMA)
+        return connection
+
+    def record(self, build_dir, app_version, config_hash, stages, started=None):
+        """Records a build, where `stages` maps the name of each stage in order to its `StageTiming`
+        Returns the id of the run
+        """
+        connection = self._connect()
+        try:
+            with connection:
+                cursor = connection.execute(
+                    'INSERT INTO runs (started, build_dir, app_version, config_hash) VALUES (?, ?, ?, ?)',
+                    (started or time.time(), path.abspath(build_dir), app_version, config_hash)
+                )
+                connection.executemany(
+                    'INSERT INTO stages (run_id, position, name, duration, files, bytes) VALUES (?, ?, ?, ?, ?, ?)',
+                    [(cursor.lastrowid, i, name, *timing) for i, (name, timing) in enumerate(stages.items())]
+                )
+                return cursor.lastrowid
+        finally:
+            connection.close()
+
+    def get_runs(self, config_hash=None, build_dir=None, limit=None):
+        """Gets the most recent runs, latest first, optionally only those with `config_hash` or `build_dir`
+        """
+        if not path.isfile(self.filename):
+            return []
+        conditions = []
+        parameters = []
+        if config_hash:
+            conditions.append('config_hash = ?')
+            parameters.append(config_hash)
+        if build_dir:
+            conditions.append('build_dir = ?')
+            parameters.append(path.abspath(build_dir))
+        query = 'SELECT id, started, build_dir, app_version, config_hash FROM runs'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY id DESC'
+        if limit:
+            query += f' LIMIT {int(limit)}'
+
+        connection = self._connect()
+        try:
+            runs = []
+            for row in connection.execute(query, parameters).fetchall():
+                stages = OrderedDict(
+                    (name, StageTiming(duration, files, size)) for name, duration, files, size in connection.execute(
+                        'SELECT name, duration, files, bytes FROM stages WHERE run_id = ? ORDER BY position', (row[0],)
+                    )
+                )
+                runs.append(Run(*row, stages))
+            return runs
+        finally:
+            connection.close()
+
+
+def get_baseline(runs):
+    """Gets the median duration of each stage over `runs`
+    """
+    durations = OrderedDict()
+    for run in runs:
+        for stage, timing in run.stages.items():
+            durations.setdefault(stage, []).append(timing.duration)
+    return OrderedDict((stage, statistics.median(d)) for stage, d in durations.items())
+
+
+def get_regressions(latest, baseline, threshold):
+    """Gets the stages of the `latest` run which took more than `threshold` (a fraction) longer than their baseline
+    """
+    regressions = []
+    for stage, timing in latest.stages.items():
+        if stage not in baseline:
+            continue
+        slowdown = timing.duration - baseline[stage]
+        if slowdown > MIN_REGRESSION_SECONDS and slowdown > baseline[stage] * threshold:
+            regressions.append(Regression(stage, timing.duration, baseline[stage], threshold))
+    return regressions
+
+
+def get_exceeded_budgets(latest, budgets):
+    """Gets the stages of the `latest` run which took longer than their budget in seconds
+    Returns a dict of the duration of each stage over budget
+    """
+    return OrderedDict(
+        (stage, latest.stages[stage].duration) for stage, budget in budgets.items()
+        if stage in latest.stages and latest.stages[stage].duration > budget
+    )
@@ -0,0 +1,194 @@
+# pyqttoolkit
+# Copyright (C) 2018-2019, Simmovation Ltd.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+"""Watch
+
+This module defines the file watchers used by the "compile" command's watch mode
+"""
+import os
+from os import path
+import sys
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+
+IGNORED_NAMES = ['__pycache__', '__version__.py']
+IGNORED_SUFFIXES = ['.pyc', '.pyo', '.swp', '~']
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT = struct.Struct('iIII')
+
+
+def is_ignored(filename):
+    """Whether changes to `filename` should be ignored (caches, editor swap files, generated files)
+    """
+    name = path.basename(filename)
+    return name in IGNORED_NAMES or name.startswith('.') or any(name.endswith(s) for s in IGNORED_SUFFIXES)
+
+
+class PollingWatcher:
+    """Watches a set of directories by periodically comparing the size and modification time of their files
+    """
+    def __init__(self, roots, interval=1.0):
+        self.roots = list(roots)
+        self.interval = interval
+        self._state = self._scan()
+
+    def _scan(self):
+        state = {}
+        for root in self.roots:
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames[:] = [d for d in dirnames if not is_ignored(d)]
+                for filename in filenames:
+                    if is_ignored(filename):
+                        continue
+                    full_path = path.join(dirpath, filename)
+                    try:
+                        stat = os.stat(full_path)
+                    except OSError:
+                        continue
+                    state[full_path] = (stat.st_mtime_ns, stat.st_size)
+        return state
+
+    def wait(self, timeout=None):
+        """Waits up to `timeout` seconds (forever if `None`) for changes
+        Returns the set of paths that changed, which is empty if the timeout expired
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            state = self._scan()
+            changed = {p for p in set(state) | set(self._state) if state.get(p) != self._state.get(p)}
+            self._state = state
+            if changed:
+                return changed
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return set()
+                time.sleep(min(self.interval, remaining))
+            else:
+                time.sleep(self.interval)
+
+    def close(self):
+        """Releases any resources held by the watcher
+        """
+
+
+class InotifyWatcher:
+    """Watches a set of directories recursively using the Linux inotify API
+    """
+    def __init__(self, roots):
+        if not sys.platform.startswith('linux'):
+            raise OSError('inotify is only available on Linux')
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError('inotify is not supported by the C library')
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'Could not initialise inotify')
+        self.roots = list(roots)
+        self._watches = {}
+        try:
+            for root in self.roots:
+                if path.isdir(root):
+                    self._add_tree(root)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_tree(self, root):
+        for dirpath, dirnames, _ in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not is_ignored(d)]
+            watch = self._libc.inotify_add_watch(self._fd, os.fsencode(dirpath), _WATCH_MASK)
+            if watch < 0:
+                raise OSError(ctypes.get_errno(), f'Could not watch {dirpath}')
+            self._watches[watch] = dirpath
+
+    def wait(self, timeout=None):
+        """Waits up to `timeout` seconds (forever if `None`) for changes
+        Returns the set of paths that changed, which is empty if the timeout expired
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        return self._read_events() if readable else set()
+
+    def _read_events(self):
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                watch, mask, _, length = _EVENT.unpack_from(data, offset)
+                name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b'\0')
+                offset += _EVENT.size + length
+                if mask & _IN_Q_OVERFLOW:
+                    # Events were dropped, so report every root as changed
+                    changed.update(self.roots)
+                    continue
+                directory = self._watches.get(watch)
+                if directory is None:
+                    continue
+                if mask & _IN_IGNORED:
+                    del self._watches[watch]
+                    continue
+                filename = path.join(directory, os.fsdecode(name)) if name else directory
+                if is_ignored(filename):
+                    continue
+                if mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO) and path.isdir(filename):
+                    self._add_tree(filename)
+                changed.add(filename)
+
+    def close(self):
+        """Releases any resources held by the watcher
+        """
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def get_watcher(roots, poll_interval=1.0):
+    """Gets a watcher for `roots`, using inotify where available and falling back to polling
+    """
+    try:
+        return InotifyWatcher(roots)
+    except OSError:
+        return PollingWatcher(roots, poll_interval)
+
+
+def wait_for_changes(watcher, debounce, pending=None):
+    """Blocks until files change, then keeps collecting changes until none arrive for `debounce` seconds
+    `pending` changes, if provided, are included without waiting for a first change
+    """
+    changed = set(pending or [])
+    while not changed:
+        changed = watcher.wait()
+    while True:
+        more = watcher.wait(debounce)
+        if not more:
+            return changed
+        changed |= more
@@ -10,6 +10,27 @@ _here = path.abspath(path.dirname(__file__))
 with open(path.join(_here, 'README.md')) as fp:
     README_CONTENTS = fp.read()
 
+cmdclass = versioneer.get_cmdclass()
+
+
+class build_py(cmdclass['build_py']): #pylint: disable=invalid-name
+    """Builds the package with its jinja templates compiled into python modules
+    """
+    def run(self):
+        super().run()
+        if self.dry_run:
+            return
+        try:
+            from pyqtinstaller.templates import compile_templates
+            package_dir = path.join(self.build_lib, PACKAGE_NAME)
+            compile_templates(package_dir, path.join(package_dir, 'compiled_templates'))
+        except ImportError:
+            # The templates are compiled from source at runtime instead
+            print('jinja2 is not installed, templates will not be precompiled')
+
+
+cmdclass['build_py'] = build_py
+
 install_requires = ['jinja2', 'pyqtdeploy==1.3.2']
 tests_require = [
     'tox',
@@ -29,7 +50,7 @@ setup(
     tests_require=tests_require,
     extras_require=extras_require,
     packages=find_packages(exclude=('tests*',)),
-    cmdclass=versioneer.get_cmdclass(),
+    cmdclass=cmdclass,
     license='GPLv3',
     version=versioneer.get_version(),
     author='Simmovation Ltd',
@@ -42,7 +63,9 @@ setup(
     python_requires='==3.6.*',
     entry_points={
         'distutils.commands': [
-            'compile = pyqtinstaller:CompileCommand'
+            'compile = pyqtinstaller:CompileCommand',
+            'analyze = pyqtinstaller:AnalyzeCommand',
+            'profile_imports = pyqtinstaller:ProfileImportsCommand'
         ]
     },
     package_data={
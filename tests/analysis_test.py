@@ -0,0 +1,36 @@
+from pyqtinstaller.analysis import (
+    ReleaseFile, get_release_listing, save_listing, load_listing, get_listing_filename, get_origin_sizes, get_changes,
+    get_largest_files, format_size
+)
+
+def test_files_are_attributed_to_their_origin(tmpdir):
+    release = tmpdir.mkdir('release')
+    release.join('Qt5Core.dll').write('x' * 10)
+    release.mkdir('packages').join('module.py').write('x' * 5)
+    release.join('extra.txt').write('x')
+    listing = get_release_listing(str(release), {'Qt5Core.dll': 'qt', 'packages/module.py': 'external_packages'})
+    assert listing == {
+        'Qt5Core.dll': ReleaseFile(10, 'qt'),
+        'extra.txt': ReleaseFile(1, 'other'),
+        'packages/module.py': ReleaseFile(5, 'external_packages')
+    }
+    assert list(get_origin_sizes(listing).items()) == [('qt', (1, 10)), ('external_packages', (1, 5)), ('other', (1, 1))]
+    assert [p for p, _ in get_largest_files(listing, 2)] == ['Qt5Core.dll', 'packages/module.py']
+
+def test_saved_listings_keep_the_previous_build(tmpdir):
+    state_dir = str(tmpdir.join('state'))
+    save_listing(state_dir, 'build', {'a.dll': ReleaseFile(1, 'qt')})
+    save_listing(state_dir, 'build', {'a.dll': ReleaseFile(2, 'qt')})
+    assert load_listing(get_listing_filename(state_dir, 'build')) == {'a.dll': ReleaseFile(2, 'qt')}
+    assert load_listing(get_listing_filename(state_dir, 'build', previous=True)) == {'a.dll': ReleaseFile(1, 'qt')}
+    assert load_listing(get_listing_filename(state_dir, 'other')) is None
+
+def test_changes_are_ordered_by_size():
+    previous = {'a': ReleaseFile(10, 'qt'), 'b': ReleaseFile(5, 'qt'), 'c': ReleaseFile(1, 'qt')}
+    current = {'a': ReleaseFile(12, 'qt'), 'c': ReleaseFile(1, 'qt'), 'd': ReleaseFile(100, 'other')}
+    assert get_changes(previous, current) == [('d', 0, 100), ('b', 5, 0), ('a', 10, 12)]
+
+def test_sizes_are_formatted():
+    assert format_size(12) == '12B'
+    assert format_size(1536) == '1.5KB'
+    assert format_size(600 * 1024 * 1024) == '600.0MB'
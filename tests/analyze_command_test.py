@@ -0,0 +1,14 @@
+from setuptools import Distribution
+
+from pyqtinstaller import AnalyzeCommand
+from pyqtinstaller.analysis import ReleaseFile
+
+def test_report_compares_with_previous_build():
+    command = AnalyzeCommand(Distribution())
+    command.top = 1
+    previous = {'Qt5Core.dll': ReleaseFile(2048, 'qt')}
+    listing = {'Qt5Core.dll': ReleaseFile(2048, 'qt'), 'packages/big.pyd': ReleaseFile(4096, 'external_packages')}
+    report = command.format_report('build/release', listing, previous).splitlines()
+    assert report[0] == 'build/release: 2 files, 6.0KB (+4.0KB since the previous build)'
+    assert report[3].split() == ['external_packages', '1', '4.0KB', '+4.0KB', 'External', 'packages', '(external-packages)']
+    assert report[-1].split() == ['+4.0KB', 'packages/big.pyd', '(external_packages)', 'added']
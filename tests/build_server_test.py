@@ -0,0 +1,60 @@
+import io
+import os
+import sys
+import threading
+
+import pytest
+
+from pyqtinstaller.build_server import BuildServer, connect, forward_build, get_default_socket_path
+
+def fake_build(options):
+    print(f'Building {options["app_name"]}')
+    if options.get('show_environment'):
+        print(f'SOURCE_DATE_EPOCH={os.environ.get("SOURCE_DATE_EPOCH")} sys.path[0]={sys.path[0]}')
+    if options.get('fail'):
+        raise AssertionError('nmake exited with code 2')
+
+@pytest.fixture
+def build_server(tmpdir):
+    socket_path = str(tmpdir.join('build.sock'))
+    server = BuildServer(socket_path, build=fake_build)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield socket_path
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires fork')
+def test_build_log_and_result_are_streamed_to_client(build_server, tmpdir):
+    output = io.StringIO()
+    returncode = forward_build(connect(build_server), str(tmpdir), {'app_name': 'My App'}, output)
+    assert returncode == 0
+    assert 'Building My App' in output.getvalue()
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires fork')
+def test_failed_build_returns_non_zero_exit_code(build_server, tmpdir):
+    output = io.StringIO()
+    returncode = forward_build(connect(build_server), str(tmpdir), {'app_name': 'My App', 'fail': True}, output)
+    assert returncode == 1
+    assert 'nmake exited with code 2' in output.getvalue()
+
+def test_connect_returns_none_when_no_server_is_running(tmpdir):
+    assert connect(str(tmpdir.join('missing.sock'))) is None
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires fork')
+def test_build_uses_client_environment(build_server, tmpdir):
+    output = io.StringIO()
+    environ = {**os.environ, 'SOURCE_DATE_EPOCH': '1546300800'}
+    sys_path = [str(tmpdir.join('venv'))] + sys.path
+    options = {'app_name': 'My App', 'show_environment': True}
+    assert forward_build(connect(build_server), str(tmpdir), options, output, environ, sys_path) == 0
+    assert f'SOURCE_DATE_EPOCH=1546300800 sys.path[0]={sys_path[0]}' in output.getvalue()
+    assert 'SOURCE_DATE_EPOCH' not in os.environ or os.environ['SOURCE_DATE_EPOCH'] != '1546300800'
+
+def test_default_socket_path_without_uids(monkeypatch):
+    monkeypatch.delenv('PYQTINSTALLER_BUILD_SERVER', raising=False)
+    monkeypatch.setenv('LOGNAME', 'builder')
+    monkeypatch.delattr(os, 'getuid', raising=False)
+    socket_path = get_default_socket_path()
+    assert socket_path is None or socket_path.endswith('pyqtinstaller-builder.sock')
@@ -1,9 +1,365 @@
+import os
+import sys
+from collections import OrderedDict
+
 import pytest
 
 from setuptools import Distribution
 
-from pyqtinstaller import CompileCommand
+from pyqtinstaller import CompileCommand, compile_command
+from pyqtinstaller.compile_command import get_build_time, get_web_engine_locales
+from pyqtinstaller.filters import PathFilter, get_preset_patterns
+from pyqtinstaller.progress import ProgressReporter
+from pyqtinstaller.snapshot import FileSnapshot
+from pyqtinstaller.stages import Stage
+from pyqtinstaller.timings import TimingsDatabase, StageTiming, TOTAL
 
 def test_assertion_error_if_qmake_path_not_provided():
     with pytest.raises(AssertionError):
-        CompileCommand(Distribution()).finalize_options()
\ No newline at end of file
+        CompileCommand(Distribution()).finalize_options()
+
+def test_build_server_is_only_probed_when_configured(monkeypatch):
+    monkeypatch.delenv('PYQTINSTALLER_BUILD_SERVER', raising=False)
+    monkeypatch.setattr(compile_command, 'connect', lambda socket_path: pytest.fail('probed the build server'))
+    with pytest.raises(AssertionError):
+        CompileCommand(Distribution()).finalize_options()
+
+def test_assert_call_takes_subprocess_arguments(tmpdir):
+    output = tmpdir.join('output.txt')
+    with open(str(output), 'w') as fp:
+        CompileCommand.assert_call(f'"{sys.executable}" -c "print(1)"', shell=True, stdout=fp)
+    assert output.read().strip() == '1'
+    with pytest.raises(AssertionError):
+        compile_command.assert_call([sys.executable, '-c', 'import sys; sys.exit(2)'])
+
+def test_tool_timeouts_are_keyed_on_steps():
+    command = CompileCommand(Distribution())
+    command.tool_timeouts = {'nmake': 3600.0, 'compile': 60.0, 'installer-delta': 30.0}
+    assert command._get_tool_timeout('nmake') == 3600.0
+    assert command._get_tool_timeout('compile-12') == 60.0
+    assert command._get_tool_timeout('installer-delta') == 30.0
+    assert command._get_tool_timeout('installer-portable') is None
+
+def test_changes_are_mapped_to_affected_stages():
+    command = CompileCommand(Distribution())
+    command.package = 'app'
+    command.resources_dirs = ['images']
+    command.languages = ['de']
+    assert command._get_affected_stages([os.path.join('app', 'view.qml')]) == {'resources', 'qml'}
+    assert command._get_affected_stages([os.path.join('app', 'main.py')]) == {'python'}
+    assert command._get_affected_stages([os.path.join('images', 'logo.png')]) == {'resources'}
+    assert command._get_affected_stages([os.path.join('translations', 'app_de.ts')]) == {'translations'}
+    assert command._get_affected_stages([os.path.join('app', 'notes.txt')]) == set()
+
+def test_workspace_mode_stages_version_outside_checkout(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    tmpdir.mkdir('app').join('__main__.py').write('')
+    command = CompileCommand(Distribution())
+    command.package = 'app'
+    command.app_name = 'My App'
+    command.build_dir = 'build'
+    command.workspace = True
+    command._app_version_c = '1.2.0'
+    command._snapshot = FileSnapshot()
+    command._apply_version()
+    command._remove_version()
+    assert not tmpdir.join('app', '__version__.py').exists()
+    assert tmpdir.join('build', 'workspace', 'app', '__version__.py').read() == "__version__ = '1.2.0'"
+    assert tmpdir.join('build', 'workspace', 'app', '__main__.py').exists()
+    assert command._project_file == os.path.join('build', 'workspace', 'MyApp.pdy')
+
+def test_workspace_mode_stages_files_generated_by_pre_build(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    tmpdir.mkdir('app').join('__main__.py').write('')
+    tmpdir.join('generate.py').write(
+        "def generate(command):\n    open('app/generated.py', 'w').write('VALUE = 1')\n"
+    )
+    command = CompileCommand(Distribution())
+    command.package = 'app'
+    command.app_name = 'My App'
+    command.build_dir = 'build'
+    command.workspace = True
+    command.pre_build = ['generate.py:generate']
+    command._app_version_c = '1.2.0'
+    command._snapshot = FileSnapshot()
+    command._apply_version()
+    command._run_pre_build()
+    assert tmpdir.join('build', 'workspace', 'app', 'generated.py').read() == 'VALUE = 1'
+    assert tmpdir.join('build', 'workspace', 'app', '__version__.py').exists()
+    assert not tmpdir.join('app', '__version__.py').exists()
+
+def test_package_index_is_not_shared_with_pre_build_steps():
+    command = CompileCommand(Distribution())
+    command.package = 'app'
+    command.languages = []
+    command.external_packages = []
+    command.external_stdlib_modules = []
+    command._path_filter = PathFilter()
+    command.pre_build = []
+    assert command.get_shared_stage_keys()['py_packages'] == ('app', ((), ()))
+    command.pre_build = ['generate.py:generate']
+    assert command.get_shared_stage_keys()['py_packages'] is None
+
+def test_resume_restarts_from_first_invalidated_stage(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    source = tmpdir.join('source.txt')
+    source.write('a')
+    runs = []
+
+    def stage(name, fail=False):
+        def run():
+            if fail:
+                raise AssertionError(f'{name} failed')
+            runs.append(name)
+        return run
+
+    command = CompileCommand(Distribution())
+    command.app_name = 'My App'
+    command.build_dir = 'build'
+    command.external_exe_files = []
+    command._stage_results = {}
+    command._app_version_c = '1.0.0'
+    command.resume = True
+    command.timings_db = 'timings.sqlite3'
+    stages = [
+        Stage('first', stage('first'), lambda: ({}, [str(source)]), False),
+        Stage('second', stage('second', fail=True), lambda: ({}, []), False),
+        Stage('third', stage('third'), lambda: ({}, []), False)
+    ]
+    monkeypatch.setattr(command, '_get_stages', lambda: stages)
+    with pytest.raises(AssertionError):
+        command._build()
+    assert runs == ['first']
+
+    stages[1] = Stage('second', stage('second'), lambda: ({}, []), False)
+    command._build()
+    assert runs == ['first', 'second', 'third']
+    assert list(command.stage_timings) == ['second', 'third']
+
+    source.write('b')
+    command._build()
+    assert runs == ['first', 'second', 'third', 'first', 'second', 'third']
+
+def test_resume_after_pyqtdeploy_ignores_version_stamp(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    tmpdir.mkdir('app').join('__main__.py').write('')
+    runs = []
+
+    def stage(name, fail=False):
+        def run():
+            if fail:
+                raise AssertionError(f'{name} failed')
+            runs.append(name)
+        return run
+
+    command = CompileCommand(Distribution())
+    command.package = 'app'
+    command.app_name = 'My App'
+    command.build_dir = 'build'
+    command.workspace = False
+    command.compiled_packages = []
+    command.external_exe_files = []
+    command._stage_results = {}
+    command._app_version_c = '1.0.0'
+    command.resume = True
+    command.timings_db = 'timings.sqlite3'
+    monkeypatch.setattr(command, '_get_option_values', lambda names: {})
+    stages = [
+        Stage('project_file', stage('project_file'), command._get_project_file_inputs, True),
+        Stage('pyqtdeploy', stage('pyqtdeploy'), lambda: ({}, []), True),
+        Stage('binaries', stage('binaries', fail=True), lambda: ({}, []), False)
+    ]
+    monkeypatch.setattr(command, '_get_stages', lambda: stages)
+    with pytest.raises(AssertionError):
+        command._build()
+    assert runs == ['project_file', 'pyqtdeploy']
+    assert not tmpdir.join('app', '__version__.py').exists()
+
+    stages[2] = Stage('binaries', stage('binaries'), lambda: ({}, []), False)
+    command._build()
+    assert runs == ['project_file', 'pyqtdeploy', 'binaries']
+
+def test_reproducible_build_time_is_pinned_to_source_date_epoch(monkeypatch):
+    monkeypatch.setenv('SOURCE_DATE_EPOCH', '1546300800')
+    assert get_build_time(True).strftime('%Y%m%d%H%M%S') == '20190101000000'
+
+def test_package_index_is_sorted(tmpdir):
+    app = tmpdir.mkdir('app')
+    for name in ['zeta.py', 'alpha.py', 'mid.py']:
+        app.join(name).write('')
+    for name in ['views', 'models']:
+        app.mkdir(name).join('__init__.py').write('')
+    command = CompileCommand(Distribution())
+    command._indexed_files = set()
+    command._path_filter = PathFilter()
+    command._snapshot = FileSnapshot()
+    index = command._index_py_packages(str(tmpdir), 'app', str(tmpdir))
+    assert index['modules'] == ['alpha.py', 'mid.py', 'zeta.py']
+    assert [p['name'] for p in index['packages']] == ['models', 'views']
+
+def test_excluded_modules_are_not_frozen(tmpdir):
+    app = tmpdir.mkdir('app')
+    for name in ['main.py', 'conftest.py', 'main_test.py']:
+        app.join(name).write('# module')
+    app.mkdir('tests').join('test_main.py').write('# test')
+    app.mkdir('views').join('__init__.py').write('')
+    command = CompileCommand(Distribution())
+    command._indexed_files = set()
+    command._path_filter = PathFilter(get_preset_patterns(['tests']), ['main_test.py'])
+    command._snapshot = FileSnapshot()
+    command.excluded_files = OrderedDict()
+    index = command._index_py_packages(str(tmpdir), 'app', str(tmpdir))
+    assert index['modules'] == ['main.py', 'main_test.py']
+    assert [p['name'] for p in index['packages']] == ['views']
+    assert command.excluded_files == {'frozen packages': [2, 14]}
+
+def test_excluded_files_are_counted_per_rebuild(tmpdir, monkeypatch):
+    tmpdir.join('app', 'main_test.py').write('# test', ensure=True)
+    command = CompileCommand(Distribution())
+    monkeypatch.setattr(command, '_get_vc_env', lambda: {})
+    monkeypatch.setattr(command, '_create_app_resources', lambda: command._count_excluded(
+        'resources', str(tmpdir.join('app', 'main_test.py'))
+    ))
+    for _ in range(2):
+        command._rebuild({'resources'})
+        assert command.excluded_files == {'resources': [1, 6]}
+
+def test_report_fails_when_budget_exceeded(tmpdir, capsys):
+    command = CompileCommand(Distribution())
+    command.timings_db = str(tmpdir.join('timings.sqlite3'))
+    command.report_baseline = 5
+    command.report_threshold = 0.2
+    database = TimingsDatabase(command.timings_db)
+    for nmake in [10.0, 10.0, 20.0]:
+        database.record('build', '1.0.0', command._get_config_hash(), {
+            'nmake': StageTiming(nmake, 1, 10), TOTAL: StageTiming(nmake + 1, 2, 20)
+        })
+    command.budgets = {'nmake': 30.0}
+    command._report()
+    assert 'Stages slower than 20% over their baseline: nmake, total' in capsys.readouterr().out
+    command.budgets = {'total': 15.0}
+    with pytest.raises(AssertionError, match='total took 21.0s of 15.0s'):
+        command._report()
+
+def test_web_engine_locales_of_languages():
+    locales = ['de.pak', 'en-GB.pak', 'en-US.pak', 'fr.pak', 'pt-BR.pak', 'pt-PT.pak', 'zh-CN.pak']
+    assert get_web_engine_locales(locales, ['pt', 'en_GB']) == ['en-GB.pak', 'en-US.pak', 'pt-BR.pak', 'pt-PT.pak']
+    assert get_web_engine_locales(locales, ['de_AT']) == ['de.pak', 'en-US.pak']
+
+def test_web_engine_resources_are_copied_when_changed(tmpdir, capsys):
+    qt = tmpdir.mkdir('qt')
+    qt.join('bin', 'QtWebEngineProcess.exe').write('exe', ensure=True)
+    qt.join('resources', 'qtwebengine_resources.pak').write('resources', ensure=True)
+    for locale in ['de', 'en-US', 'fr']:
+        qt.join('translations', 'qtwebengine_locales', f'{locale}.pak').write(locale, ensure=True)
+    command = CompileCommand(Distribution())
+    command.qmake_path = str(qt.join('bin', 'qmake.exe'))
+    command.build_dir = str(tmpdir.join('build'))
+    command.languages = ['fr']
+    command.web_engine_language_locales = False
+    command.external_exe_files = []
+    command.file_origins = {}
+    command.jobs = 2
+    command._progress = ProgressReporter([], stream=None)
+    locales_dest = tmpdir.join('build', 'release', 'translations', 'qtwebengine_locales')
+
+    command._copy_qt_web_engine_resources()
+    assert sorted(os.listdir(str(locales_dest))) == ['de.pak', 'en-US.pak', 'fr.pak']
+    assert command.file_origins['translations/qtwebengine_locales/de.pak'] == 'qt_web_engine'
+    assert 'Copied 5 of 5' in capsys.readouterr().out
+
+    command.web_engine_language_locales = True
+    command._copy_qt_web_engine_resources()
+    assert sorted(os.listdir(str(locales_dest))) == ['en-US.pak', 'fr.pak']
+    assert 'Copied 0 of 4' in capsys.readouterr().out
+    assert command.external_exe_files == ['QtWebEngineProcess.exe']
+
+def test_clean_keeps_web_engine_resources(tmpdir, capsys):
+    qt = tmpdir.mkdir('qt')
+    qt.join('bin', 'QtWebEngineProcess.exe').write('exe', ensure=True)
+    qt.join('resources', 'qtwebengine_resources.pak').write('resources', ensure=True)
+    qt.join('translations', 'qtwebengine_locales', 'fr.pak').write('fr', ensure=True)
+    command = CompileCommand(Distribution())
+    command.qmake_path = str(qt.join('bin', 'qmake.exe'))
+    command.build_dir = str(tmpdir.join('build'))
+    command.qt_modules = ['QtWebEngine']
+    command.languages = ['fr']
+    command.web_engine_language_locales = True
+    command.external_exe_files = []
+    command.file_origins = {}
+    command.jobs = 2
+    command._progress = ProgressReporter([], stream=None)
+    command._copy_qt_web_engine_resources()
+    tmpdir.join('build', 'release', 'app.exe').write('app')
+    command._save_file_origins()
+    capsys.readouterr()
+
+    command.file_origins = {}
+    command._clean()
+    assert not tmpdir.join('build', 'release', 'app.exe').exists()
+    assert command.file_origins['translations/qtwebengine_locales/fr.pak'] == 'qt_web_engine'
+    command._copy_qt_web_engine_resources()
+    assert 'Copied 0 of 3' in capsys.readouterr().out
+
+    command.qt_modules = ['QtWidgets']
+    command._clean()
+    assert not tmpdir.join('build').exists()
+
+def test_plugins_are_deployed_for_qml_of_resources_dirs(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    tmpdir.join('app', 'main.py').write('', ensure=True)
+    tmpdir.join('resources', 'main.qml').write('import QtQuick 2.12\n', ensure=True)
+    for plugin in ['scenegraph/qsgd3d12backend.dll', 'sqldrivers/qsqlite.dll']:
+        tmpdir.join('build', 'release', *plugin.split('/')).write('', ensure=True)
+    command = CompileCommand(Distribution())
+    command.package = 'app'
+    command.build_dir = 'build'
+    command.resources_dirs = ['resources']
+    command.qt_modules = []
+    command.qt_plugins = []
+    command.file_origins = {}
+    command._snapshot = FileSnapshot()
+    assert command._get_windeployqt_plugin_args() == []
+
+    command.prune_qt_plugins = True
+    assert command._get_windeployqt_plugin_args() == ['--qmldir', str(tmpdir.join('resources')), '--no-translations']
+    command._prune_qt_plugins(command._get_qml_files())
+    assert tmpdir.join('build', 'release', 'scenegraph', 'qsgd3d12backend.dll').exists()
+    assert not tmpdir.join('build', 'release', 'sqldrivers').exists()
+
+def test_qml_caches_are_compiled_once(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    tmpdir.join('qmlcachegen.py').write('''import sys
+args = sys.argv[1:]
+with open(args[args.index('-o') + 1], 'w') as fp:
+    fp.write('compiled ' + open(args[-1]).read())
+with open('invocations.log', 'a') as fp:
+    fp.write(args[-1] + '\\n')
+''')
+    for name in ['main.qml', 'views/list.qml']:
+        tmpdir.join('resources', *name.split('/')).write(name, ensure=True)
+        tmpdir.join('build', 'release', 'resources', *name.split('/')).write(name, ensure=True)
+    command = CompileCommand(Distribution())
+    command.build_dir = 'build'
+    command.resources_dirs = ['resources']
+    command.qml_cache_tool = f'"{sys.executable}" qmlcachegen.py -o {{output}} {{input}}'
+    command.qmake_path = 'qmake'
+    command.timings_db = 'timings.sqlite3'
+    command.jobs = 2
+    command.quiet_tools = True
+    command.tool_timeouts = {}
+    command.tool_results = []
+    command.file_origins = {}
+    command._snapshot = FileSnapshot()
+
+    command._compile_qml_caches()
+    assert tmpdir.join('build', 'release', 'resources', 'views', 'list.qmlc').read() == 'compiled views/list.qml'
+    assert command.file_origins['resources/main.qmlc'] == 'qml_cache'
+    assert len(tmpdir.join('invocations.log').readlines()) == 2
+
+    tmpdir.join('build').remove()
+    tmpdir.join('build', 'release', 'resources', 'main.qml').write('main.qml', ensure=True)
+    command._compile_qml_caches()
+    assert tmpdir.join('build', 'release', 'resources', 'main.qmlc').read() == 'compiled main.qml'
+    assert not tmpdir.join('build', 'release', 'resources', 'views', 'list.qmlc').exists()
+    assert len(tmpdir.join('invocations.log').readlines()) == 2
@@ -0,0 +1,123 @@
+import os
+import sys
+import stat
+
+from pyqtinstaller.compiler_cache import (
+    CompilerCache, main, parse_gcc_args, parse_msvc_args, expand_response_files, split_msvc_batch
+)
+
+FAKE_COMPILER = '''#!{python}
+import sys
+args = sys.argv[1:]
+with open('invocations.log', 'a') as fp:
+    fp.write(' '.join(args) + '\\n')
+source = [a for a in args if a.endswith('.cpp')][0]
+with open(source) as fp:
+    content = fp.read()
+if '-E' in args:
+    sys.stdout.write(content)
+else:
+    with open(args[args.index('-o') + 1], 'w') as fp:
+        fp.write('object of ' + content)
+    sys.stdout.write('compiled ' + source + '\\n')
+'''
+
+# Compiles each source to the directory of -Fo, printing its name first as cl does
+FAKE_CL = '''#!{python}
+import sys
+args = sys.argv[1:]
+with open('invocations.log', 'a') as fp:
+    fp.write(' '.join(args) + '\\n')
+sources = [a for a in args if a.endswith('.cpp')]
+if '-E' in args:
+    sys.stdout.write(open(sources[0]).read())
+    sys.exit(0)
+output_dir = [a[3:] for a in args if a.startswith('-Fo')][0]
+for source in sources:
+    sys.stdout.write(source + '\\n')
+    if 'warn' in open(source).read():
+        sys.stdout.write(source + '(1): warning C4100\\n')
+    with open(output_dir + source[:-len('.cpp')] + '.obj', 'w') as fp:
+        fp.write('object of ' + open(source).read())
+'''
+
+def write_compiler(tmpdir, name='fakecc', script=FAKE_COMPILER):
+    compiler = tmpdir.join(name)
+    compiler.write(script.format(python=sys.executable))
+    os.chmod(str(compiler), os.stat(str(compiler)).st_mode | stat.S_IEXEC)
+    return str(compiler)
+
+def compile_calls(tmpdir):
+    return [l for l in tmpdir.join('invocations.log').read().splitlines() if '-E' not in l.split()]
+
+def test_objects_are_restored_from_cache(tmpdir, capfd):
+    compiler = write_compiler(tmpdir)
+    cache_dir = str(tmpdir.join('cache'))
+    tmpdir.join('main.cpp').write('int main() {}')
+    with tmpdir.as_cwd():
+        assert main(['--cache-dir', cache_dir, compiler, '-c', '-O2', '-o', 'main.o', 'main.cpp']) == 0
+        os.remove('main.o')
+        assert main(['--cache-dir', cache_dir, compiler, '-c', '-O2', '-o', 'main.o', 'main.cpp']) == 0
+        assert tmpdir.join('main.o').read() == 'object of int main() {}'
+        assert len(compile_calls(tmpdir)) == 1
+        assert capfd.readouterr().out == 'compiled main.cpp\n' * 2
+
+        # Changing the flags or the preprocessed source misses the cache
+        assert main(['--cache-dir', cache_dir, compiler, '-c', '-O1', '-o', 'main.o', 'main.cpp']) == 0
+        tmpdir.join('main.cpp').write('int main() { return 1; }')
+        assert main(['--cache-dir', cache_dir, compiler, '-c', '-O1', '-o', 'main.o', 'main.cpp']) == 0
+        assert len(compile_calls(tmpdir)) == 3
+
+def test_uncacheable_compilations_are_passed_through(tmpdir):
+    compiler = write_compiler(tmpdir)
+    tmpdir.join('main.cpp').write('int main() {}')
+    with tmpdir.as_cwd():
+        for _ in range(2):
+            assert main(['--cache-dir', str(tmpdir.join('cache')), compiler, '-c', '-MD', '-o', 'main.o', 'main.cpp']) == 0
+    assert len(compile_calls(tmpdir)) == 2
+    assert not tmpdir.join('cache').check()
+
+def test_cache_evicts_least_recently_used(tmpdir):
+    cache = CompilerCache(str(tmpdir.join('cache')), max_size=1)
+    for index in range(3):
+        tmpdir.join('object').write('x' * 400 * 1024)
+        cache.put(f'{index:02}key', str(tmpdir.join('object')), b'')
+        os.utime(cache._get_entry(f'{index:02}key') + '.obj', (index, index))
+    assert cache.get('00key', str(tmpdir.join('restored'))) is None
+    assert cache.get('02key', str(tmpdir.join('restored'))) == b''
+
+def test_arguments_are_parsed(tmpdir):
+    tmpdir.join('args.rsp').write('-c -EHsc -O2')
+    args = expand_response_files(['@' + str(tmpdir.join('args.rsp')), '-Foobjects\\', 'main.cpp'])
+    assert parse_msvc_args(args) == (['-c', '-EHsc', '-O2'], 'main.cpp', 'objects\\main.obj')
+    assert parse_msvc_args(['-c', '-Zi', 'main.cpp']) is None
+    assert parse_gcc_args(['-c', '-omain.o', 'main.cpp']) == (['-c'], 'main.cpp', 'main.o')
+    assert parse_gcc_args(['-o', 'app', 'main.o']) is None
+
+def test_batch_mode_compilations_are_cached_per_source(tmpdir, capfd):
+    compiler = write_compiler(tmpdir, 'cl', FAKE_CL)
+    cache_dir = str(tmpdir.join('cache'))
+    tmpdir.mkdir('release')
+    for name in ['a', 'b', 'c']:
+        tmpdir.join(f'{name}.cpp').write(f'int {name}; // warn' if name == 'b' else f'int {name};')
+    args = ['-c', '-O2', '-Forelease/', 'a.cpp', 'b.cpp']
+    with tmpdir.as_cwd():
+        assert main(['--cache-dir', cache_dir, compiler] + args) == 0
+        assert compile_calls(tmpdir) == ['-c -O2 -Forelease/ a.cpp b.cpp']
+        capfd.readouterr()
+
+        os.remove('release/a.obj')
+        os.remove('release/b.obj')
+        assert main(['--cache-dir', cache_dir, compiler, '-c', '-O2', '-Forelease/', 'a.cpp', 'b.cpp', 'c.cpp']) == 0
+    # Only the source which isn't cached is compiled
+    assert compile_calls(tmpdir)[1:] == ['-c -O2 -Forelease/ c.cpp']
+    assert tmpdir.join('release', 'b.obj').read() == 'object of int b; // warn'
+    assert capfd.readouterr().out == 'a.cpp\nb.cpp\nb.cpp(1): warning C4100\nc.cpp\n'
+
+def test_batches_are_split_by_source():
+    assert split_msvc_batch(['-c', '-O2', '-Forelease\\', 'a.cpp', 'b.cpp']) == [
+        ['-c', '-O2', '-Forelease\\', 'a.cpp'], ['-c', '-O2', '-Forelease\\', 'b.cpp']
+    ]
+    assert split_msvc_batch(['-c', '-Foa.obj', 'a.cpp', 'b.cpp']) is None
+    assert split_msvc_batch(['-c', 'src/a.cpp', 'other/a.cpp']) is None
+    assert split_msvc_batch(['-c', 'a.cpp']) is None
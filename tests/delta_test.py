@@ -0,0 +1,73 @@
+import os
+
+from pyqtinstaller.compile_command import get_template
+from pyqtinstaller.delta import create_delta, get_patch_candidates, store_objects
+from pyqtinstaller.manifest import Manifest
+
+def _write(directory, relative_path, content):
+    filename = directory.join(*relative_path.split('/'))
+    filename.dirpath().ensure(dir=True)
+    filename.write_binary(content)
+
+def _create_releases(tmpdir):
+    release = tmpdir.join('release')
+    _write(release, 'Qt5Core.dll', b'core' * 100)
+    _write(release, 'packages/app/old.py', b'old')
+    _write(release, 'packages/app/main.py', b'main')
+    base = Manifest.create(str(release))
+    base.app_version = '1.0.0'
+    release.join('packages', 'app', 'old.py').remove()
+    _write(release, 'Qt5Core.dll', b'CORE' * 100)
+    _write(release, 'packages/app/new.py', b'new')
+    current = Manifest.create(str(release))
+    current.app_version = '1.0.1'
+    return release, base, current
+
+def test_delta_contains_added_and_changed_files(tmpdir):
+    release, base, current = _create_releases(tmpdir)
+    delta_dir = tmpdir.join('delta')
+    diff = create_delta(str(release), current, base, str(delta_dir))
+    assert diff == (['packages/app/new.py'], ['Qt5Core.dll'], ['packages/app/old.py'])
+    assert delta_dir.join('files', 'packages', 'app', 'new.py').read_binary() == b'new'
+    assert delta_dir.join('files', 'Qt5Core.dll').read_binary() == b'CORE' * 100
+    assert not delta_dir.join('files', 'packages', 'app', 'main.py').check()
+    assert delta_dir.join('deletions.txt').read() == 'packages/app/old.py\n'
+
+def test_patched_files_are_left_out_of_delta_files(tmpdir):
+    release, base, current = _create_releases(tmpdir)
+    delta_dir = tmpdir.join('delta')
+    diff = create_delta(str(release), current, base, str(delta_dir), ['Qt5Core.dll'])
+    assert diff.changed == ['Qt5Core.dll']
+    assert not delta_dir.join('files', 'Qt5Core.dll').check()
+    assert delta_dir.join('files', 'packages', 'app', 'new.py').read_binary() == b'new'
+
+def test_large_changed_binaries_are_patched_from_stored_objects(tmpdir):
+    release, base, current = _create_releases(tmpdir)
+    diff = current.diff(base)
+    assert get_patch_candidates(diff, current, base, 400) == ['Qt5Core.dll']
+    assert get_patch_candidates(diff, current, base, 401) == []
+
+    objects_dir = tmpdir.join('objects')
+    objects_dir.ensure(dir=True)
+    objects_dir.join('stale').write('stale')
+    store_objects(str(release), current, str(objects_dir), 400)
+    assert os.listdir(str(objects_dir)) == [current.get_hash('Qt5Core.dll')]
+
+def test_delta_installer_only_updates_its_base_version():
+    script = get_template('setup.iss').render(
+        app_name='App',
+        resources_dirs=['resources'],
+        additional_files=[],
+        additional_temp_files=[],
+        external_exe_files=[],
+        run_commands=[],
+        delta=True,
+        delta_base_version='1.0.0',
+        delta_removed=['packages/app/old.py'],
+        delta_has_files=True
+    )
+    assert 'Type: files; Name: "{app}\\packages\\app\\old.py"' in script
+    assert 'Source: "files\\*"; DestDir: "{app}"; Flags: recursesubdirs createallsubdirs' in script
+    assert '{app}\\packages"' not in script
+    assert 'resources' not in script
+    assert "(installed_version = '1.0.0')" in script
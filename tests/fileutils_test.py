@@ -0,0 +1,26 @@
+import os
+
+from pyqtinstaller.fileutils import write_if_changed, copy_files_if_changed
+
+def test_unchanged_content_is_not_rewritten(tmpdir):
+    filename = str(tmpdir.join('setup.iss'))
+    assert write_if_changed(filename, 'content\n')
+    os.utime(filename, (0, 0))
+    assert not write_if_changed(filename, 'content\n')
+    assert os.stat(filename).st_mtime == 0
+    assert write_if_changed(filename, 'changed\n')
+    assert tmpdir.join('setup.iss').read() == 'changed\n'
+    assert os.listdir(str(tmpdir)) == ['setup.iss']
+
+def test_only_missing_or_stale_copies_are_made(tmpdir):
+    sources = [tmpdir.join('source', f'{l}.pak') for l in ['de', 'fr', 'it']]
+    for source in sources:
+        source.write(source.purebasename, ensure=True)
+    copies = [(str(s), str(tmpdir.join('dest', 'locales', s.basename))) for s in sources]
+    assert copy_files_if_changed(copies, jobs=2) == [d for _, d in copies]
+    assert tmpdir.join('dest', 'locales', 'fr.pak').read() == 'fr'
+    assert copy_files_if_changed(copies) == []
+
+    sources[1].write('changed')
+    assert copy_files_if_changed(copies) == [copies[1][1]]
+    assert tmpdir.join('dest', 'locales', 'fr.pak').read() == 'changed'
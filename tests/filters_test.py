@@ -0,0 +1,43 @@
+import shutil
+
+import pytest
+
+from pyqtinstaller.filters import PathFilter, get_preset_patterns, matches
+
+def test_pattern_kinds():
+    assert matches('tests/', 'numpy/tests/test_core.py')
+    assert matches('tests/', 'numpy/tests', is_dir=True)
+    assert matches('numpy/tests/', 'numpy/tests/data/x.py')
+    assert not matches('numpy/tests/', 'scipy/numpy/tests/x.py')
+    assert not matches('tests/', 'numpy/tests.py')
+    assert matches('numpy/*.pyi', 'numpy/core.pyi')
+    assert not matches('numpy/*.pyi', 'scipy/core.pyi')
+    assert matches('*.md', 'numpy/docs/README.md')
+    assert not matches('*.md', 'numpy/README.md', is_dir=True)
+
+def test_includes_override_excludes():
+    path_filter = PathFilter(get_preset_patterns(['tests', 'stubs']), ['keep/tests/'])
+    assert path_filter.is_excluded('numpy/tests/test_core.py')
+    assert path_filter.is_excluded('numpy/__init__.pyi')
+    assert not path_filter.is_excluded('keep/tests', is_dir=True)
+    assert not path_filter.is_excluded('numpy/core.py')
+
+def test_unknown_presets_are_rejected():
+    with pytest.raises(AssertionError):
+        get_preset_patterns(['tests', 'unknown'])
+
+def test_copytree_reports_excluded_files(tmpdir):
+    package = tmpdir.mkdir('site-packages').mkdir('numpy')
+    package.join('core.py').write('core')
+    package.join('core.pyi').write('stub')
+    package.mkdir('tests').join('test_core.py').write('test')
+    package.mkdir('__pycache__').join('core.cpython-36.pyc').write('pyc')
+    excluded = []
+    path_filter = PathFilter(get_preset_patterns(['tests', 'stubs']))
+    shutil.copytree(
+        str(package),
+        str(tmpdir.join('packages', 'numpy')),
+        ignore=path_filter.get_copytree_ignore(str(tmpdir.join('site-packages')), excluded.append)
+    )
+    assert [str(f) for f in tmpdir.join('packages').visit() if f.check(file=True)] == [str(tmpdir.join('packages', 'numpy', 'core.py'))]
+    assert sorted(excluded) == [str(package.join('core.pyi')), str(package.join('tests'))]
@@ -0,0 +1,74 @@
+import sys
+
+from pyqtinstaller import import_profile
+from pyqtinstaller.import_profile import (
+    ModuleImport, START_MARKER, END_MARKER, parse_importtime, run_profile, get_recommendations
+)
+
+_IMPORTTIME = f'''import time: self [us] | cumulative | imported package
+import time:       100 |        100 | site
+{START_MARKER}
+import time:       300 |        300 |     numpy.core
+import time:       200 |        500 |   numpy
+import time:        50 |        550 | app.models
+import time:        10 |         10 | app.views
+{END_MARKER}
+import time:        10 |         10 | json
+'''
+
+def test_parse_importtime_nesting():
+    imports = parse_importtime(_IMPORTTIME)
+    assert imports == {
+        'numpy.core': (300, 300, 'numpy'),
+        'numpy': (200, 500, 'app.models'),
+        'app.models': (50, 550, None),
+        'app.views': (10, 10, None)
+    }
+
+def test_recommendations():
+    imports = {
+        'app.models': ModuleImport(50, 30050, None, 100, 'application', False),
+        'attr': ModuleImport(10000, 30000, 'app.models', 1000, 'external', False),
+        'attr._make': ModuleImport(20000, 20000, 'attr', 1000, 'external', False),
+        'numpy': ModuleImport(9000, 9000, None, 1000, 'external', True),
+        'xml': ModuleImport(300, 300, 'attr._make', 10, 'stdlib', False),
+        'json': ModuleImport(300, 300, 'attr._make', 10, 'stdlib', False)
+    }
+    recommendations = get_recommendations(imports, [], ['json'], 5000, 8000)
+    assert [(r.action, r.module, r.time_us) for r in recommendations] == [
+        ('compiled_packages', 'attr', 30000),
+        ('lazy', 'attr', 30000),
+        ('lazy', 'numpy', 9000),
+        ('stdlib_modules', 'xml', 300)
+    ]
+    assert recommendations[1].reason == 'imported by app.models'
+    assert recommendations[2].reason == 'imported by the entrypoint'
+
+def test_profile_stops_once_module_is_imported(tmpdir, monkeypatch):
+    app = tmpdir.mkdir('app')
+    app.join('__init__.py').write('')
+    app.join('__main__.py').write('from . import views\nfrom . import never\n')
+    app.join('views.py').write('import json\n')
+    monkeypatch.chdir(tmpdir)
+    imports = run_profile(sys.executable, 'app/__main__.py', 'app', until='app.views', timeout=30)
+    assert 'app.never' not in imports
+    assert imports['app.views'].origin == 'application'
+    assert imports['app.views'].size == len('import json\n')
+    assert imports['app.views'].cumulative_us >= imports['app.views'].self_us
+
+def test_imports_are_timed_without_importtime(tmpdir, monkeypatch):
+    get_run_command = import_profile.get_run_command
+    monkeypatch.setattr(import_profile, 'get_run_command', lambda *args: [
+        arg for arg in get_run_command(*args) if arg not in ['-X', 'importtime']
+    ])
+    app = tmpdir.mkdir('app')
+    app.join('__init__.py').write('')
+    app.join('__main__.py').write('from . import views\n')
+    app.join('views.py').write('from . import models\n')
+    app.join('models.py').write('')
+    monkeypatch.chdir(tmpdir)
+    imports = run_profile(sys.executable, 'app/__main__.py', 'app', timeout=30)
+    assert imports['app.models'].parent == 'app.views'
+    assert imports['app.views'].parent is None
+    views = imports['app.views']
+    assert views.cumulative_us == views.self_us + imports['app.models'].cumulative_us
@@ -0,0 +1,26 @@
+import sys
+import json
+import subprocess
+
+import pytest
+
+_CHECK_MODULES = '''
+import sys, json
+import pyqtinstaller
+loaded = [m for m in ['pyqtinstaller.compile_command', 'pyqtinstaller._version', 'jinja2', 'asyncio'] if m in sys.modules]
+command = pyqtinstaller.CompileCommand
+print(json.dumps({'before': loaded, 'after': 'pyqtinstaller.compile_command' in sys.modules, 'name': command.__name__}))
+'''
+
+def test_commands_are_imported_on_first_access():
+    output = subprocess.check_output([sys.executable, '-c', _CHECK_MODULES])
+    assert json.loads(output.decode('utf8')) == {'before': [], 'after': True, 'name': 'CompileCommand'}
+
+def test_lazy_attributes():
+    import pyqtinstaller
+    from pyqtinstaller.analyze_command import AnalyzeCommand
+    assert pyqtinstaller.AnalyzeCommand is AnalyzeCommand
+    assert isinstance(pyqtinstaller.__version__, str)
+    assert 'CompileCommand' in dir(pyqtinstaller)
+    with pytest.raises(AttributeError):
+        pyqtinstaller.missing # pylint: disable=pointless-statement
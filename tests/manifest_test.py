@@ -0,0 +1,47 @@
+import os
+
+from pyqtinstaller import manifest
+from pyqtinstaller.manifest import Manifest, hash_file
+
+def _write(tmpdir, relative_path, content):
+    filename = tmpdir.join(*relative_path.split('/'))
+    filename.dirpath().ensure(dir=True)
+    filename.write_binary(content)
+    return str(filename)
+
+def test_small_and_mapped_files_hash_alike(tmpdir, monkeypatch):
+    filename = _write(tmpdir, 'Qt5Core.dll', b'dll' * 1000)
+    expected = hash_file(filename, 3000)
+    monkeypatch.setattr(manifest, 'MMAP_THRESHOLD', 1)
+    assert hash_file(filename, 3000) == expected
+
+def test_unchanged_files_reuse_cached_hashes(tmpdir, monkeypatch):
+    root = tmpdir.join('release')
+    _write(root, 'app.exe', b'exe')
+    _write(root, 'platforms/qwindows.dll', b'dll')
+    cached = Manifest.create(str(root))
+    assert list(cached.entries) == ['app.exe', 'platforms/qwindows.dll']
+
+    hashed = []
+    monkeypatch.setattr(manifest, 'hash_file', lambda f, s: hashed.append(f) or 'hash')
+    _write(root, 'app.exe', b'changed exe')
+    current = Manifest.create(str(root), cached, jobs=2)
+    assert hashed == [str(root.join('app.exe'))]
+    assert current.get_hash('platforms/qwindows.dll') == cached.get_hash('platforms/qwindows.dll')
+
+def test_diff_and_round_trip(tmpdir):
+    root = tmpdir.join('release')
+    _write(root, 'app.exe', b'exe')
+    _write(root, 'removed.dll', b'dll')
+    previous = Manifest.create(str(root))
+    os.remove(str(root.join('removed.dll')))
+    _write(root, 'app.exe', b'changed exe')
+    _write(root, 'added.dll', b'dll')
+    current = Manifest.create(str(root))
+
+    filename = str(tmpdir.join('state', 'manifest.json'))
+    current.save(filename)
+    loaded = Manifest.load(filename)
+    assert loaded.entries == current.entries
+    assert loaded.diff(previous) == (['added.dll'], ['app.exe'], ['removed.dll'])
+    assert Manifest.load(str(tmpdir.join('missing.json'))).entries == {}
@@ -0,0 +1,50 @@
+from os import path
+
+import pytest
+
+from pyqtinstaller.matrix import load_manifest, get_configurations, MatrixRunner
+
+class FakeCommand:
+    def __init__(self, keys):
+        self.keys = keys
+        self.runs = []
+
+    def get_shared_stage_keys(self):
+        return self.keys
+
+    def run_shared_stage(self, stage, stage_dir):
+        self.runs.append(stage)
+        return f'{stage} result'
+
+def test_configurations_merge_base_options_with_manifest(tmpdir):
+    manifest = tmpdir.join('matrix.cfg')
+    manifest.write('[DEFAULT]\nqt-modules = QtCore,QtGui\n[console]\nwin-console = true\n[gui]\napp_name = My Gui\n')
+    configurations = get_configurations(
+        {'app_name': 'My App', 'matrix': str(manifest), 'build_dir': 'out'},
+        load_manifest(str(manifest)),
+        'out'
+    )
+    assert list(configurations) == ['console', 'gui']
+    assert configurations['console']['win_console'] == 'true'
+    assert configurations['console']['app_name'] == 'My App'
+    assert configurations['console']['build_dir'] == path.join('out', 'console')
+    assert configurations['gui']['app_name'] == 'My Gui'
+    assert configurations['gui']['qt_modules'] == 'QtCore,QtGui'
+    assert configurations['gui']['workspace']
+    assert 'matrix' not in configurations['gui']
+
+def test_configurations_must_use_different_build_dirs():
+    with pytest.raises(AssertionError):
+        get_configurations({}, {'a': {'build_dir': 'out'}, 'b': {'build_dir': 'out'}}, 'build')
+
+def test_shared_stages_run_once_per_distinct_inputs(tmpdir):
+    commands = {
+        'a': FakeCommand({'vc_env': ('vc', 'amd64'), 'translations': ('app', ('de',))}),
+        'b': FakeCommand({'vc_env': ('vc', 'amd64'), 'translations': ('app', ('fr',))}),
+        'c': FakeCommand({'vc_env': ('vc', 'amd64'), 'translations': None})
+    }
+    shared_stages = MatrixRunner({}, str(tmpdir)).run_shared_stages(commands)
+    assert commands['a'].runs == ['vc_env', 'translations']
+    assert commands['b'].runs == ['translations']
+    assert commands['c'].runs == []
+    assert shared_stages['c'] == {'vc_env': 'vc_env result'}
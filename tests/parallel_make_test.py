@@ -0,0 +1,98 @@
+import os
+import sys
+
+from setuptools import Distribution
+
+from pyqtinstaller import CompileCommand
+from pyqtinstaller.parallel_make import (
+    get_compile_jobs, get_newest_header, is_up_to_date, read_makefile_variables
+)
+
+FAKE_COMPILER = '''
+import sys
+args = sys.argv[1:]
+output = args[args.index('-o') + 1]
+with open(output, 'w') as fp:
+    fp.write('compiled ' + args[-1])
+'''
+
+MAKEFILE = '''
+CC            = {compiler}
+CXX           = $(CC)
+CFLAGS        = -O2
+CXXFLAGS      = -O2 -std=c++11
+INCPATH       = -I. -Iinclude
+OBJECTS_DIR   = objects/
+SOURCES       = main.cpp \\
+\t\tfrozen.c
+OBJECTS       = objects/main.o \\
+\t\tobjects/frozen.o
+
+all: $(OBJECTS)
+\t$(CXX) -o app $(OBJECTS)
+'''
+
+def write_project(tmpdir):
+    tmpdir.join('fake_cc.py').write(FAKE_COMPILER)
+    compiler = '"{}" fake_cc.py'.format(sys.executable)
+    tmpdir.join('Makefile').write(MAKEFILE.format(compiler=compiler))
+    tmpdir.join('main.cpp').write('int main() {}')
+    tmpdir.join('frozen.c').write('')
+    return compiler
+
+def test_makefile_variables_are_read_across_continued_lines(tmpdir):
+    write_project(tmpdir)
+    variables = read_makefile_variables(str(tmpdir.join('Makefile')))
+    assert variables['SOURCES'].split() == ['main.cpp', 'frozen.c']
+    assert variables['CXX'] == '$(CC)'
+
+def test_compile_jobs_are_read_from_makefile(tmpdir):
+    compiler = write_project(tmpdir)
+    jobs = get_compile_jobs(str(tmpdir.join('Makefile')))
+    assert [(j.source, j.object) for j in jobs] == [('main.cpp', 'objects/main.o'), ('frozen.c', 'objects/frozen.o')]
+    assert jobs[0].cmd.split() == compiler.split() + ['-c', '-O2', '-std=c++11', '-I.', '-Iinclude', '-o', 'objects/main.o', 'main.cpp']
+
+def test_objects_are_compiled_in_parallel_with_stand_in_compiler(tmpdir):
+    write_project(tmpdir)
+    command = CompileCommand(Distribution())
+    command.build_dir = str(tmpdir)
+    command.jobs = 2
+    command.quiet_tools = True
+    command.tool_timeouts = {}
+    command.tool_results = []
+    command._compile_objects(dict(os.environ))
+    assert tmpdir.join('objects', 'main.o').read() == 'compiled main.cpp'
+    assert tmpdir.join('objects', 'frozen.o').read() == 'compiled frozen.c'
+    assert all(is_up_to_date(j, str(tmpdir)) for j in get_compile_jobs(str(tmpdir.join('Makefile'))))
+    assert [step for step, _ in command.tool_results] == ['compile-0', 'compile-1']
+
+def test_objects_are_out_of_date_when_a_header_changes(tmpdir):
+    write_project(tmpdir)
+    tmpdir.join('Makefile').write('objects/main.o: main.cpp pyqtdeploy.h \\\n\t\tinclude/app.h\n', mode='a')
+    tmpdir.join('pyqtdeploy.h').write('')
+    tmpdir.join('include', 'app.h').write('', ensure=True)
+    for name in ['main.o', 'frozen.o']:
+        tmpdir.join('objects', name).write('', ensure=True)
+    main, frozen = get_compile_jobs(str(tmpdir.join('Makefile')))
+    assert main.depends == ['main.cpp', 'pyqtdeploy.h', os.path.join('include', 'app.h')]
+    assert frozen.depends is None
+
+    for name in ['main.cpp', 'frozen.c', 'pyqtdeploy.h', 'include/app.h']:
+        os.utime(str(tmpdir.join(name)), (1000, 1000))
+    for name in ['main.o', 'frozen.o']:
+        os.utime(str(tmpdir.join('objects', name)), (2000, 2000))
+    assert is_up_to_date(main, str(tmpdir), get_newest_header(str(tmpdir)))
+    assert is_up_to_date(frozen, str(tmpdir), get_newest_header(str(tmpdir)))
+
+    os.utime(str(tmpdir.join('include', 'app.h')), (3000, 3000))
+    assert not is_up_to_date(main, str(tmpdir), get_newest_header(str(tmpdir)))
+    # Objects without a rule are rebuilt when any header of the build directory changes
+    assert not is_up_to_date(frozen, str(tmpdir), get_newest_header(str(tmpdir)))
+
+def test_build_tool_command():
+    command = CompileCommand(Distribution())
+    command.jobs = 8
+    command.build_tool = 'C:\\Qt\\Tools\\jom.exe'
+    assert command._get_build_tool_cmd()[1:] == ['/J', '8']
+    command.build_tool = 'make'
+    assert command._get_build_tool_cmd() == ['make', '-j8']
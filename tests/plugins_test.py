@@ -0,0 +1,48 @@
+import os
+
+from pyqtinstaller.plugins import (
+    get_qml_imports, get_plugin_modules, get_plugin_selection, prune_plugins, prune_translations, is_language_used
+)
+
+def test_qml_imports_exclude_directory_imports(tmpdir):
+    qml = tmpdir.join('main.qml')
+    qml.write('import QtQuick 2.7\nimport QtQuick.Controls 2.2 as Controls\nimport "components"\nimport QtMultimedia 5.9\n')
+    assert get_qml_imports([str(qml)]) == ['QtMultimedia', 'QtQuick', 'QtQuick.Controls']
+
+def test_plugin_modules_include_qml_imports():
+    modules = get_plugin_modules(['QtCore', 'QtWidgets'], ['QtMultimedia', 'QtQuick.VirtualKeyboard.Styles'])
+    assert modules == ['QtCore', 'QtGui', 'QtMultimedia', 'QtVirtualKeyboard', 'QtWidgets']
+
+def test_selection_of_whole_type_overrides_plugins():
+    selection = get_plugin_selection(['QtGui', 'QtSql'], ['imageformats/qtiff', 'sqldrivers'])
+    assert selection['imageformats'] == {'qgif', 'qico', 'qjpeg', 'qtiff'}
+    assert selection['sqldrivers'] is None
+    assert 'styles' not in selection
+
+def test_unselected_plugins_are_pruned(tmpdir):
+    for filename in ['platforms/qwindows.dll', 'platforms/qminimal.dll', 'imageformats/qjpeg.dll',
+                     'imageformats/qwebp.dll', 'sqldrivers/qsqlodbc.dll', 'qml/QtQuick/qtquick2plugin.dll',
+                     'Qt5Core.dll']:
+        tmpdir.join(*filename.split('/')).write('plugin', ensure=True)
+    removed = prune_plugins(str(tmpdir), get_plugin_selection(['QtGui']))
+    assert sorted(os.path.relpath(f, str(tmpdir)).replace(os.sep, '/') for f, _ in removed) == [
+        'imageformats/qwebp.dll', 'platforms/qminimal.dll', 'sqldrivers/qsqlodbc.dll'
+    ]
+    assert sum(s for _, s in removed) == 3 * len('plugin')
+    assert not tmpdir.join('sqldrivers').exists()
+    assert tmpdir.join('qml', 'QtQuick', 'qtquick2plugin.dll').exists()
+    assert tmpdir.join('Qt5Core.dll').exists()
+
+def test_translations_of_other_languages_are_pruned(tmpdir):
+    for name in ['qt_de.qm', 'qtbase_de.qm', 'qt_pt_BR.qm', 'qt_zh_CN.qm', 'qtbase_fr.qm', 'app_zh.qm']:
+        tmpdir.join(name).write('')
+    tmpdir.mkdir('qtwebengine_locales')
+    removed = prune_translations(str(tmpdir), ['de', 'pt'])
+    assert [os.path.basename(f) for f, _ in removed] == ['qt_zh_CN.qm', 'qtbase_fr.qm']
+    assert sorted(os.listdir(str(tmpdir))) == ['app_zh.qm', 'qt_de.qm', 'qt_pt_BR.qm', 'qtbase_de.qm', 'qtwebengine_locales']
+
+def test_languages_match_across_regions():
+    assert is_language_used('pt_BR', ['pt'])
+    assert is_language_used('de', ['de_AT'])
+    assert is_language_used('en-GB', ['en_GB'])
+    assert not is_language_used('en_GB', ['en_US'])
@@ -0,0 +1,34 @@
+import sys
+import time
+
+import pytest
+
+from pyqtinstaller.process import assert_call, run_sync, run_tool, run_tools
+
+def python(code):
+    return [sys.executable, '-c', code]
+
+def test_output_is_written_to_log_and_console(tmpdir, capsys):
+    log_filename = str(tmpdir.join('logs', 'step.log'))
+    result = assert_call(python('print("compiling")'), log_filename)
+    assert result.returncode == 0
+    assert 'compiling' in tmpdir.join('logs', 'step.log').read()
+    assert 'compiling' in capsys.readouterr().out
+
+def test_output_is_not_written_to_console_without_tee(tmpdir, capsys):
+    assert_call(python('print("compiling")'), str(tmpdir.join('step.log')), tee=False)
+    assert 'compiling' not in capsys.readouterr().out
+
+def test_failed_tool_raises_assertion_error():
+    with pytest.raises(AssertionError, match='exited with code 3'):
+        assert_call(python('import sys; sys.exit(3)'))
+
+def test_tool_is_killed_after_timeout():
+    with pytest.raises(AssertionError, match='timed out'):
+        assert_call(python('import time; time.sleep(10)'), timeout=0.5)
+
+def test_tools_run_concurrently():
+    start = time.monotonic()
+    results = run_sync(run_tools(*[run_tool(python('import time; time.sleep(1)'), tee=False) for _ in range(3)]))
+    assert time.monotonic() - start < 2.5
+    assert [r.returncode for r in results] == [0, 0, 0]
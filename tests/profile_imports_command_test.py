@@ -0,0 +1,24 @@
+from collections import OrderedDict
+
+from setuptools import Distribution
+
+from pyqtinstaller import ProfileImportsCommand
+from pyqtinstaller.import_profile import ModuleImport
+
+def test_report_compares_with_previous_profile():
+    command = ProfileImportsCommand(Distribution())
+    command.top = 1
+    command.compiled_packages = []
+    command.stdlib_modules = []
+    command.freeze_threshold = 5
+    command.lazy_threshold = 20
+    previous = OrderedDict([('attr', ModuleImport(4000, 4000, None, 2048, 'external', False))])
+    imports = OrderedDict([
+        ('attr', ModuleImport(6000, 6000, None, 2048, 'external', False)),
+        ('json', ModuleImport(1000, 1000, None, 1024, 'stdlib', False))
+    ])
+    report = command.format_report(imports, previous).splitlines()
+    assert report[0] == 'Startup imports: 2 modules, 7.0ms (+3.0ms since the previous profile)'
+    assert report[3].split() == ['attr', '6.0ms', '+2.0ms', '1', '2.0KB', 'external']
+    assert report[-2].split() == ['Freeze', 'in', 'compiled_packages', 'attr', '6.0ms', '1', 'pure', 'python', 'modules,', '2.0KB']
+    assert report[-1].split()[:4] == ['Freeze', 'in', 'stdlib_modules', 'json']
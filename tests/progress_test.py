@@ -0,0 +1,46 @@
+import io
+
+from pyqtinstaller.progress import ProgressReporter, format_duration
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_remaining_time_is_estimated_from_previous_durations():
+    clock = Clock()
+    stream = io.StringIO()
+    reporter = ProgressReporter(['qmake', 'nmake', 'binaries'], {'qmake': 10, 'nmake': 100, 'binaries': 20}, stream, clock=clock)
+    reporter.finish_stage('qmake')
+    reporter.start_stage('nmake')
+    assert stream.getvalue() == '[2/3] nmake, about 2m00s remaining\n'
+    clock.now = 30
+    assert reporter.get_remaining() == 90
+    clock.now = 200
+    assert reporter.get_remaining() == 20
+
+def test_file_progress_is_throttled():
+    clock = Clock()
+    stream = io.StringIO()
+    reporter = ProgressReporter(['binaries'], {'binaries': 100}, stream, interval=2.0, clock=clock)
+    reporter.start_stage('binaries')
+    reporter.add_files(1000)
+    for index in range(1000):
+        clock.now = index / 100
+        reporter.advance()
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 5
+    assert lines[1] == '    binaries: 201/1000 files copied'
+    assert reporter.get_remaining() == 0
+
+def test_no_estimate_without_history():
+    reporter = ProgressReporter(['qmake', 'nmake'], {'qmake': 10}, None)
+    reporter.start_stage('qmake')
+    assert reporter.get_remaining() is None
+
+def test_durations_are_formatted():
+    assert format_duration(45) == '45s'
+    assert format_duration(750) == '12m30s'
+    assert format_duration(3720) == '1h02m'
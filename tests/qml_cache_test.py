@@ -0,0 +1,29 @@
+import os
+import sys
+
+from pyqtinstaller.qml_cache import QmlCache, get_key, get_tool_identity, get_output_filename
+
+def test_key_depends_on_content_time_and_tool(tmpdir):
+    qml = tmpdir.join('view.qml')
+    qml.write('Item {}')
+    os.utime(str(qml), (1, 1))
+    identity = get_tool_identity(f'"{sys.executable}" qmlcachegen.py -o {{output}} {{input}}')
+    key = get_key(str(qml), identity)
+    assert get_key(str(qml), identity) == key
+    assert get_key(str(qml), get_tool_identity(f'"{sys.executable}" other.py {{output}} {{input}}')) != key
+    os.utime(str(qml), (2, 2))
+    assert get_key(str(qml), identity) != key
+    qml.write('Rectangle {}')
+    os.utime(str(qml), (1, 1))
+    assert get_key(str(qml), identity) != key
+
+def test_compiled_files_are_restored_from_cache(tmpdir):
+    cache = QmlCache(str(tmpdir.join('cache')))
+    output = str(tmpdir.join(get_output_filename('view.qml')))
+    assert output.endswith('view.qmlc')
+    assert not cache.get('ab' * 32, output)
+    tmpdir.join('view.qmlc').write('compiled')
+    cache.put('ab' * 32, output)
+    os.remove(output)
+    assert cache.get('ab' * 32, output)
+    assert tmpdir.join('view.qmlc').read() == 'compiled'
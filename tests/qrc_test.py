@@ -0,0 +1,36 @@
+import pytest
+
+from pyqtinstaller.qrc import parse_compression_rules, get_compression_attributes, get_shard_names, shard_files
+from pyqtinstaller.templates import get_template
+
+def test_compression_attributes_of_first_matching_rule():
+    rules = parse_compression_rules(['*.png:none', 'app/qml/*:9:10', '*.qml:3'])
+    assert get_compression_attributes('app/images/logo.png', rules) == [('compress', '0'), ('threshold', '100')]
+    assert get_compression_attributes('app/qml/main.qml', rules) == [('compress', '9'), ('threshold', '10')]
+    assert get_compression_attributes('app/views/list.qml', rules) == [('compress', '3')]
+    assert get_compression_attributes('app/data.json', rules) == []
+
+def test_invalid_compression_rules_are_rejected():
+    for rule in ['*.png', '*.png:none:10', '*.qml:12', '*.qml:9:101']:
+        with pytest.raises(AssertionError):
+            parse_compression_rules([rule])
+
+def test_directory_shards_are_stable():
+    files = [f'app/{d}/view_{i}.qml' for d in ['main', 'settings', 'charts', 'dialogs'] for i in range(3)]
+    shards = shard_files(files, 3)
+    assert sorted(f for s in shards for f in s) == sorted(files)
+    for shard in shards:
+        assert len({f.split('/')[1] for f in shard}) * 3 == len(shard)
+    added = shard_files(files + ['app/charts/view_3.qml'], 3)
+    assert [s for s in added if 'app/charts/view_3.qml' not in s] == [s for s in shards if 'app/charts/view_0.qml' not in s]
+
+def test_size_shards_are_balanced():
+    sizes = {'a.qml': 50, 'b.qml': 40, 'c.qml': 30, 'd.qml': 20, 'e.qml': 10}
+    assert shard_files(list(sizes), 2, 'size', sizes.get) == [['a.qml', 'd.qml', 'e.qml'], ['b.qml', 'c.qml']]
+
+def test_single_shard_keeps_resource_file_name():
+    assert get_shard_names('app_resources', 1) == ['app_resources.qrc']
+    assert get_shard_names('app_resources', 2) == ['app_resources_0.qrc', 'app_resources_1.qrc']
+    qrc = get_template('resources.qrc').render({'files': [('app/main.qml', []), ('app/logo.png', [('compress', '0')])]})
+    assert '<file>app/main.qml</file>' in qrc
+    assert '<file compress="0">app/logo.png</file>' in qrc
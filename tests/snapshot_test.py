@@ -0,0 +1,47 @@
+import os
+from glob import glob
+
+from pyqtinstaller.snapshot import FileSnapshot
+from pyqtinstaller.stages import walk_files
+
+def _create_tree(tmpdir):
+    for filename in ['app/__init__.py', 'app/views/main.py', 'app/views/deep/more.py', 'app/.hidden.py',
+                     'app/__pycache__/main.cpython-36.pyc', 'pkg/sub/native.dll', 'pkg/sub/deep/other.dll',
+                     'pkg/top.dll', 'translations/app_fr.qm']:
+        tmpdir.join(*filename.split('/')).write('content', ensure=True)
+
+def test_glob_matches_glob_module(tmpdir):
+    _create_tree(tmpdir)
+    snapshot = FileSnapshot()
+    root = str(tmpdir)
+    assert snapshot.glob(os.path.join(root, 'app'), '**/*.py') == sorted(glob(f'{root}/app/**/*.py', recursive=True))
+    assert snapshot.glob(os.path.join(root, 'pkg'), '*/*.dll') == sorted(glob(f'{root}/pkg/*/*.dll'))
+    assert snapshot.glob(os.path.join(root, 'translations'), '*.qm') == [str(tmpdir.join('translations', 'app_fr.qm'))]
+
+def test_walk_files_matches_stages(tmpdir):
+    _create_tree(tmpdir)
+    root = str(tmpdir)
+    assert sorted(FileSnapshot().walk_files(root)) == sorted(walk_files(root))
+
+def test_directories_are_read_once(tmpdir):
+    _create_tree(tmpdir)
+    snapshot = FileSnapshot()
+    app = str(tmpdir.join('app'))
+    files = snapshot.walk_files(app)
+    matches = snapshot.glob(app, '**/*.py')
+    scans = snapshot.scans
+    assert snapshot.walk_files(app) == files
+    assert snapshot.glob(app, '**/*.py') == matches
+    assert snapshot.isfile(os.path.join(app, 'views', 'main.py'))
+    assert snapshot.scans == scans
+
+def test_invalidate_reads_written_directory_again(tmpdir):
+    _create_tree(tmpdir)
+    snapshot = FileSnapshot()
+    translations = str(tmpdir.join('translations'))
+    assert snapshot.listdir(translations) == ['app_fr.qm']
+    tmpdir.join('translations', 'app_de.qm').write('content')
+    assert snapshot.listdir(translations) == ['app_fr.qm']
+    snapshot.invalidate(translations)
+    assert snapshot.listdir(translations) == ['app_de.qm', 'app_fr.qm']
+    assert snapshot.stat(os.path.join(translations, 'app_de.qm')).st_size == len('content')
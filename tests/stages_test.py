@@ -0,0 +1,32 @@
+from pyqtinstaller.stages import StageJournal, get_fingerprint, walk_files
+
+def test_fingerprint_changes_with_input_files(tmpdir):
+    source = tmpdir.join('main.py')
+    source.write('a = 1')
+    fingerprint = get_fingerprint('', {'package': 'app'}, [str(source)])
+    assert fingerprint == get_fingerprint('', {'package': 'app'}, [str(source)])
+    assert fingerprint != get_fingerprint('previous', {'package': 'app'}, [str(source)])
+    assert fingerprint != get_fingerprint('', {'package': 'other'}, [str(source)])
+    source.write('a = 12')
+    assert fingerprint != get_fingerprint('', {'package': 'app'}, [str(source)])
+
+def test_journal_is_persisted_and_truncated_when_a_stage_is_rerun(tmpdir):
+    filename = str(tmpdir.join('build', 'stage_journal.json'))
+    journal = StageJournal(filename)
+    journal.record(0, 'clean', 'a', None, {})
+    journal.record(1, 'post_build', 'b', {'': 'build/release'}, {})
+    journal = StageJournal(filename)
+    assert journal.get_completed(1, 'post_build', 'b')['result'] == {'': 'build/release'}
+    assert journal.get_completed(1, 'post_build', 'c') is None
+    journal.record(0, 'clean', 'd', None, {})
+    assert StageJournal(filename).get_completed(1, 'post_build', 'b') is None
+
+def test_unserializable_results_are_not_recorded(tmpdir):
+    journal = StageJournal(str(tmpdir.join('stage_journal.json')))
+    journal.record(0, 'post_build', 'a', {'output': object()}, {})
+    assert journal.get_completed(0, 'post_build', 'a') is None
+
+def test_walk_files_skips_caches(tmpdir):
+    tmpdir.join('main.py').write('')
+    tmpdir.mkdir('__pycache__').join('main.cpython-36.pyc').write('')
+    assert walk_files(str(tmpdir)) == [str(tmpdir.join('main.py'))]
@@ -0,0 +1,38 @@
+import shutil
+
+from pyqtinstaller.templates import TEMPLATES_DIR, TEMPLATE_NAMES, compile_templates, load_template
+
+_CONFIG = {
+    'app_name': 'App',
+    'resources_dirs': ['resources'],
+    'additional_files': [],
+    'additional_temp_files': [],
+    'external_exe_files': [],
+    'run_commands': []
+}
+
+def _copy_templates(tmpdir):
+    templates_dir = tmpdir.join('templates')
+    templates_dir.ensure(dir=True)
+    for name in TEMPLATE_NAMES:
+        shutil.copy(f'{TEMPLATES_DIR}/{name}.jinja', str(templates_dir))
+    return templates_dir
+
+def test_compiled_templates_render_as_source(tmpdir):
+    templates_dir = _copy_templates(tmpdir)
+    compiled_dir = tmpdir.join('compiled')
+    compile_templates(str(templates_dir), str(compiled_dir))
+    compiled = load_template('setup.iss', str(templates_dir), str(compiled_dir))
+    source = load_template('setup.iss', str(templates_dir), str(tmpdir.join('missing')))
+    assert compiled.name == 'setup.iss.jinja'
+    assert source.name is None
+    assert compiled.render(_CONFIG) == source.render(_CONFIG)
+
+def test_stale_compiled_templates_fall_back_to_source(tmpdir):
+    templates_dir = _copy_templates(tmpdir)
+    compiled_dir = tmpdir.join('compiled')
+    compile_templates(str(templates_dir), str(compiled_dir))
+    templates_dir.join('resources.qrc.jinja').write('changed')
+    template = load_template('resources.qrc', str(templates_dir), str(compiled_dir))
+    assert template.render() == 'changed'
+    assert load_template('package.pdy', str(templates_dir), str(compiled_dir)).name == 'package.pdy.jinja'
@@ -0,0 +1,37 @@
+from pyqtinstaller.timings import (
+    TimingsDatabase, StageTiming, TOTAL, get_baseline, get_regressions, get_exceeded_budgets, get_files_size
+)
+
+def record(database, nmake, config_hash='config'):
+    return database.record('build', '1.0.0', config_hash, {
+        'qmake': StageTiming(1.0, 1, 100),
+        'nmake': StageTiming(nmake, 10, 1000),
+        TOTAL: StageTiming(nmake + 1.0, 20, 2000)
+    })
+
+def test_runs_are_returned_latest_first(tmpdir):
+    database = TimingsDatabase(str(tmpdir.join('state', 'timings.sqlite3')))
+    assert database.get_runs() == []
+    first = record(database, 10.0)
+    record(database, 20.0, 'other')
+    latest = record(database, 30.0)
+    runs = database.get_runs('config')
+    assert [r.id for r in runs] == [latest, first]
+    assert list(runs[0].stages) == ['qmake', 'nmake', TOTAL]
+    assert runs[0].stages['nmake'] == StageTiming(30.0, 10, 1000)
+    assert [r.id for r in database.get_runs(limit=1)] == [latest]
+
+def test_slower_stages_are_regressions(tmpdir):
+    database = TimingsDatabase(str(tmpdir.join('timings.sqlite3')))
+    for nmake in [10.0, 12.0, 11.0, 30.0]:
+        record(database, nmake)
+    latest, *previous = database.get_runs('config')
+    baseline = get_baseline(previous)
+    assert baseline['nmake'] == 11.0
+    assert [r.stage for r in get_regressions(latest, baseline, 0.2)] == ['nmake', TOTAL]
+    assert get_regressions(latest, baseline, 2.0) == []
+    assert get_exceeded_budgets(latest, {'nmake': 20.0, 'qmake': 5.0, 'missing': 1.0}) == {'nmake': 30.0}
+
+def test_files_size_ignores_missing_files(tmpdir):
+    tmpdir.join('a').write('abc')
+    assert get_files_size([str(tmpdir.join('a')), str(tmpdir.join('a')), str(tmpdir.join('b'))]) == (1, 3)
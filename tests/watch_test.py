@@ -0,0 +1,28 @@
+import os
+from os import path
+
+from pyqtinstaller.watch import PollingWatcher, is_ignored, wait_for_changes
+
+def test_polling_watcher_reports_new_and_modified_files(tmpdir):
+    existing = tmpdir.join('existing.py')
+    existing.write('a = 1')
+    watcher = PollingWatcher([str(tmpdir)], interval=0.01)
+    assert watcher.wait(0) == set()
+
+    tmpdir.join('new.qml').write('Item {}')
+    existing.write('a = 22')
+    assert watcher.wait(0) == {path.join(str(tmpdir), 'new.qml'), str(existing)}
+
+def test_polling_watcher_ignores_generated_files(tmpdir):
+    watcher = PollingWatcher([str(tmpdir)], interval=0.01)
+    tmpdir.mkdir('__pycache__').join('module.cpython-36.pyc').write('')
+    tmpdir.join('__version__.py').write('__version__ = "1.0"')
+    assert watcher.wait(0) == set()
+
+def test_is_ignored():
+    assert is_ignored(path.join('package', '.module.py.swp'))
+    assert not is_ignored(path.join('package', 'module.py'))
+
+def test_wait_for_changes_includes_pending_changes(tmpdir):
+    watcher = PollingWatcher([str(tmpdir)], interval=0.01)
+    assert wait_for_changes(watcher, 0.01, {'pending.py'}) == {'pending.py'}